@@ -6,18 +6,19 @@
 
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, date, timedelta
 import os
-import requests
+import time
 
 from firebase_config import (
     inicjalizuj_firebase, zarejestruj_uzytkownika, zaloguj_uzytkownika,
     pobierz_portfele, stworz_portfel, usun_portfel,
     pobierz_transakcje, dodaj_transakcje, usun_transakcje, zapisz_profil,
     odswiez_token, wyslij_weryfikacje_email, sprawdz_weryfikacje, wyslij_reset_hasla,
+    nowy_cykl_odczytow, uruchom_lustro, zatrzymaj_lustro, wersja_danych,
+    dodaj_transakcje_zbiorczo, wznow_usuwanie, pobierz_pozycje,
 )
 from ticker_db import TICKER_DATABASE, szukaj_tickery
 from xtb_mapping import resolve_xtb_ticker
@@ -29,6 +30,9 @@ from statistics import (
     oblicz_statystyki, oblicz_drawdown_serie,
     oblicz_growth_serie, oblicz_profit_serie,
 )
+from ledger import przygotuj_transakcje, oblicz_szereg_z_cen, KsiegaPrzyrostowa
+from ohlcv_store import pobierz_przyrostowo, pobierz_przyrostowo_wielu
+from single_flight import jeden_lot
 import re
 import random
 import numpy as np
@@ -41,10 +45,14 @@ _BENCHMARKS = {
 }
 
 @st.cache_data(ttl=3600, show_spinner=False)
+@jeden_lot
 def pobierz_benchmark_growth(ticker: str, start_date, end_date) -> pd.Series:
     """Fetch benchmark index and return cumulative growth % aligned to date range."""
     try:
-        df = yf.download(ticker, start=start_date, end=end_date, progress=False)
+        df = shared_cache.pobierz(
+            f"benchmark:{_CACHE_VERSION}:{ticker}:{start_date}:{end_date}", 3600,
+            lambda: dostawca().historia(ticker, start=start_date, end=end_date),
+            pusty=lambda d: d.empty)
         if df.empty or len(df) < 2:
             return pd.Series(dtype=float)
         close = df["Close"].squeeze()
@@ -55,6 +63,7 @@ def pobierz_benchmark_growth(ticker: str, start_date, end_date) -> pd.Series:
         return pd.Series(dtype=float)
 
 @st.cache_data(ttl=21600, show_spinner=False)  # 6h TTL (shorter so failed lookups retry)
+@jeden_lot
 def pobierz_sektor(ticker: str, cv: str = _CACHE_VERSION) -> str:
     """Fetch sector for a ticker from yfinance.
     Uses multiple fallback approaches for maximum reliability."""
@@ -67,68 +76,86 @@ def pobierz_sektor(ticker: str, cv: str = _CACHE_VERSION) -> str:
                   "SP500FINANCIALS", "SP500ENERGY", "SP500HEALTH"}
     is_likely_etf = any(upper.endswith(s) for s in _etf_suffixes) or upper in _etf_names
 
-    yt = yf.Ticker(resolved)
-
-    # Approach 1: Try fast_info (lightweight, less likely to fail)
-    try:
-        qt = getattr(yt, "fast_info", {}).get("quoteType", "") if hasattr(yt, "fast_info") else ""
-        if qt == "ETF":
-            return "ETF"
-    except Exception:
-        pass
+    # Approach 1: .info z magazynu metadanych (sektor dla akcji, quoteType dla ETF)
+    sector = instrument_meta.sektor(resolved)
+    if sector:
+        return sector
+    if instrument_meta.typ(resolved) == "ETF":
+        return "ETF"
 
-    # Approach 2: Try full .info (has sector for stocks)
-    try:
-        info = yt.info
-        if isinstance(info, dict):
-            sector = info.get("sector", "")
-            if sector:
-                return sector
-            qt2 = info.get("quoteType", "")
-            if qt2 == "ETF":
+    # Approach 2: fast_info (gdy .info puste) — pomijane dla symbolu z negatywnego cache
+    if not circuit_breaker.zablokowany(resolved):
+        try:
+            if dostawca().typ_instrumentu(resolved) == "ETF":
                 return "ETF"
-    except Exception:
-        pass
+        except Exception:
+            pass
 
     # Approach 3: Fallback by ticker pattern
     if is_likely_etf:
         return "ETF"
     return "Unknown"
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def pobierz_korelacje(tickers: list, days: int = 90) -> pd.DataFrame:
-    """Fetch correlation matrix for a list of tickers."""
+# Zakres suwaka okresu korelacji (dni) — pobieramy raz maksimum, suwak tylko tnie
+KORELACJE_MAX_DNI = 365
+
+def pobierz_zamkniecia(tickers: tuple) -> pd.DataFrame:
+    """
+    Wyrównana macierz zamknięć (indeks = data, kolumny = tickery) za KORELACJE_MAX_DNI dni.
+    Z magazynu historii (OHLCV w SQLite) — brakujące zakresy dociągane zbiorczo
+    (historia_wielu po PACZKA_HISTORII symboli), cache wg godzin sesji, więc zmiana
+    okresu albo ponowne otwarcie zakładki nie pobiera danych od nowa.
+    """
+    data_od = (date.today() - timedelta(days=KORELACJE_MAX_DNI)).isoformat()
+    okna = tuple(sorted({market_hours.klucz_okna(_resolve_ticker(tk), "historia", krypto=is_crypto(tk))
+                         for tk in tickers}))
+    return _zamkniecia_okno(tuple(tickers), data_od, okna)
+
+def okno_zamkniec(ceny: pd.DataFrame, days: int) -> pd.DataFrame:
+    """
+    Ostatnie `days` dni macierzy zamknięć. Luki (weekendy akcji obok krypto) zostają
+    jako NaN — wypełnienie ostatnią ceną dałoby fałszywe zerowe zwroty i płaskie odcinki.
+    """
+    if ceny.empty:
+        return ceny
+    return ceny[ceny.index >= pd.Timestamp(date.today() - timedelta(days=days))].dropna(how="all")
+
+def pobierz_korelacje(tickers: list, days: int = 90, ceny: pd.DataFrame | None = None,
+                      shrinkage: bool = False, klastry: bool = False) -> pd.DataFrame:
+    """
+    Macierz korelacji dziennych log-zwrotów (correlation.py: float32, pary z pełnych
+    obserwacji, cache per uniwersum i okno). ceny — gotowa macierz z pobierz_zamkniecia.
+    """
     try:
-        end = datetime.now()
-        start = end - timedelta(days=days)
-        data = yf.download(tickers, start=start, end=end, progress=False)["Close"]
-        if isinstance(data, pd.Series):
-            data = data.to_frame()
-        return data.pct_change().dropna().corr()
+        if ceny is None:
+            ceny = pobierz_zamkniecia(tuple(tickers))
+        okno = okno_zamkniec(ceny, days)
+        return correlation.macierz_korelacji(okno, shrinkage=shrinkage, klastry=klastry,
+                                             min_obserwacji=min(correlation.MIN_OBSERWACJI, days // 3))
     except Exception:
         return pd.DataFrame()
 
 @st.cache_data(ttl=86400, show_spinner=False)
+@jeden_lot
 def pobierz_dywidendy(ticker: str) -> dict:
     """Fetch dividend info for a ticker."""
     try:
-        tk = yf.Ticker(ticker)
-        info = tk.info
-        divs = tk.dividends
+        resolved = _resolve_ticker(ticker)
+        divs = dostawca().dywidendy(resolved)
         last_div = f"${divs.iloc[-1]:.4f}" if len(divs) > 0 else "—"
         return {
-            "yield": info.get("dividendYield", 0) or 0,
+            "yield": instrument_meta.stopa_dywidendy(resolved),
             "last": last_div,
         }
     except Exception:
         return {"yield": 0, "last": "—"}
 
 @st.cache_data(ttl=86400, show_spinner=False)
+@jeden_lot
 def pobierz_kalendarz(ticker: str) -> list:
     """Fetch upcoming earnings/events for a ticker."""
     try:
-        tk = yf.Ticker(ticker)
-        cal = tk.calendar
+        cal = dostawca().kalendarz(ticker)
         events = []
         if cal is not None and not cal.empty:
             for col in cal.columns:
@@ -140,8 +167,31 @@ def pobierz_kalendarz(ticker: str) -> list:
     except Exception:
         return []
 
+@st.cache_data(ttl=3600, show_spinner=False)
+@jeden_lot
+def pobierz_dane_kalendarza(ticker: str) -> dict:
+    """Fetch .info and .earnings_dates for the calendar tab (one cached call per ticker)."""
+    resolved = _resolve_ticker(ticker)
+    info = instrument_meta.info(resolved)
+    try:
+        earnings = dostawca().daty_wynikow(resolved)
+    except Exception:
+        earnings = None
+    return {"info": info, "earnings_dates": earnings}
+
 from ocr_reader import extract_transactions_from_image
-from logo_fetcher import get_logo_html
+from logo_fetcher import get_logo_html, get_logo_url
+from fetch_executor import rownolegle
+from market_data import dostawca, swiece_krypto
+import quote_cache
+import circuit_breaker
+import shared_cache
+import instrument_meta
+import correlation
+import indicators
+import candles
+import chart_utils
+import market_hours
 
 # =============================================================================
 # STAŁE
@@ -201,47 +251,12 @@ BLOFIN_BAR_MAP = {
 }
 
 @st.cache_data(ttl=30)  # cache 30s for near-real-time
+@jeden_lot
 def fetch_blofin_candles(inst_id: str, bar: str = "1D", limit: int = 300) -> pd.DataFrame:
-    """Fetch OHLCV candlestick data from BloFin public API with pagination for deep history."""
-    import time
-    url = "https://openapi.blofin.com/api/v1/market/candles"
-    all_rows = []
-    remaining = limit
-    after_ts = None
-    max_pages = 6  # max 6 pages = up to 8640 candles
-
+    """Fetch OHLCV candlestick data for crypto (BloFin public API by default, see market_data.swiece_krypto)."""
+    dostawca("krypto")  # błędne BETA1_MARKET_DATA_KRYPTO — wyjątek, nie puste dane
     try:
-        for _ in range(max_pages):
-            if remaining <= 0:
-                break
-            batch = min(remaining, 1440)
-            params = {"instId": inst_id, "bar": bar, "limit": batch}
-            if after_ts:
-                params["after"] = str(after_ts)
-            r = requests.get(url, params=params, timeout=10)
-            data = r.json()
-            if data.get("code") != "0" or not data.get("data"):
-                break
-            rows = data["data"]
-            all_rows.extend(rows)
-            remaining -= len(rows)
-            # BloFin returns newest first; last row = oldest — use 'after' to go further back
-            after_ts = int(float(rows[-1][0]))
-            if len(rows) < batch:
-                break  # no more data available
-            time.sleep(0.1)  # rate limit courtesy
-
-        if not all_rows:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(all_rows, columns=["ts", "Open", "High", "Low", "Close",
-                                               "Volume", "VolCcy", "VolCcyQuote", "Confirm"])
-        df["ts"] = pd.to_datetime(df["ts"].astype(float), unit="ms")
-        df = df.drop_duplicates(subset=["ts"]).set_index("ts").sort_index()
-        for c in ["Open", "High", "Low", "Close", "Volume"]:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-        df = df[["Open", "High", "Low", "Close", "Volume"]]
-        return df
+        return swiece_krypto(inst_id, bar, limit)
     except Exception:
         return pd.DataFrame()
 
@@ -524,76 +539,211 @@ def _resolve_ticker(ticker: str, cv: str = _CACHE_VERSION) -> str:
     Uses XTB mapping (deterministic, no API calls needed)."""
     return resolve_xtb_ticker(ticker)
 
-@st.cache_data(ttl=900, show_spinner=False)
-def pobierz_aktualna_cene(ticker: str, cv: str = _CACHE_VERSION) -> dict:
-    """Pobiera aktualną cenę z yfinance. Cache 15 min."""
-    def _fetch(tk):
-        """Inner fetch for a single ticker variant."""
-        try:
-            akcja = yf.Ticker(tk)
-            hist = akcja.history(period="5d")
-            if not hist.empty and len(hist) >= 1:
-                cena = float(hist["Close"].iloc[-1])
-                zmiennosc = 0.0
-                if len(hist) >= 2:
-                    zmiennosc = ((hist["Close"].iloc[-1] - hist["Close"].iloc[-2]) / hist["Close"].iloc[-2]) * 100
-                try:
-                    nazwa = akcja.info.get("shortName", tk)
-                except Exception:
-                    nazwa = tk
-                return {"cena": cena, "nazwa": nazwa,
-                        "zmiennosc_dzienna": round(zmiennosc, 2), "error": None}
-        except Exception:
-            pass
-        return None
+# Nazwy z lokalnej bazy tickerów ("AAPL — Apple Inc.") — bez zapytań sieciowych
+_NAZWY_Z_BAZY = {}
+for _klucz, _symbol in TICKER_DATABASE.items():
+    _tk, _nazwa = _klucz.split(" — ", 1)
+    _NAZWY_Z_BAZY.setdefault(_tk, _nazwa)
+    _NAZWY_Z_BAZY.setdefault(_symbol, _nazwa)
+
+@st.cache_data(ttl=604800, show_spinner=False)  # 7 dni — nazwy spółek praktycznie się nie zmieniają
+@jeden_lot
+def pobierz_nazwe(ticker: str, cv: str = _CACHE_VERSION) -> str:
+    """Krótka nazwa instrumentu: baza tickerów, a dopiero potem .info (długi cache)."""
+    resolved = _resolve_ticker(ticker)
+    nazwa = _NAZWY_Z_BAZY.get(ticker.upper()) or _NAZWY_Z_BAZY.get(resolved)
+    if nazwa:
+        return nazwa
+    try:
+        return instrument_meta.nazwa(resolved) or resolved
+    except Exception:
+        return resolved
 
+def _notowanie_z_zamkniec(closes: pd.Series, ticker: str) -> dict | None:
+    """Buduje dict notowania z ostatnich dwóch zamknięć (None gdy brak danych)."""
+    closes = closes.dropna()
+    if closes.empty:
+        return None
+    cena = float(closes.iloc[-1])
+    zmiennosc = 0.0
+    if len(closes) >= 2:
+        zmiennosc = ((closes.iloc[-1] - closes.iloc[-2]) / closes.iloc[-2]) * 100
+    return {"cena": cena, "nazwa": pobierz_nazwe(ticker),
+            "zmiennosc_dzienna": round(float(zmiennosc), 2), "error": None}
+
+@jeden_lot
+def _notowanie_z_sieci(ticker: str) -> dict:
+    """Aktualna cena z yfinance (bez cache — wywoływane też z wątku odświeżania w tle)."""
     # Resolve ticker to valid yfinance symbol
     resolved = _resolve_ticker(ticker)
-    result = _fetch(resolved)
-    if result:
-        return result
+    try:
+        hist = circuit_breaker.wywolaj(resolved, lambda: dostawca().historia(resolved, period="5d"),
+                                       pusty=lambda h: h.empty)
+        if not hist.empty:
+            result = _notowanie_z_zamkniec(hist["Close"], ticker)
+            if result:
+                return result
+    except Exception:
+        pass
 
     return {"error": f"Nie znaleziono danych: {ticker}"}
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def pobierz_historie(ticker: str, data_od: str, cv: str = _CACHE_VERSION) -> pd.DataFrame:
-    """Pobiera historyczne dane zamknięcia."""
+@jeden_lot
+def pobierz_aktualne_ceny(tickers: tuple) -> dict:
+    """
+    Notowania wielu tickerów jednym zapytaniem (historia_wielu dostawcy — dla yfinance jedno yf.download). Zwraca {ticker: dict jak _notowanie_z_sieci}.
+    Bez cache — używane przez notowania_swr() (quote_cache), również z wątku w tle.
+    """
+    if not tickers:
+        return {}
+    resolved = {tk: _resolve_ticker(tk) for tk in tickers}
+    # Symbole z negatywnego cache (albo otwarty bezpiecznik) — bez zapytania do Yahoo
+    wyniki = {tk: {"error": f"Nie znaleziono danych: {tk}"}
+              for tk, sym in resolved.items() if circuit_breaker.zablokowany(sym)}
+    do_pobrania = [tk for tk in tickers if tk not in wyniki]
+    # Wspólny cache między workerami — notowanie pobiera jeden worker, reszta je czyta
+    wyniki.update(shared_cache.pobierz_wiele(
+        {tk: f"notowanie:{_CACHE_VERSION}:{resolved[tk]}" for tk in do_pobrania},
+        _ttl_notowania, lambda tks: _notowania_zbiorczo(tks, resolved),
+        pusty=lambda w: bool(w.get("error"))))
+    # Symbole, których nie było w zbiorczej odpowiedzi — pojedyncze zapytania (z własnym cache)
+    brakujace = [tk for tk in tickers if tk not in wyniki]
+    bledy = {"error": "Nie znaleziono danych"}
+    for tk, wynik in zip(brakujace, rownolegle(_notowanie_z_sieci, brakujace, domyslna=bledy)):
+        wyniki[tk] = wynik
+    return wyniki
+
+def _notowania_zbiorczo(tickers: list, resolved: dict) -> dict:
+    """Jedno zbiorcze zapytanie (historia_wielu) o notowania tickerów; brakujące pomija."""
+    wyniki = {}
+    symbole = sorted({resolved[tk] for tk in tickers})
+    try:
+        data = dostawca().historia_wielu(symbole, period="5d") if symbole else {}
+        for tk in tickers:
+            sym = resolved[tk]
+            try:
+                wynik = _notowanie_z_zamkniec(data[sym]["Close"], tk)
+                if wynik:
+                    wyniki[tk] = wynik
+                    circuit_breaker.sukces(sym)
+            except KeyError:
+                continue
+    except Exception:
+        circuit_breaker.porazka()
+    return wyniki
+
+def notowania_swr(tickers: tuple) -> tuple:
+    """
+    Notowania „stale-while-revalidate”: ostatnia znana cena od razu, odświeżanie w tle.
+    Zwraca ({ticker: dict notowania}, {ticker: wiek w sekundach}).
+    Czas życia wg godzin sesji giełdy (market_hours) — zamknięty rynek nie jest odpytywany.
+    """
+    return quote_cache.pobierz(tickers, pobierz_aktualne_ceny, ttl=_ttl_notowania)
+
+def _ttl_notowania(ticker: str) -> float:
+    return market_hours.ttl(_resolve_ticker(ticker), "notowania", krypto=is_crypto(ticker))
+
+def pobierz_historie(ticker: str, data_od: str) -> pd.DataFrame:
+    """
+    Pobiera historyczne dane zamknięcia (lokalny magazyn OHLCV + dociąganie ogona).
+    Cache ważny do końca okna z market_hours — przy zamkniętej giełdzie do jej otwarcia.
+    """
+    okno = market_hours.klucz_okna(_resolve_ticker(ticker), "historia", krypto=is_crypto(ticker))
+    return _pobierz_historie_okno(ticker, data_od, okno)
+
+@st.cache_data(ttl=market_hours.MAX_TTL_ZAMKNIETEJ, show_spinner=False)
+@jeden_lot
+def _pobierz_historie_okno(ticker: str, data_od: str, okno: str, cv: str = _CACHE_VERSION) -> pd.DataFrame:
+    resolved = _resolve_ticker(ticker)
+    try:
+        return shared_cache.pobierz(
+            f"historia:{cv}:{resolved}:{data_od}:{okno}",
+            market_hours.ttl(resolved, "historia", krypto=is_crypto(ticker)),
+            lambda: _historia_zamkniec(resolved, data_od), pusty=lambda d: d.empty)
+    except Exception:
+        return pd.DataFrame()
+
+def _historia_zamkniec(resolved: str, data_od: str) -> pd.DataFrame:
+    hist = pobierz_przyrostowo(resolved, "1d", data_od, lambda od: circuit_breaker.wywolaj(
+        resolved, lambda: dostawca().historia(resolved, start=od), pusty=lambda h: h.empty))
+    if hist.empty:
+        return pd.DataFrame()
+    hist = hist[["Close"]].reset_index()
+    hist.columns = ["Data", "Zamkniecie"]
+    hist["Data"] = pd.to_datetime(hist["Data"]).dt.tz_localize(None)
+    return hist
+
+# Symboli w jednym zapytaniu historia_wielu (jedno yf.download)
+PACZKA_HISTORII = 100
+
+@st.cache_data(ttl=market_hours.MAX_TTL_ZAMKNIETEJ, show_spinner=False)
+@jeden_lot
+def _zamkniecia_okno(tickers: tuple, data_od: str, okna: tuple, cv: str = _CACHE_VERSION) -> pd.DataFrame:
+    resolved = {tk: _resolve_ticker(tk) for tk in tickers}
+    try:
+        historie = pobierz_przyrostowo_wielu(sorted(set(resolved.values())), "1d", data_od, _historia_wielu)
+    except Exception:
+        return pd.DataFrame()
+    kolumny = {tk: historie[r]["Close"] for tk, r in resolved.items() if not historie[r].empty}
+    return pd.DataFrame(kolumny).sort_index()
+
+def _historia_wielu(symbole: list, od: str) -> dict:
+    """Zbiorcze pobranie historii (po PACZKA_HISTORII symboli); zablokowane i puste pomija."""
+    dozwolone = [s for s in symbole if circuit_breaker.dozwolone(s)]
+    wynik = {}
+    for i in range(0, len(dozwolone), PACZKA_HISTORII):
+        paczka = dozwolone[i:i + PACZKA_HISTORII]
+        try:
+            dane = dostawca().historia_wielu(paczka, start=od)
+        except Exception:
+            circuit_breaker.porazka()
+            continue
+        for sym in paczka:
+            df = dane.get(sym)
+            if df is None or df.empty:
+                circuit_breaker.porazka(sym, awaria=False)
+            else:
+                wynik[sym] = df
+                circuit_breaker.sukces(sym)
+    return wynik
+
+def pobierz_swiece(ticker: str, interwal: str, od) -> pd.DataFrame:
+    """
+    Świece interwału zakładki Wskaźniki (candles.py): interwał bazowy (15m / 1h / 1d)
+    z magazynu OHLCV, grubsze interwały składane lokalnie — zmiana interwału bez zapytań.
+    """
     resolved = _resolve_ticker(ticker)
+    bazowy = candles.baza(interwal)
+    rodzaj = "notowania" if bazowy in candles.INTRADAY else "historia"
+    okno = market_hours.klucz_okna(resolved, rodzaj, krypto=is_crypto(ticker))
+    return candles.swiece(_swiece_bazowe(resolved, bazowy, okno), interwal, od)
+
+@st.cache_data(ttl=market_hours.MAX_TTL_ZAMKNIETEJ, show_spinner=False)
+@jeden_lot
+def _swiece_bazowe(symbol: str, interwal_bazowy: str, okno: str, cv: str = _CACHE_VERSION) -> pd.DataFrame:
     try:
-        hist = yf.Ticker(resolved).history(start=data_od)
-        if hist.empty:
-            return pd.DataFrame()
-        hist = hist[["Close"]].reset_index()
-        hist.columns = ["Data", "Zamkniecie"]
-        hist["Data"] = pd.to_datetime(hist["Data"]).dt.tz_localize(None)
-        return hist
+        return candles.bazowe(symbol, interwal_bazowy, lambda od: circuit_breaker.wywolaj(
+            symbol, lambda: dostawca().historia(symbol, start=od, interval=interwal_bazowy),
+            pusty=lambda h: h.empty))
     except Exception:
         return pd.DataFrame()
 
 # =============================================================================
 # OBLICZENIA PORTFELA
 # =============================================================================
-def oblicz_portfel(transakcje: list) -> pd.DataFrame:
-    """Oblicza podsumowanie portfela z listy transakcji."""
-    if not transakcje: return pd.DataFrame()
-    df = pd.DataFrame(transakcje)
+def oblicz_portfel(snapshot_pozycji: dict) -> pd.DataFrame:
+    """Oblicza podsumowanie portfela ze snapshotu pozycji (pobierz_pozycje)."""
+    if not snapshot_pozycji: return pd.DataFrame()
+    # Kolejność jak dawniej w pętli po transakcjach — od najwcześniej kupionego
+    kolejnosc = sorted(snapshot_pozycji.items(), key=lambda kv: (kv[1].get("pierwszy_zakup") or "", kv[0]))
+    pozycje = [(ticker, float(stan["ilosc"]), float(stan["koszt"]))
+               for ticker, stan in kolejnosc if float(stan["ilosc"]) > 0]
+    # Jedno zbiorcze zapytanie o notowania wszystkich otwartych pozycji
+    notowania, wiek = notowania_swr(tuple(sorted(tk for tk, _, _ in pozycje)))
     wyniki = []
-    for ticker in df["ticker"].unique():
-        df_t = df[df["ticker"] == ticker]
-        ilosc_netto, koszt = 0.0, 0.0
-        for _, row in df_t.iterrows():
-            if row["typ"] == "Kupno":
-                koszt += float(row["ilosc"]) * float(row["cena_zakupu"])
-                ilosc_netto += float(row["ilosc"])
-            else:
-                if ilosc_netto > 0:
-                    sr = koszt / ilosc_netto
-                    sprzedaz = min(float(row["ilosc"]), ilosc_netto)
-                    koszt -= sr * sprzedaz
-                    ilosc_netto -= sprzedaz
-        if ilosc_netto <= 0: continue
+    for ticker, ilosc_netto, koszt in pozycje:
         srednia_cena = koszt / ilosc_netto if ilosc_netto > 0 else 0
-        dane = pobierz_aktualna_cene(ticker)
+        dane = notowania.get(ticker) or {"error": ticker}
         has_error = bool(dane.get("error"))
         cena_akt = dane["cena"] if not has_error else srednia_cena
         zmiennosc = dane.get("zmiennosc_dzienna", 0) if not has_error else 0
@@ -605,71 +755,48 @@ def oblicz_portfel(transakcje: list) -> pd.DataFrame:
             "Śr. Cena Zakupu ($)": round(srednia_cena, 2), "Cena Bieżąca ($)": round(cena_akt, 2),
             "Wartość ($)": round(wartosc, 2), "Zysk/Strata ($)": round(zysk, 2),
             "ROI (%)": round(roi, 2), "Zmienność (%)": zmiennosc,
-            "_price_error": has_error})
+            "_price_error": has_error, "_price_age": wiek.get(ticker, 0.0)})
     return pd.DataFrame(wyniki) if wyniki else pd.DataFrame()
 
-def oblicz_historie_portfela(transakcje: list) -> pd.DataFrame:
-    """Historia wartości portfela w czasie."""
-    if not transakcje: return pd.DataFrame()
-    df = pd.DataFrame(transakcje)
-    df["data"] = pd.to_datetime(df["data"])
-    data_start = df["data"].min().strftime("%Y-%m-%d")
+def _macierz_cen(df_tx: pd.DataFrame) -> pd.DataFrame:
+    """Wyrównana macierz cen zamknięcia (daty × tickery) od pierwszej transakcji."""
+    data_start = df_tx["data"].min().strftime("%Y-%m-%d")
+    tickery = list(df_tx["ticker"].unique())
     historie = {}
-    for ticker in df["ticker"].unique():
-        h = pobierz_historie(ticker, data_start)
+    for ticker, h in zip(tickery, rownolegle(lambda tk: pobierz_historie(tk, data_start), tickery,
+                                             domyslna=pd.DataFrame())):
         if not h.empty: historie[ticker] = h.set_index("Data")["Zamkniecie"]
     if not historie: return pd.DataFrame()
-    df_hist = pd.DataFrame(historie).ffill().bfill()
-    wartosci = []
-    for data_idx in df_hist.index:
-        wartosc_dnia = 0.0
-        for ticker in df["ticker"].unique():
-            if ticker not in df_hist.columns: continue
-            trans = df[(df["ticker"] == ticker) & (df["data"] <= data_idx)]
-            il = sum(float(r["ilosc"]) if r["typ"] == "Kupno" else -float(r["ilosc"]) for _, r in trans.iterrows())
-            wartosc_dnia += max(il, 0) * df_hist.loc[data_idx, ticker]
-        wartosci.append({"Data": data_idx, "Wartość Portfela ($)": round(wartosc_dnia, 2)})
-    return pd.DataFrame(wartosci)
-
-def oblicz_roi_portfela(transakcje: list) -> pd.DataFrame:
-    """Oblicza dzienną stopę zwrotu (ROI%) całego portfela w czasie."""
+    return pd.DataFrame(historie).ffill().bfill()
+
+def oblicz_szereg_portfela(transakcje: list) -> pd.DataFrame:
+    """Wspólny szereg portfela: wartość, kapitał, ROI% i ilości per ticker (jedno pobranie historii)."""
     if not transakcje: return pd.DataFrame()
-    df = pd.DataFrame(transakcje)
-    df["data"] = pd.to_datetime(df["data"])
-    df["ilosc"] = df["ilosc"].astype(float)
-    df["cena_zakupu"] = df["cena_zakupu"].astype(float)
-    data_start = df["data"].min().strftime("%Y-%m-%d")
-    # Pobierz historię cen
-    historie = {}
-    for ticker in df["ticker"].unique():
-        h = pobierz_historie(ticker, data_start)
-        if not h.empty: historie[ticker] = h.set_index("Data")["Zamkniecie"]
-    if not historie: return pd.DataFrame()
-    df_hist = pd.DataFrame(historie).ffill().bfill()
-    wyniki = []
-    for data_idx in df_hist.index:
-        wartosc_rynkowa = 0.0
-        kapital_zainwestowany = 0.0
-        for ticker in df["ticker"].unique():
-            if ticker not in df_hist.columns: continue
-            trans = df[(df["ticker"] == ticker) & (df["data"] <= data_idx)]
-            ilosc_netto = 0.0
-            koszt_netto = 0.0
-            for _, r in trans.iterrows():
-                if r["typ"] == "Kupno":
-                    ilosc_netto += r["ilosc"]
-                    koszt_netto += r["ilosc"] * r["cena_zakupu"]
-                else:
-                    if ilosc_netto > 0:
-                        sr = koszt_netto / ilosc_netto
-                        sprzedaz = min(r["ilosc"], ilosc_netto)
-                        koszt_netto -= sr * sprzedaz
-                        ilosc_netto -= sprzedaz
-            wartosc_rynkowa += max(ilosc_netto, 0) * df_hist.loc[data_idx, ticker]
-            kapital_zainwestowany += max(koszt_netto, 0)
-        roi = ((wartosc_rynkowa - kapital_zainwestowany) / kapital_zainwestowany * 100) if kapital_zainwestowany > 0 else 0
-        wyniki.append({"Data": data_idx, "ROI (%)": round(roi, 2), "Wartość ($)": round(wartosc_rynkowa, 2), "Kapitał ($)": round(kapital_zainwestowany, 2)})
-    return pd.DataFrame(wyniki)
+    df = przygotuj_transakcje(transakcje)
+    df_hist = _macierz_cen(df)
+    if df_hist.empty: return pd.DataFrame()
+    return oblicz_szereg_z_cen(df, df_hist)
+
+# Po tylu sekundach szereg jest przeliczany mimo braku zmian w danych (nowe notowania)
+SZEREG_TTL = 3600
+
+def szereg_portfela_przyrostowo(uid: str, portfolio_id: str, wersja: int | None, transakcje: list) -> pd.DataFrame:
+    """
+    Szereg portfela z księgi przyrostowej trzymanej w session_state.
+    Po dodaniu/usunięciu transakcji przeliczane są tylko dni od jej daty.
+    Bez zmiany wersji danych (lustro Firestore) i przed upływem SZEREG_TTL — wynik z pamięci.
+    """
+    ksiegi = st.session_state.setdefault("_ksiegi", {})
+    wpis = ksiegi.get((uid, portfolio_id))
+    if wpis is None:
+        wpis = ksiegi[(uid, portfolio_id)] = {"ksiega": KsiegaPrzyrostowa(), "wersja": None, "czas": 0.0}
+    if wersja is not None and wpis["wersja"] == wersja and time.time() - wpis["czas"] < SZEREG_TTL:
+        return wpis["ksiega"].szereg
+    df = przygotuj_transakcje(transakcje)
+    df_hist = _macierz_cen(df) if not df.empty else pd.DataFrame()
+    szereg = wpis["ksiega"].aktualizuj(df, df_hist)
+    wpis["wersja"], wpis["czas"] = wersja, time.time()
+    return szereg
 
 # =============================================================================
 # EKRAN LOGOWANIA / REJESTRACJI
@@ -862,10 +989,15 @@ def main():
     # --- Firebase ---
     db = inicjalizuj_firebase()
     uid = st.session_state.uid
+    nowy_cykl_odczytow()  # jeden odczyt transakcji na portfel w tym reranie
+    uruchom_lustro(db, uid)  # listenery on_snapshot — kolejne reruny czytają z pamięci
+    wznow_usuwanie(db, uid)  # dokończ sprzątanie portfeli usuniętych przed restartem
 
     # --- Inicjalizacja domyślnych ustawień ---
     if "motyw_ciemny" not in st.session_state: st.session_state.motyw_ciemny = True
     if "paleta" not in st.session_state: st.session_state.paleta = "Oceanic"
+    if "probkowanie_wykresow" not in st.session_state: st.session_state.probkowanie_wykresow = True
+    if "tryb_webgl" not in st.session_state: st.session_state.tryb_webgl = "auto"
     if "aktywny_portfel" not in st.session_state: st.session_state.aktywny_portfel = None
     if "lang" not in st.session_state: st.session_state.lang = "pl"
     L = st.session_state.lang
@@ -927,6 +1059,7 @@ def main():
         with uc2:
             if st.button("🚪", key="btn_logout_nav", help=t("logout", L)):
                 lang_backup = st.session_state.get("lang", "pl")
+                zatrzymaj_lustro(uid)
                 for key in list(st.session_state.keys()): del st.session_state[key]
                 st.session_state.lang = lang_backup
                 st.rerun()
@@ -974,9 +1107,8 @@ def main():
                     else:
                         typ_db = "Kupno" if typ == buy_label else "Sprzedaż"
                         if typ_db == "Sprzedaż":
-                            trans_list = pobierz_transakcje(db, uid, st.session_state.aktywny_portfel)
-                            posiadane = sum(float(tx["ilosc"]) if tx["typ"]=="Kupno" else -float(tx["ilosc"])
-                                            for tx in trans_list if tx["ticker"] == tk)
+                            stan = pobierz_pozycje(db, uid, st.session_state.aktywny_portfel).get(tk, {})
+                            posiadane = float(stan.get("ilosc", 0.0))
                             if il > posiadane:
                                 st.error(f"{t('only_have', L)} {posiadane:.4f} {tk}"); st.stop()
                         tx_data = {"ticker": tk, "ilosc": il, "cena_zakupu": cn, "data": str(data_tx), "typ": typ_db}
@@ -1012,12 +1144,12 @@ def main():
             if st.session_state.aktywny_portfel:
                 _tx_data = pobierz_transakcje(db, uid, st.session_state.aktywny_portfel)
                 if _tx_data:
-                    _pf = oblicz_portfel(_tx_data)
+                    _pf = oblicz_portfel(pobierz_pozycje(db, uid, st.session_state.aktywny_portfel))
                     if not _pf.empty:
                         _sektory = {}
                         _spolki = {}
-                        for _, row in _pf.iterrows():
-                            _sek = pobierz_sektor(row["Ticker"])
+                        _sektory_tk = rownolegle(pobierz_sektor, list(_pf["Ticker"]), domyslna="Unknown")
+                        for (_, row), _sek in zip(_pf.iterrows(), _sektory_tk):
                             _sek = _sek if _sek != "Unknown" else t("sector_unknown", L)
                             _sektory[_sek] = _sektory.get(_sek, 0) + row["Wartość ($)"]
                             _spolki[row["Ticker"]] = _spolki.get(row["Ticker"], 0) + row["Wartość ($)"]
@@ -1120,7 +1252,7 @@ def main():
                 if st.button(t("ocr_import_btn", L), key="btn_ocr_import", use_container_width=True):
                     if st.session_state.aktywny_portfel and edited_df is not None:
                         selected = edited_df[edited_df[t("ocr_select_col", L)] == True]
-                        imported = 0
+                        do_importu = []
                         for _, row in selected.iterrows():
                             try:
                                 tk = str(row[t("ocr_ticker_col", L)]).strip().upper()
@@ -1130,12 +1262,19 @@ def main():
                                 typ_val = str(row[t("ocr_type_col", L)])
                                 typ_db = "Kupno" if typ_val == ocr_buy else "Sprzedaż"
                                 if tk and il > 0 and cn > 0:
-                                    dodaj_transakcje(db, uid, st.session_state.aktywny_portfel,
-                                        {"ticker": tk, "ilosc": il, "cena_zakupu": cn, "data": dt, "typ": typ_db})
-                                    imported += 1
+                                    do_importu.append({"ticker": tk, "ilosc": il, "cena_zakupu": cn, "data": dt, "typ": typ_db})
                             except (ValueError, TypeError):
                                 continue
-                        if imported > 0:
+                        statusy = dodaj_transakcje_zbiorczo(db, uid, st.session_state.aktywny_portfel, do_importu)
+                        imported = sum(1 for s in statusy if s["status"] == "ok")
+                        pominiete = sum(1 for s in statusy if s["status"] == "pominieto")
+                        bledy = sum(1 for s in statusy if s["status"] == "blad")
+                        if pominiete:
+                            st.info(t("csv_skipped", L).format(pominiete))
+                        if bledy:
+                            # Wyniki OCR zostają — ponowny import dopisze tylko brakujące wiersze
+                            st.error(t("csv_failed", L).format(bledy))
+                        elif imported > 0:
                             st.success(t("ocr_success", L).format(imported))
                             st.session_state["_ocr_results"] = []
                             st.rerun()
@@ -1174,15 +1313,14 @@ def main():
 
                     if st.button(t("csv_import_btn", L), use_container_width=True, key="btn_csv_import"):
                         if st.session_state.aktywny_portfel and col_map:
-                            imported = 0
+                            tk_col = next((k for k, v in col_map.items() if v == "ticker"), None)
+                            il_col = next((k for k, v in col_map.items() if v == "ilosc"), None)
+                            cn_col = next((k for k, v in col_map.items() if v == "cena_zakupu"), None)
+                            dt_col = next((k for k, v in col_map.items() if v == "data"), None)
+                            tp_col = next((k for k, v in col_map.items() if v == "typ"), None)
+                            do_importu = []
                             for _, row in raw_df.iterrows():
                                 try:
-                                    tk_col = next((k for k, v in col_map.items() if v == "ticker"), None)
-                                    il_col = next((k for k, v in col_map.items() if v == "ilosc"), None)
-                                    cn_col = next((k for k, v in col_map.items() if v == "cena_zakupu"), None)
-                                    dt_col = next((k for k, v in col_map.items() if v == "data"), None)
-                                    tp_col = next((k for k, v in col_map.items() if v == "typ"), None)
-
                                     if not all([tk_col, il_col, cn_col]):
                                         continue
 
@@ -1194,14 +1332,25 @@ def main():
                                     typ_db = "Sprzedaż" if any(s in raw_typ for s in ["sell", "sprze", "short"]) else "Kupno"
 
                                     if tk and il > 0 and cn > 0:
-                                        dodaj_transakcje(db, uid, st.session_state.aktywny_portfel,
-                                            {"ticker": tk, "ilosc": il, "cena_zakupu": cn, "data": dt, "typ": typ_db})
-                                        imported += 1
+                                        do_importu.append({"ticker": tk, "ilosc": il, "cena_zakupu": cn, "data": dt, "typ": typ_db})
                                 except (ValueError, TypeError, KeyError):
                                     continue
-                            if imported > 0:
-                                st.success(t("csv_success", L).format(imported))
-                                st.rerun()
+                            if do_importu:
+                                # Zapis paczkami po 500 (WriteBatch) — idempotentny, ponowienie nie dubluje transakcji
+                                pasek = st.progress(0.0)
+                                statusy = dodaj_transakcje_zbiorczo(
+                                    db, uid, st.session_state.aktywny_portfel, do_importu,
+                                    postep=lambda zrobione, wszystkie: pasek.progress(zrobione / wszystkie))
+                                imported = sum(1 for s in statusy if s["status"] == "ok")
+                                pominiete = sum(1 for s in statusy if s["status"] == "pominieto")
+                                bledy = sum(1 for s in statusy if s["status"] == "blad")
+                                if pominiete:
+                                    st.info(t("csv_skipped", L).format(pominiete))
+                                if bledy:
+                                    st.error(t("csv_failed", L).format(bledy))
+                                else:
+                                    st.success(t("csv_success", L).format(imported))
+                                    st.rerun()
                             else:
                                 st.error(t("csv_error", L))
                 except Exception as e:
@@ -1214,8 +1363,8 @@ def main():
             tickers_in = list(set(tx["ticker"] for tx in tx_list)) if tx_list else []
             if tickers_in:
                 div_data = []
-                for tk in tickers_in:
-                    d = pobierz_dywidendy(tk)
+                dywidendy = rownolegle(pobierz_dywidendy, tickers_in, domyslna={"yield": 0, "last": "—"})
+                for tk, d in zip(tickers_in, dywidendy):
                     qty = sum(float(tx["ilosc"]) if tx["typ"]=="Kupno" else -float(tx["ilosc"])
                               for tx in tx_list if tx["ticker"] == tk)
                     annual = qty * d["yield"] * 100 if d["yield"] else 0
@@ -1246,10 +1395,12 @@ def main():
 
         if cal_tickers:
             with st.spinner("⏳"):
-                for tk in cal_tickers:
+                dane_kal = rownolegle(pobierz_dane_kalendarza, cal_tickers)
+                for tk, dane in zip(cal_tickers, dane_kal):
                     try:
-                        ticker_obj = yf.Ticker(tk)
-                        info = ticker_obj.info or {}
+                        if dane is None:
+                            raise ValueError(tk)
+                        info = dane["info"]
                         name = info.get("shortName") or info.get("longName") or tk
                         sector = info.get("sector", "—")
                         mkt_cap = info.get("marketCap")
@@ -1299,7 +1450,7 @@ def main():
 
                         # 3. Earnings history from .earnings_dates
                         try:
-                            ed = ticker_obj.earnings_dates
+                            ed = dane["earnings_dates"]
                             if ed is not None and not ed.empty:
                                 upcoming = ed[ed.index >= pd.Timestamp.now(tz="UTC")]
                                 show_ed = upcoming.head(3) if not upcoming.empty else ed.head(3)
@@ -1336,11 +1487,17 @@ def main():
             tickers_in = list(set(tx["ticker"] for tx in tx_list)) if tx_list else []
             all_options = tickers_in + ["^GSPC", "WIG20.WA", "BTC-USD", "ETH-USD"]
             selected = st.multiselect(t("corr_select", L), all_options, default=tickers_in[:4], key="corr_assets")
-            corr_days = st.slider(t("corr_period", L), 30, 365, 90, key="corr_days")
+            corr_days = st.slider(t("corr_period", L), 30, KORELACJE_MAX_DNI, 90, key="corr_days")
+            cc1, cc2 = st.columns(2)
+            corr_shrink = cc1.toggle(t("corr_shrinkage", L), key="corr_shrinkage", help=t("corr_shrinkage_help", L))
+            corr_klastry = cc2.toggle(t("corr_cluster", L), value=True, key="corr_cluster")
 
             if len(selected) >= 2:
                 with st.spinner("..."):
-                    corr_matrix = pobierz_korelacje(tuple(selected), corr_days)
+                    # Jedno pobranie dla heatmapy i wykresu, suwak tylko tnie macierz
+                    ceny_corr = pobierz_zamkniecia(tuple(selected))
+                    corr_matrix = pobierz_korelacje(selected, corr_days, ceny=ceny_corr,
+                                                    shrinkage=corr_shrink, klastry=corr_klastry)
                 if not corr_matrix.empty:
                     fig_corr = px.imshow(
                         corr_matrix, text_auto=".2f", color_continuous_scale="RdBu_r",
@@ -1357,12 +1514,12 @@ def main():
 
                     # Price chart comparison
                     st.markdown(f"**{t('corr_chart', L)}**")
-                    end_dt = datetime.now()
-                    start_dt = end_dt - timedelta(days=corr_days)
-                    price_data = yf.download(selected, start=start_dt, end=end_dt, progress=False)["Close"]
+                    price_data = okno_zamkniec(ceny_corr, corr_days).dropna(axis=1, how="all")
                     if not price_data.empty:
-                        normalized = (price_data / price_data.iloc[0]) * 100
+                        # Każda kolumna względem własnej pierwszej ceny w oknie, tylko z własnych notowań
+                        normalized = price_data.apply(lambda s: s / s.dropna().iloc[0] * 100)
                         fig_price = px.line(normalized, title=None)
+                        fig_price.update_traces(connectgaps=True)  # weekendy akcji: linia bez sztucznych płaskich punktów
                         fig_price.update_layout(
                             paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
                             font=dict(family="Inter"), height=350,
@@ -1372,9 +1529,35 @@ def main():
                             hovermode="x unified",
                             transition=dict(duration=500, easing="cubic-in-out"),
                         )
-                        st.plotly_chart(fig_price, use_container_width=True, config=CHART_CONFIG)
+                        st.plotly_chart(chart_utils.webgl(fig_price, st.session_state.tryb_webgl), use_container_width=True, config=CHART_CONFIG)
             else:
                 st.info(t("corr_no_data", L))
+
+            # Portfel na tle całej bazy tickerów — jedna kolumna portfela × całe uniwersum
+            with st.expander(t("corr_universe", L)):
+                uniwersum = sorted(set(TICKER_DATABASE.values()))
+                if st.button(t("corr_universe_btn", L).format(len(uniwersum)), key="corr_universe_btn"):
+                    st.session_state.corr_universe = True
+                if st.session_state.get("corr_universe"):
+                    pozycje_u = pobierz_pozycje(db, uid, st.session_state.aktywny_portfel)
+                    wagi_u = {tk: float(p["koszt"]) for tk, p in pozycje_u.items() if float(p["ilosc"]) > 0}
+                    if wagi_u:
+                        with st.spinner("⏳"):
+                            ceny_u = pobierz_zamkniecia(tuple(sorted(set(uniwersum) | set(wagi_u))))
+                        okno_u = okno_zamkniec(ceny_u, corr_days)
+                        kor_u = correlation.korelacja_z_portfelem(
+                            okno_u, wagi_u, min_obserwacji=min(correlation.MIN_OBSERWACJI, corr_days // 3))
+                        # Pozycje portfela pomijamy pod każdą nazwą (AAPL w bazie = trzymany AAPL.US)
+                        trzymane = set(wagi_u) | {_resolve_ticker(tk) for tk in wagi_u}
+                        kor_u = kor_u[[c not in trzymane and _resolve_ticker(c) not in trzymane
+                                       for c in kor_u.index]].dropna().sort_values()
+                        cu1, cu2 = st.columns(2)
+                        cu1.markdown(f"**{t('corr_universe_most', L)}**")
+                        cu1.dataframe(kor_u.tail(10)[::-1].round(2), use_container_width=True)
+                        cu2.markdown(f"**{t('corr_universe_least', L)}**")
+                        cu2.dataframe(kor_u.head(10).round(2), use_container_width=True)
+                    else:
+                        st.info(t("no_transactions", L))
         else:
             st.info(t("corr_no_data", L))
 
@@ -1413,19 +1596,20 @@ def main():
         st.caption(f"**{ind_ticker}** — {source_label}")
 
         # ======= CANDLE INTERVAL SELECTOR (TradingView-style) =======
-        # Each entry: (yf_interval, yf_period_or_days, resample_rule_or_None)
+        # Each entry: (yf_interval, yf_period_or_days) — stocks are built locally from
+        # the base interval in candles.INTERWALY (15m / 1h / 1d), no download per interval
         CANDLE_INTERVALS = {
-            "15m":  ("15m",  60,   None),
-            "30m":  ("30m",  60,   None),
-            "1h":   ("1h",   730,  None),
-            "2h":   ("1h",   730,  "2h"),
-            "4h":   ("1h",   730,  "4h"),
-            "12h":  ("1h",   730,  "12h"),
-            "1D":   ("1d",   3650, None),
-            "3D":   ("1d",   3650, "3D"),
-            "5D":   ("1d",   3650, "5D"),
-            "1W":   ("1wk",  3650, None),
-            "1M":   ("1mo",  7300, None),
+            "15m":  ("15m",  60),
+            "30m":  ("30m",  60),
+            "1h":   ("1h",   730),
+            "2h":   ("1h",   730),
+            "4h":   ("1h",   730),
+            "12h":  ("1h",   730),
+            "1D":   ("1d",   3650),
+            "3D":   ("1d",   3650),
+            "5D":   ("1d",   3650),
+            "1W":   ("1wk",  3650),
+            "1M":   ("1mo",  7300),
         }
 
         # Default view ranges (approx candles to show initially per interval)
@@ -1519,11 +1703,11 @@ def main():
                     st.warning("Max 5!")
 
         current_iv = st.session_state.ind_interval
-        yf_interval, max_days, resample_rule = CANDLE_INTERVALS[current_iv]
+        yf_interval, max_days = CANDLE_INTERVALS[current_iv]
         view_days = DEFAULT_VIEW_DAYS[current_iv]
 
         # Indicator selection
-        INDICATORS = ["SMA 20", "SMA 50", "SMA 200", "EMA 12", "EMA 26", "Bollinger Bands", "RSI", "MACD", "Volume"]
+        INDICATORS = list(indicators.REJESTR) + ["Volume"]
         selected_ind = st.multiselect(t("ind_select_indicators", L), INDICATORS, default=["SMA 20", "RSI"], key="ind_sel")
 
         if ind_ticker:
@@ -1548,15 +1732,12 @@ def main():
                     df = fetch_blofin_candles(inst_id, bf_bar, limit)
                     # Resample 5D from 1D if needed
                     if current_iv == "5D" and not df.empty:
-                        df = df.resample("5D").agg({
-                            "Open": "first", "High": "max", "Low": "min",
-                            "Close": "last", "Volume": "sum"}).dropna()
+                        df = candles.agreguj(df, "5D")
                 else:
-                    # --- yfinance for stocks ---
+                    # --- yfinance for stocks: base interval from the OHLCV store, resampled locally ---
                     extra_days = 220 if yf_interval in ("1d", "1wk", "1mo") else 30
                     start_dt = end_dt - timedelta(days=min(view_days + extra_days, max_days))
-                    df = yf.download(ind_ticker, start=start_dt, end=end_dt,
-                                     interval=yf_interval, progress=False)
+                    df = pobierz_swiece(ind_ticker, current_iv, start_dt)
 
                 if df.empty or len(df) < 2:
                     st.warning(t("ind_no_data", L))
@@ -1565,49 +1746,17 @@ def main():
                     if isinstance(df.columns, pd.MultiIndex):
                         df.columns = df.columns.get_level_values(0)
 
-                    # --- Resample if needed (yfinance only: 2h, 4h, 12h, 3D, 5D) ---
-                    if resample_rule and not use_blofin:
-                        # Map our labels to pandas offset aliases
-                        resample_map = {"2h": "2h", "4h": "4h", "12h": "12h", "3D": "3D", "5D": "5D"}
-                        rule = resample_map.get(resample_rule, resample_rule)
-                        df = df.resample(rule).agg({
-                            "Open": "first", "High": "max", "Low": "min",
-                            "Close": "last", "Volume": "sum",
-                        }).dropna()
-
                     close = df["Close"].squeeze()
                     high = df["High"].squeeze()
                     low = df["Low"].squeeze()
                     open_price = df["Open"].squeeze()
                     volume = df["Volume"].squeeze()
 
-                    # Calculate indicators
-                    calc = {}
-                    if "SMA 20" in selected_ind: calc["SMA 20"] = close.rolling(20).mean()
-                    if "SMA 50" in selected_ind: calc["SMA 50"] = close.rolling(50).mean()
-                    if "SMA 200" in selected_ind: calc["SMA 200"] = close.rolling(200).mean()
-                    if "EMA 12" in selected_ind: calc["EMA 12"] = close.ewm(span=12).mean()
-                    if "EMA 26" in selected_ind: calc["EMA 26"] = close.ewm(span=26).mean()
-                    if "Bollinger Bands" in selected_ind:
-                        sma20 = close.rolling(20).mean()
-                        std20 = close.rolling(20).std()
-                        calc["BB Upper"] = sma20 + 2 * std20
-                        calc["BB Lower"] = sma20 - 2 * std20
-                        calc["BB Mid"] = sma20
-                    rsi_data = None
-                    if "RSI" in selected_ind:
-                        delta = close.diff()
-                        gain = delta.where(delta > 0, 0).rolling(14).mean()
-                        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-                        rs = gain / loss
-                        rsi_data = 100 - (100 / (1 + rs))
-                    macd_data = None
-                    macd_signal = None
-                    if "MACD" in selected_ind:
-                        ema12 = close.ewm(span=12).mean()
-                        ema26 = close.ewm(span=26).mean()
-                        macd_data = ema12 - ema26
-                        macd_signal = macd_data.ewm(span=9).mean()
+                    # Calculate indicators (indicators.py — tylko wybrane, z cache per zestaw świec)
+                    calc = indicators.oblicz(df, selected_ind, ind_ticker, current_iv)
+                    rsi_data = calc.pop("RSI", None)
+                    macd_data = calc.pop("MACD", None)
+                    macd_signal = calc.pop("MACD Signal", None)
 
                     # Trim to requested timeframe
                     trim_start = pd.Timestamp(end_dt - timedelta(days=view_days))
@@ -1625,6 +1774,20 @@ def main():
                         macd_data = macd_data[macd_data.index >= trim_start]
                         macd_signal = macd_signal[macd_signal.index >= trim_start]
 
+                    # --- Downsampling of the visible window (chart_utils: min/max candles, LTTB lines) ---
+                    last_price = float(close.iloc[-1])
+                    last_open = float(open_price.iloc[-1])
+                    histogram = macd_data - macd_signal if macd_data is not None else None
+                    if st.session_state.probkowanie_wykresow:
+                        ohlc = chart_utils.swiece(pd.DataFrame({"Open": open_price, "High": high, "Low": low,
+                                                                "Close": close, "Volume": volume}))
+                        open_price, high, low, close, volume = (ohlc[k] for k in ("Open", "High", "Low", "Close", "Volume"))
+                        for k in calc: calc[k] = chart_utils.linia(calc[k])
+                        if rsi_data is not None: rsi_data = chart_utils.linia(rsi_data)
+                        if macd_data is not None:
+                            histogram = chart_utils.slupki(histogram)
+                            macd_data, macd_signal = chart_utils.linia(macd_data), chart_utils.linia(macd_signal)
+
                     # Determine subplot layout
                     n_sub = 1
                     sub_map = {}
@@ -1658,8 +1821,7 @@ def main():
                     ), row=1, col=1)
 
                     # --- Current price line (dashed) with label ---
-                    last_price = float(close.iloc[-1])
-                    price_color = tv_green if last_price >= float(open_price.iloc[-1]) else tv_red
+                    price_color = tv_green if last_price >= last_open else tv_red
                     fig.add_hline(
                         y=last_price, line_dash="dash", line_color=price_color, line_width=1,
                         row=1, col=1,
@@ -1736,7 +1898,6 @@ def main():
                             x=macd_signal.index, y=macd_signal.values, mode="lines",
                             name="Signal", line=dict(color="#FF6D00", width=1.5),
                         ), row=sub_map["MACD"], col=1)
-                        histogram = macd_data - macd_signal
                         hist_colors = ["rgba(38,166,154,0.6)" if v >= 0 else "rgba(239,83,80,0.6)"
                                        for v in histogram.values]
                         fig.add_trace(go.Bar(
@@ -1804,7 +1965,7 @@ def main():
                             fixedrange=False,
                         )
 
-                    st.plotly_chart(fig, use_container_width=True, config=CHART_CONFIG)
+                    st.plotly_chart(chart_utils.webgl(fig, st.session_state.tryb_webgl), use_container_width=True, config=CHART_CONFIG)
 
     with tab_cfg:
         cfg_c1, cfg_c2 = st.columns(2)
@@ -1816,6 +1977,13 @@ def main():
             kolory_html = " ".join(f'<span style="display:inline-block;width:18px;height:18px;'
                 f'border-radius:50%;background:{c};margin:2px;"></span>' for c in PALETY_KOLOROW[st.session_state.paleta])
             st.markdown(kolory_html, unsafe_allow_html=True)
+            st.session_state.probkowanie_wykresow = st.toggle(
+                t("chart_downsampling", L), value=st.session_state.probkowanie_wykresow,
+                help=t("chart_downsampling_help", L))
+            tryby_webgl = ["auto", "on", "off"]
+            st.session_state.tryb_webgl = st.selectbox(
+                t("chart_webgl", L), tryby_webgl, index=tryby_webgl.index(st.session_state.tryb_webgl),
+                format_func=lambda tryb: t(f"webgl_{tryb}", L), help=t("chart_webgl_help", L))
 
         with cfg_c2:
             # --- Portfolio management ---
@@ -1833,9 +2001,18 @@ def main():
 
             if len(portfele) > 1:
                 if st.button(t("delete_portfolio", L), key="btn_usun_portfel"):
-                    usun_portfel(db, uid, st.session_state.aktywny_portfel)
-                    st.session_state.aktywny_portfel = None
-                    st.rerun()
+                    pasek = st.progress(0.0, text=t("deleting_portfolio", L))
+                    try:
+                        usun_portfel(db, uid, st.session_state.aktywny_portfel, w_tle=False,
+                                     postep=lambda zrobione, wszystkie: pasek.progress(zrobione / wszystkie,
+                                                                                   text=t("deleting_portfolio", L)))
+                    except Exception:
+                        # Portfel już ukryty (tombstone), resztę transakcji usuwa wątek w tle
+                        st.session_state.aktywny_portfel = None
+                        st.warning(t("delete_portfolio_background", L))
+                    else:
+                        st.session_state.aktywny_portfel = None
+                        st.rerun()
 
             buy_label = t("buy", L)
             sell_label = t("sell", L)
@@ -1848,13 +2025,14 @@ def main():
     if not st.session_state.aktywny_portfel:
         st.warning(t("create_portfolio", L)); return
 
+    wersja = wersja_danych(uid)  # przed odczytem — klucz cache nigdy nie wyprzedza danych
     transakcje = pobierz_transakcje(db, uid, st.session_state.aktywny_portfel)
     if not transakcje:
         st.markdown(t("welcome", L))
         return
 
     with st.spinner(t("fetching_data", L)):
-        portfel_df = oblicz_portfel(transakcje)
+        portfel_df = oblicz_portfel(pobierz_pozycje(db, uid, st.session_state.aktywny_portfel))
 
     if portfel_df.empty:
         st.warning(t("no_positions", L)); return
@@ -1912,20 +2090,21 @@ def main():
         hovermode="x unified",
         transition=dict(duration=500, easing="cubic-in-out"),
     )
+    # Długie historie rysowane z ~MAKS_PUNKTOW punktów (chart_utils.linia — LTTB); None = wszystkie
+    maks_linii = chart_utils.MAKS_PUNKTOW if st.session_state.probkowanie_wykresow else None
 
-    # --- Pobierz dane dla wykresów z cache ---
+    # --- Jeden wspólny szereg dla wszystkich zakładek wykresów i statystyk ---
     with st.spinner(t("generating_history", L)):
-        roi_df = oblicz_roi_portfela(transakcje)
-        hist_df = oblicz_historie_portfela(transakcje)
+        szereg_df = szereg_portfela_przyrostowo(uid, st.session_state.aktywny_portfel, wersja, transakcje)
 
     # Przygotuj serie do wykresów
     wartosci_serie = None
     kapital_serie = None
     stats = None
 
-    if not roi_df.empty and len(roi_df) > 1:
-        wartosci_serie = pd.Series(roi_df["Wartość ($)"].values, index=pd.to_datetime(roi_df["Data"]))
-        kapital_serie = pd.Series(roi_df["Kapitał ($)"].values, index=pd.to_datetime(roi_df["Data"]))
+    if not szereg_df.empty and len(szereg_df) > 1:
+        wartosci_serie = pd.Series(szereg_df["Wartość ($)"].values, index=pd.to_datetime(szereg_df["Data"]))
+        kapital_serie = pd.Series(szereg_df["Kapitał ($)"].values, index=pd.to_datetime(szereg_df["Data"]))
         stats = oblicz_statystyki(wartosci_serie, kapital_serie=kapital_serie)
 
     # --- TABS ---
@@ -1942,9 +2121,10 @@ def main():
     # ===================== TAB 1: CHART (Portfolio Value) =====================
     with tab1:
         if wartosci_serie is not None and len(wartosci_serie) > 1:
+            wartosci_wykres = chart_utils.linia(wartosci_serie, maks_linii)
             fig = go.Figure()
             fig.add_trace(go.Scatter(
-                x=wartosci_serie.index, y=wartosci_serie.values,
+                x=wartosci_wykres.index, y=wartosci_wykres.values,
                 mode="lines", name=t("portfolio_value_label", L),
                 line=dict(color=chart_line_color, width=2.5),
                 fill="tozeroy", fillcolor=hex_to_rgba(chart_line_color, 0.08),
@@ -1958,18 +2138,19 @@ def main():
                 yaxis=dict(showgrid=True, gridcolor=grid_col, title="$",
                            tickprefix="$", separatethousands=True),
                 showlegend=True, legend=dict(orientation="h", y=-0.12, x=0.5, xanchor="center"))
-            st.plotly_chart(fig, use_container_width=True, config=CHART_CONFIG)
+            st.plotly_chart(chart_utils.webgl(fig, st.session_state.tryb_webgl), use_container_width=True, config=CHART_CONFIG)
         else:
             st.info(t("no_data_for_tab", L))
 
     # ===================== TAB 2: GROWTH (cumulative %) =====================
     with tab2:
-        if not roi_df.empty and len(roi_df) > 1:
-            growth = pd.Series(roi_df["ROI (%)"].values, index=pd.to_datetime(roi_df["Data"]))
+        if not szereg_df.empty and len(szereg_df) > 1:
+            growth = pd.Series(szereg_df["ROI (%)"].values, index=pd.to_datetime(szereg_df["Data"]))
             fig = go.Figure()
             kolor_g = "#10b981" if growth.iloc[-1] >= 0 else "#ef4444"
+            growth_wykres = chart_utils.linia(growth, maks_linii)
             fig.add_trace(go.Scatter(
-                x=growth.index, y=growth.values,
+                x=growth_wykres.index, y=growth_wykres.values,
                 mode="lines", name=t("tab_growth", L),
                 line=dict(color=kolor_g, width=2.5),
                 fill="tozeroy", fillcolor=hex_to_rgba(kolor_g, 0.08),
@@ -1991,6 +2172,7 @@ def main():
                         bm_ticker, growth.index[0], growth.index[-1] + timedelta(days=1)
                     )
                     if not bm_growth.empty:
+                        bm_growth = chart_utils.linia(bm_growth, maks_linii)
                         fig.add_trace(go.Scatter(
                             x=bm_growth.index, y=bm_growth.values,
                             mode="lines", name=bm_name,
@@ -2011,22 +2193,25 @@ def main():
                 yaxis=dict(showgrid=True, gridcolor=grid_col, title="%",
                            zeroline=True, zerolinecolor="rgba(128,128,128,0.4)"),
                 showlegend=True, legend=dict(orientation="h", y=-0.12, x=0.5, xanchor="center"))
-            st.plotly_chart(fig, use_container_width=True, config=CHART_CONFIG)
+            st.plotly_chart(chart_utils.webgl(fig, st.session_state.tryb_webgl), use_container_width=True, config=CHART_CONFIG)
         else:
             st.info(t("no_data_for_tab", L))
 
     # ===================== TAB 3: BALANCE (invested vs value) =====================
     with tab3:
         if wartosci_serie is not None and kapital_serie is not None and len(wartosci_serie) > 1:
+            # Obie linie w tych samych punktach — wypełnienie „tonexty” między nimi
+            wartosci_wykres = chart_utils.linia(wartosci_serie, maks_linii)
+            kapital_wykres = kapital_serie.reindex(wartosci_wykres.index)
             fig = go.Figure()
             fig.add_trace(go.Scatter(
-                x=wartosci_serie.index, y=kapital_serie.values,
+                x=kapital_wykres.index, y=kapital_wykres.values,
                 mode="lines", name=t("invested", L),
                 line=dict(color="#64748b", width=1.5, dash="dot"),
                 hovertemplate="<b>%{x|%b %d, '%y}</b><br>" + t("invested", L) + ": $%{y:,.2f}<extra></extra>",
             ))
             fig.add_trace(go.Scatter(
-                x=wartosci_serie.index, y=wartosci_serie.values,
+                x=wartosci_wykres.index, y=wartosci_wykres.values,
                 mode="lines", name=t("portfolio_value_label", L),
                 line=dict(color=chart_line_color, width=2.5),
                 fill="tonexty", fillcolor=hex_to_rgba(chart_line_color, 0.06),
@@ -2036,7 +2221,7 @@ def main():
                 xaxis=dict(showgrid=False, title=""),
                 yaxis=dict(showgrid=True, gridcolor=grid_col, title="$", tickprefix="$"),
                 showlegend=True, legend=dict(orientation="h", y=-0.12, x=0.5, xanchor="center"))
-            st.plotly_chart(fig, use_container_width=True, config=CHART_CONFIG)
+            st.plotly_chart(chart_utils.webgl(fig, st.session_state.tryb_webgl), use_container_width=True, config=CHART_CONFIG)
         else:
             st.info(t("no_data_for_tab", L))
 
@@ -2046,8 +2231,9 @@ def main():
             profit = oblicz_profit_serie(wartosci_serie, kapital_serie)
             fig = go.Figure()
             kolor_p = "#10b981" if profit.iloc[-1] >= 0 else "#ef4444"
+            profit_wykres = chart_utils.linia(profit, maks_linii)
             fig.add_trace(go.Scatter(
-                x=profit.index, y=profit.values,
+                x=profit_wykres.index, y=profit_wykres.values,
                 mode="lines", name=t("tab_profit", L),
                 line=dict(color=kolor_p, width=2.5),
                 fill="tozeroy", fillcolor=hex_to_rgba(kolor_p, 0.08),
@@ -2066,7 +2252,7 @@ def main():
                 yaxis=dict(showgrid=True, gridcolor=grid_col, title="$",
                            zeroline=True, zerolinecolor="rgba(128,128,128,0.4)"),
                 showlegend=True, legend=dict(orientation="h", y=-0.12, x=0.5, xanchor="center"))
-            st.plotly_chart(fig, use_container_width=True, config=CHART_CONFIG)
+            st.plotly_chart(chart_utils.webgl(fig, st.session_state.tryb_webgl), use_container_width=True, config=CHART_CONFIG)
         else:
             st.info(t("no_data_for_tab", L))
 
@@ -2074,9 +2260,10 @@ def main():
     with tab5:
         if wartosci_serie is not None and len(wartosci_serie) > 1:
             dd = oblicz_drawdown_serie(wartosci_serie)
+            dd_wykres = chart_utils.linia(dd, maks_linii)
             fig = go.Figure()
             fig.add_trace(go.Scatter(
-                x=dd.index, y=dd.values,
+                x=dd_wykres.index, y=dd_wykres.values,
                 mode="lines", name=t("tab_drawdown", L),
                 line=dict(color="#ef4444", width=2),
                 fill="tozeroy", fillcolor="rgba(239,68,68,0.12)",
@@ -2097,7 +2284,7 @@ def main():
                 xaxis=dict(showgrid=False, title=""),
                 yaxis=dict(showgrid=True, gridcolor=grid_col, title="%", autorange=True),
                 showlegend=False)
-            st.plotly_chart(fig, use_container_width=True, config=CHART_CONFIG)
+            st.plotly_chart(chart_utils.webgl(fig, st.session_state.tryb_webgl), use_container_width=True, config=CHART_CONFIG)
         else:
             st.info(t("no_data_for_tab", L))
 
@@ -2110,8 +2297,9 @@ def main():
             margin_pct = margin_pct.fillna(0)
             fig = go.Figure()
             kolor_m = "#10b981" if margin_pct.iloc[-1] >= 0 else "#ef4444"
+            margin_wykres = chart_utils.linia(margin_pct, maks_linii)
             fig.add_trace(go.Scatter(
-                x=margin_pct.index, y=margin_pct.values,
+                x=margin_wykres.index, y=margin_wykres.values,
                 mode="lines", name="Margin %",
                 line=dict(color=kolor_m, width=2.5),
                 fill="tozeroy", fillcolor=hex_to_rgba(kolor_m, 0.06),
@@ -2129,7 +2317,7 @@ def main():
                 yaxis=dict(showgrid=True, gridcolor=grid_col, title="%",
                            zeroline=True, zerolinecolor="rgba(128,128,128,0.4)"),
                 showlegend=False)
-            st.plotly_chart(fig, use_container_width=True, config=CHART_CONFIG)
+            st.plotly_chart(chart_utils.webgl(fig, st.session_state.tryb_webgl), use_container_width=True, config=CHART_CONFIG)
         else:
             st.info(t("no_data_for_tab", L))
 
@@ -2193,6 +2381,7 @@ def main():
     st.markdown(f'<div class="section-header">{t("summary", L)}</div>', unsafe_allow_html=True)
 
     # --- Logo column for ticker table ---
+    rownolegle(get_logo_url, list(portfel_df["Ticker"]), host="clearbit")  # rozgrzej cache logo współbieżnie
     logo_col_html = []
     for tk in portfel_df["Ticker"]:
         logo = get_logo_html(tk, size=20)
@@ -2209,6 +2398,19 @@ def main():
             failed_str = ", ".join(f"**{t}**" for t in failed_tickers)
             st.warning(f"⚠️ {failed_str} — brak danych na Yahoo Finance. Zysk/Strata i Zmienność mogą być nieprawidłowe. Sprawdź poprawność symboli tickerów.")
 
+    pauza_yahoo = circuit_breaker.otwarty()
+    if pauza_yahoo > 0:
+        st.warning(t("yahoo_paused", L).format(int(pauza_yahoo) + 1))
+
+    # --- Freshness of quotes (stale-while-revalidate cache) ---
+    if "_price_age" in portfel_df.columns:
+        wiek_min = int(portfel_df["_price_age"].max() // 60)
+        if wiek_min < 1:
+            st.caption(t("quotes_fresh", L))
+        else:
+            odswiezanie = quote_cache.odswiezane(portfel_df["Ticker"])
+            st.caption(t("quotes_age", L).format(wiek_min) + (t("quotes_refreshing", L) if odswiezanie else ""))
+
     # Drop internal column before display
     display_cols = [c for c in portfel_df.columns if not c.startswith("_")]
     portfel_df_show = portfel_df[display_cols]
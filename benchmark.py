@@ -0,0 +1,417 @@
+"""
+benchmark.py — Benchmarki silników obliczeniowych Beta1 Portfolio Tracker
+Dane syntetyczne, bez sieci i bez Streamlit.
+
+Usage: python benchmark.py ledger [--transakcje 10000] [--tickery 25] [--dni 1260]
+       python benchmark.py przyrost [--transakcje 10000] [--tickery 25] [--dni 1260]
+       python benchmark.py ttl [--co-sekund 60]
+       python benchmark.py korelacje [--tickery 600] [--dni 260] [--luki 0.05]
+       python benchmark.py wskazniki [--swiece 8640]
+       python benchmark.py swiece [--dni 729]
+       python benchmark.py wykresy [--swiece 8640] [--dni 3650]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from ledger import przygotuj_transakcje, oblicz_roi_z_cen, oblicz_szereg_z_cen, KsiegaPrzyrostowa
+import market_hours
+from quote_cache import ODSWIEZ_PRZY
+import correlation
+import indicators
+import candles
+import chart_utils
+
+try:  # plotly z requirements.txt; bez niego ładunek liczony z JSON samych danych śladów
+    import plotly.graph_objects as go
+except ImportError:
+    go = None
+
+
+def log(msg):
+    print(f"  [BENCH] {msg}")
+
+
+def _czas(fn, *args, powtorzenia: int = 1):
+    """Zwraca (wynik, najlepszy czas w sekundach)."""
+    najlepszy, wynik = float("inf"), None
+    for _ in range(powtorzenia):
+        t0 = time.perf_counter()
+        wynik = fn(*args)
+        najlepszy = min(najlepszy, time.perf_counter() - t0)
+    return wynik, najlepszy
+
+
+# =============================================================================
+# DANE SYNTETYCZNE
+# =============================================================================
+def syntetyczne_ceny(n_tickerow: int, n_dni: int, seed: int = 7) -> pd.DataFrame:
+    """Losowe błądzenie cen zamknięcia na dniach roboczych."""
+    rng = np.random.default_rng(seed)
+    daty = pd.bdate_range(end=pd.Timestamp("2026-01-30"), periods=n_dni)
+    zwroty = rng.normal(0.0004, 0.02, size=(n_dni, n_tickerow))
+    ceny = 100 * np.exp(np.cumsum(zwroty, axis=0))
+    return pd.DataFrame(ceny, index=daty, columns=[f"TK{i:03d}" for i in range(n_tickerow)])
+
+
+def syntetyczne_transakcje(df_hist: pd.DataFrame, n_transakcji: int, seed: int = 11) -> list:
+    """Transakcje w formacie Firestore; ~25% sprzedaży (część większa niż pozycja)."""
+    rng = np.random.default_rng(seed)
+    dni = rng.integers(0, len(df_hist), size=n_transakcji)
+    kol = rng.integers(0, len(df_hist.columns), size=n_transakcji)
+    sprzedaz = rng.random(n_transakcji) < 0.25
+    ilosci = np.round(rng.uniform(0.5, 20, size=n_transakcji), 4)
+    wynik = []
+    for d, k, s, il in sorted(zip(dni, kol, sprzedaz, ilosci), key=lambda x: x[0]):
+        wynik.append({
+            "ticker": df_hist.columns[k], "typ": "Sprzedaż" if s else "Kupno",
+            "ilosc": float(il), "cena_zakupu": round(float(df_hist.iat[d, k]), 2),
+            "data": df_hist.index[d].strftime("%Y-%m-%d"),
+        })
+    return wynik
+
+
+# =============================================================================
+# LEDGER — referencyjna pętla iterrows (poprzednia wersja oblicz_roi_portfela)
+# =============================================================================
+def _roi_petla_referencyjna(transakcje: list, df_hist: pd.DataFrame) -> pd.DataFrame:
+    df = pd.DataFrame(transakcje)
+    df["data"] = pd.to_datetime(df["data"])
+    df["ilosc"] = df["ilosc"].astype(float)
+    df["cena_zakupu"] = df["cena_zakupu"].astype(float)
+    wyniki = []
+    for data_idx in df_hist.index:
+        wartosc_rynkowa = 0.0
+        kapital_zainwestowany = 0.0
+        for ticker in df["ticker"].unique():
+            if ticker not in df_hist.columns: continue
+            trans = df[(df["ticker"] == ticker) & (df["data"] <= data_idx)]
+            ilosc_netto = 0.0
+            koszt_netto = 0.0
+            for _, r in trans.iterrows():
+                if r["typ"] == "Kupno":
+                    ilosc_netto += r["ilosc"]
+                    koszt_netto += r["ilosc"] * r["cena_zakupu"]
+                else:
+                    if ilosc_netto > 0:
+                        sr = koszt_netto / ilosc_netto
+                        sprzedaz = min(r["ilosc"], ilosc_netto)
+                        koszt_netto -= sr * sprzedaz
+                        ilosc_netto -= sprzedaz
+            wartosc_rynkowa += max(ilosc_netto, 0) * df_hist.loc[data_idx, ticker]
+            kapital_zainwestowany += max(koszt_netto, 0)
+        roi = ((wartosc_rynkowa - kapital_zainwestowany) / kapital_zainwestowany * 100) if kapital_zainwestowany > 0 else 0
+        wyniki.append({"Data": data_idx, "ROI (%)": round(roi, 2), "Wartość ($)": round(wartosc_rynkowa, 2), "Kapitał ($)": round(kapital_zainwestowany, 2)})
+    return pd.DataFrame(wyniki)
+
+
+def bench_ledger(args):
+    df_hist = syntetyczne_ceny(args.tickery, args.dni)
+    transakcje = syntetyczne_transakcje(df_hist, args.transakcje)
+    log(f"{args.transakcje} transakcji · {args.tickery} tickerów · {args.dni} dni")
+
+    nowy, t_nowy = _czas(lambda: oblicz_roi_z_cen(przygotuj_transakcje(transakcje), df_hist),
+                         powtorzenia=3)
+    log(f"ledger (wektorowy):     {t_nowy * 1000:9.1f} ms")
+
+    # Pełna pętla referencyjna na 10k transakcji trwa bardzo długo — mierzymy próbkę dni
+    probka = df_hist.iloc[:: max(len(df_hist) // args.probka_dni, 1)]
+    stary, t_stary = _czas(_roi_petla_referencyjna, transakcje, probka)
+    t_stary_pelny = t_stary * len(df_hist) / len(probka)
+    log(f"pętla iterrows (szac.): {t_stary_pelny * 1000:9.1f} ms  "
+        f"({len(probka)} dni zmierzone, ekstrapolacja na {len(df_hist)})")
+    log(f"przyspieszenie:         {t_stary_pelny / t_nowy:9.0f}×")
+
+    porownanie = nowy[nowy["Data"].isin(probka.index)].reset_index(drop=True)
+    zgodne = porownanie.equals(stary)
+    log(f"wyniki identyczne na próbce: {'TAK' if zgodne else 'NIE'}")
+    return 0 if zgodne else 1
+
+
+# =============================================================================
+# PRZYROST — KsiegaPrzyrostowa vs pełne przeliczenie po jednej zmianie
+# =============================================================================
+def bench_przyrost(args):
+    df_hist = syntetyczne_ceny(args.tickery, args.dni)
+    transakcje = syntetyczne_transakcje(df_hist, args.transakcje)
+    log(f"{args.transakcje} transakcji · {args.tickery} tickerów · {args.dni} dni")
+
+    ksiega = KsiegaPrzyrostowa()
+    ksiega.aktualizuj(przygotuj_transakcje(transakcje), df_hist)
+    ostatni = df_hist.index[-1].strftime("%Y-%m-%d")
+    wsteczny = df_hist.index[len(df_hist) // 2].strftime("%Y-%m-%d")
+    scenariusze = [
+        ("dodanie (dziś)", transakcje + [{"ticker": "TK000", "typ": "Kupno", "ilosc": 3.0,
+                                          "cena_zakupu": 100.0, "data": ostatni}]),
+        ("usunięcie (dziś)", transakcje),
+        ("nowy ticker (dziś)", transakcje + [{"ticker": df_hist.columns[-1], "typ": "Kupno", "ilosc": 1.0,
+                                              "cena_zakupu": 50.0, "data": ostatni}]),
+        ("dodanie wsteczne", transakcje + [{"ticker": "TK001", "typ": "Sprzedaż", "ilosc": 2.0,
+                                            "cena_zakupu": 90.0, "data": wsteczny}]),
+    ]
+    zgodne = True
+    for nazwa, txs in scenariusze:
+        df_tx = przygotuj_transakcje(txs)
+        pelny, t_pelny = _czas(oblicz_szereg_z_cen, df_tx, df_hist)
+        przyrost, t_przyrost = _czas(ksiega.aktualizuj, df_tx, df_hist)
+        ok = przyrost.equals(pelny)
+        zgodne &= ok
+        log(f"{nazwa:20s} pełne {t_pelny * 1000:8.1f} ms · przyrostowe {t_przyrost * 1000:8.1f} ms "
+            f"({ksiega.przeliczone_wiersze} wierszy) · {'zgodne' if ok else 'RÓŻNE'}")
+    return 0 if zgodne else 1
+
+
+# =============================================================================
+# TTL — liczba zapytań: stałe TTL vs polityka godzin sesji (market_hours)
+# =============================================================================
+_STALE_TTL = {"notowania": 900, "historia": 3600}
+
+
+def _symulacja_zapytan(symbol: str, krypto: bool, rodzaj: str, chwile: list, stala: bool) -> int:
+    """Ile pobrań z sieci wykona cache przy odczycie w każdej z `chwile`."""
+    pobrania, czas, waznosc = 0, None, 0.0
+    for teraz in chwile:
+        if rodzaj == "historia" and not stala:
+            klucz = market_hours.klucz_okna(symbol, rodzaj, krypto, teraz)
+            if klucz != czas:
+                pobrania, czas = pobrania + 1, klucz
+            continue
+        if czas is None or (teraz - czas).total_seconds() > waznosc * ODSWIEZ_PRZY:
+            pobrania, czas = pobrania + 1, teraz
+            waznosc = _STALE_TTL[rodzaj] if stala else market_hours.ttl(symbol, rodzaj, krypto, teraz)
+    return pobrania
+
+
+def bench_ttl(args):
+    start = datetime(2026, 1, 5, tzinfo=timezone.utc)  # poniedziałek
+    chwile = [start + timedelta(seconds=s) for s in range(0, 7 * 86400, args.co_sekund)]
+    symbole = [("AAPL", False), ("CDR.WA", False), ("BARC.L", False), ("SAP.DE", False),
+               ("7203.T", False), ("BTC-USD", True)]
+    log(f"tydzień odczytów co {args.co_sekund} s ({len(chwile)} na symbol)")
+    for rodzaj in ("notowania", "historia"):
+        # Krypto celowo dostaje krótszy TTL (rynek 24/7) — sumujemy osobno
+        sumy = {False: [0, 0], True: [0, 0]}
+        for symbol, krypto in symbole:
+            stala = _symulacja_zapytan(symbol, krypto, rodzaj, chwile, stala=True)
+            polityka = _symulacja_zapytan(symbol, krypto, rodzaj, chwile, stala=False)
+            sumy[krypto][0] += stala
+            sumy[krypto][1] += polityka
+            log(f"{rodzaj:9s} {symbol:8s} stałe TTL {stala:5d} · godziny sesji {polityka:5d}")
+        for krypto, (stala, polityka) in sumy.items():
+            log(f"{rodzaj:9s} {'krypto' if krypto else 'giełdy':8s} stałe TTL {stala:5d} · godziny sesji "
+                f"{polityka:5d} ({(polityka / stala - 1) * 100:+.0f}% zapytań)")
+    return 0
+
+
+# =============================================================================
+# KORELACJE — correlation.py vs DataFrame.corr na dużym uniwersum
+# =============================================================================
+def bench_korelacje(args):
+    rng = np.random.default_rng(5)
+    ceny = syntetyczne_ceny(args.tickery, args.dni)
+    ceny = ceny.mask(rng.random(ceny.shape) < args.luki)   # brakujące notowania
+    log(f"{args.tickery} symboli · {args.dni} dni · {args.luki:.0%} luk")
+
+    zwroty = pd.DataFrame(correlation.log_zwroty(ceny).astype(np.float64), columns=ceny.columns)
+    ref, t_ref = _czas(lambda: zwroty.corr(min_periods=correlation.MIN_OBSERWACJI))
+    log(f"DataFrame.corr:         {t_ref * 1000:9.1f} ms")
+    correlation._cache.clear()
+    nowy, t_nowy = _czas(lambda: correlation.macierz_korelacji(ceny))
+    log(f"macierz_korelacji:      {t_nowy * 1000:9.1f} ms  ({t_ref / t_nowy:.0f}×)")
+    _, t_cache = _czas(lambda: correlation.macierz_korelacji(ceny), powtorzenia=3)
+    log(f"z cache (to samo okno): {t_cache * 1000:9.2f} ms")
+    _, t_lw = _czas(lambda: correlation.macierz_korelacji(ceny, shrinkage=True, klastry=True))
+    log(f"+ Ledoit-Wolf, klastry: {t_lw * 1000:9.1f} ms")
+    wagi = {tk: 1.0 for tk in ceny.columns[:10]}
+    _, t_port = _czas(lambda: correlation.korelacja_z_portfelem(ceny, wagi), powtorzenia=3)
+    log(f"portfel × uniwersum:    {t_port * 1000:9.1f} ms")
+
+    roznica = float(np.nanmax(np.abs(ref.to_numpy() - nowy.to_numpy())))
+    zgodne = roznica < 1e-4 and np.array_equal(np.isnan(ref.to_numpy()), np.isnan(nowy.to_numpy()))
+    log(f"maks. różnica vs pandas: {roznica:.2e} — {'TAK' if zgodne else 'NIE'}")
+    return 0 if zgodne else 1
+
+
+# =============================================================================
+# WSKAŹNIKI — indicators.oblicz: pierwsze liczenie vs rerun z cache
+# =============================================================================
+def syntetyczne_swiece(n_swiec: int, seed: int = 3, czestotliwosc: str = "15min") -> pd.DataFrame:
+    """Świece OHLCV z losowego błądzenia (domyślnie 15-minutowe, jak BloFin)."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n_swiec)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    rozpiecie = np.abs(rng.normal(0, 0.002, n_swiec)) * close
+    return pd.DataFrame({
+        "Open": open_, "High": np.maximum(open_, close) + rozpiecie,
+        "Low": np.minimum(open_, close) - rozpiecie, "Close": close,
+        "Volume": rng.integers(1, 1000, n_swiec).astype(float),
+    }, index=pd.date_range("2026-01-01", periods=n_swiec, freq=czestotliwosc))
+
+
+def bench_wskazniki(args):
+    odswiezenia = 50
+    pelne = syntetyczne_swiece(args.swiece + odswiezenia)
+    df = pelne.iloc[:args.swiece]
+    wszystkie = list(indicators.REJESTR)
+    log(f"{args.swiece} świec · {len(wszystkie)} wskaźników")
+    indicators._cache.clear()
+    pierwsze, t_pierwsze = _czas(lambda: indicators.oblicz(df, wszystkie, "BTC-USDT", "15m"))
+    log(f"pierwsze liczenie:      {t_pierwsze * 1000:9.1f} ms")
+    _, t_rerun = _czas(lambda: indicators.oblicz(df, wszystkie, "BTC-USDT", "15m"), powtorzenia=5)
+    log(f"rerun (cache):          {t_rerun * 1000:9.2f} ms  ({t_pierwsze / t_rerun:.0f}×)")
+    _, t_jeden = _czas(lambda: indicators.oblicz(df, ["SMA 20"], "BTC-USDT", "15m"), powtorzenia=5)
+    log(f"rerun, tylko SMA 20:    {t_jeden * 1000:9.2f} ms")
+
+    close = df["Close"]
+    referencja = {"SMA 200": close.rolling(200).mean(), "EMA 26": close.ewm(span=26).mean(),
+                  "MACD": close.ewm(span=12).mean() - close.ewm(span=26).mean()}
+    zgodne = all(np.allclose(pierwsze[k], v, equal_nan=True) for k, v in referencja.items())
+    log(f"zgodne z obliczeniami pandas: {'TAK' if zgodne else 'NIE'}")
+
+    # Odświeżenie co 30 s: okno przesunięte o jedną świecę (jak fetch_blofin_candles z limitem)
+    okna = [pelne.iloc[i:args.swiece + i] for i in range(1, odswiezenia + 1)]
+    t0 = time.perf_counter()
+    for okno in okna:
+        wynik = indicators.oblicz(okno, wszystkie, "BTC-USDT", "15m")
+    t_przyrost = (time.perf_counter() - t0) / len(okna)
+    _, t_pelne = _czas(lambda: [fn(okna[-1], **p) for fn, p in indicators.REJESTR.values()], powtorzenia=3)
+    log(f"nowa świeca, pełne:     {t_pelne * 1000:9.2f} ms")
+    log(f"nowa świeca, przyrost:  {t_przyrost * 1000:9.2f} ms  (w tym odcisk świec do cache)")
+    referencja = {}
+    for fn, p in indicators.REJESTR.values():
+        referencja.update(fn(okna[-1], **p))
+    # Porównanie poza początkiem okna — tam pełne przeliczenie dopiero się rozgrzewa
+    ogon = slice(-2000, None)
+    roznica = max(float(np.nanmax(np.abs(wynik[k].to_numpy()[ogon] - v.to_numpy()[ogon])
+                                  / np.maximum(1, np.abs(v.to_numpy()[ogon])))) for k, v in referencja.items())
+    zgodne_przyrost = roznica < 1e-9
+    log(f"przyrost vs pełne (ostatnie 2000 świec): {roznica:.1e} — {'TAK' if zgodne_przyrost else 'NIE'}")
+    return 0 if zgodne and zgodne_przyrost else 1
+
+
+# =============================================================================
+# ŚWIECE — candles.agreguj (reduceat) vs DataFrame.resample dla interwałów z bazy 1h
+# =============================================================================
+def bench_swiece(args):
+    baza = syntetyczne_swiece(args.dni * 24, czestotliwosc="1h")
+    log(f"{len(baza)} świec 1h ({args.dni} dni)")
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    zgodne = True
+    for interwal in ("2h", "4h", "12h"):
+        regula = candles.INTERWALY[interwal][1]
+        lokalnie, t_lokalnie = _czas(lambda: candles.swiece(baza, interwal), powtorzenia=5)
+        pandas_, t_pandas = _czas(lambda: baza.resample(regula, origin="epoch").agg(agg).dropna(), powtorzenia=5)
+        ok = lokalnie.index.equals(pandas_.index) and np.allclose(lokalnie.to_numpy(), pandas_.to_numpy())
+        zgodne &= ok
+        log(f"{interwal:>4}: resample {t_pandas * 1000:7.2f} ms · reduceat {t_lokalnie * 1000:7.2f} ms"
+            f"  ({t_pandas / t_lokalnie:.1f}×)  zgodne: {'TAK' if ok else 'NIE'}")
+    return 0 if zgodne else 1
+
+
+# =============================================================================
+# WYKRESY — chart_utils: ładunek JSON wykresu bez i z próbkowaniem
+# =============================================================================
+def _json_wykresu(swiece: pd.DataFrame | None, linie: list) -> str:
+    """JSON wykresu wysyłany do przeglądarki (świece + linie)."""
+    if go is not None:
+        fig = go.Figure()
+        if swiece is not None:
+            fig.add_trace(go.Candlestick(x=swiece.index, open=swiece["Open"], high=swiece["High"],
+                                         low=swiece["Low"], close=swiece["Close"]))
+        for s in linie:
+            fig.add_trace(go.Scatter(x=s.index, y=s.values, mode="lines"))
+        return fig.to_json()
+    dane = [{"x": s.index.astype(str).tolist(), "y": s.tolist()} for s in linie]
+    if swiece is not None:
+        dane.append({"x": swiece.index.astype(str).tolist(),
+                     **{k: swiece[k].tolist() for k in ("Open", "High", "Low", "Close")}})
+    return json.dumps(dane)
+
+
+def _porownaj_wykres(nazwa: str, pelny, probkowany) -> bool:
+    j_pelny, t_pelny = _czas(pelny, powtorzenia=3)
+    j_prob, t_prob = _czas(probkowany, powtorzenia=3)
+    log(f"{nazwa}: pełny {len(j_pelny) / 1024:8.0f} KB {t_pelny * 1000:7.1f} ms · "
+        f"próbkowany {len(j_prob) / 1024:6.0f} KB {t_prob * 1000:6.1f} ms  "
+        f"({len(j_pelny) / len(j_prob):.1f}× mniej danych)")
+    return len(j_prob) < len(j_pelny)
+
+
+def bench_wykresy(args):
+    log(f"ładunek: {'plotly Figure.to_json()' if go is not None else 'JSON danych śladów (brak plotly)'}")
+    df = syntetyczne_swiece(args.swiece)
+    wskazniki = indicators.oblicz(df, list(indicators.REJESTR), "BTC-USDT", "15m")
+    linie = list(wskazniki.values())
+    ok = _porownaj_wykres(
+        f"Wskaźniki ({args.swiece} świec, {len(linie)} linii)",
+        lambda: _json_wykresu(df, linie),
+        lambda: _json_wykresu(chart_utils.swiece(df), [chart_utils.linia(s) for s in linie]))
+
+    dni = pd.date_range(end="2026-01-01", periods=args.dni, freq="D")
+    wartosc = pd.Series(10_000 * np.exp(np.cumsum(np.random.default_rng(5).normal(0, 0.01, args.dni))), index=dni)
+    ok &= _porownaj_wykres(
+        f"Wartość portfela ({args.dni} dni)",
+        lambda: _json_wykresu(None, [wartosc]),
+        lambda: _json_wykresu(None, [chart_utils.linia(wartosc)]))
+
+    # Kształt zachowany: skrajne wartości i końce serii bez zmian
+    probka = chart_utils.linia(wartosc, 500)
+    zgodne = (probka.max() == wartosc.max() and probka.min() == wartosc.min()
+              and probka.index[0] == wartosc.index[0] and probka.index[-1] == wartosc.index[-1])
+    ohlc = chart_utils.swiece(df)
+    zgodne &= ohlc["High"].max() == df["High"].max() and ohlc["Low"].min() == df["Low"].min()
+    log(f"min/max i końce serii zachowane: {'TAK' if zgodne else 'NIE'}")
+    return 0 if ok and zgodne else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarki Beta1 Portfolio Tracker")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("ledger", help="oblicz_szereg_portfela: ledger vs pętla iterrows")
+    p.add_argument("--transakcje", type=int, default=10_000)
+    p.add_argument("--tickery", type=int, default=25)
+    p.add_argument("--dni", type=int, default=1260)
+    p.add_argument("--probka-dni", type=int, default=20)
+    p.set_defaults(fn=bench_ledger)
+
+    p = sub.add_parser("przyrost", help="KsiegaPrzyrostowa: aktualizacja po jednej transakcji")
+    p.add_argument("--transakcje", type=int, default=10_000)
+    p.add_argument("--tickery", type=int, default=25)
+    p.add_argument("--dni", type=int, default=1260)
+    p.set_defaults(fn=bench_przyrost)
+
+    p = sub.add_parser("ttl", help="market_hours: liczba zapytań przy stałym TTL i TTL wg sesji")
+    p.add_argument("--co-sekund", type=int, default=60)
+    p.set_defaults(fn=bench_ttl)
+
+    p = sub.add_parser("korelacje", help="correlation.py: macierz korelacji dużego uniwersum")
+    p.add_argument("--tickery", type=int, default=600)
+    p.add_argument("--dni", type=int, default=260)
+    p.add_argument("--luki", type=float, default=0.05)
+    p.set_defaults(fn=bench_korelacje)
+
+    p = sub.add_parser("wskazniki", help="indicators.py: wskaźniki z cache per zestaw świec")
+    p.add_argument("--swiece", type=int, default=8640)
+    p.set_defaults(fn=bench_wskazniki)
+
+    p = sub.add_parser("swiece", help="candles.py: interwały składane lokalnie z bazy 1h")
+    p.add_argument("--dni", type=int, default=729)
+    p.set_defaults(fn=bench_swiece)
+
+    p = sub.add_parser("wykresy", help="chart_utils.py: ładunek wykresu bez i z próbkowaniem")
+    p.add_argument("--swiece", type=int, default=8640)
+    p.add_argument("--dni", type=int, default=3650)
+    p.set_defaults(fn=bench_wykresy)
+
+    args = parser.parse_args()
+    sys.exit(args.fn(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# =============================================================================
+# candles.py — Świece wielu interwałów z jednej bazy na symbol
+# Z sieci (przez ohlcv_store) pobieramy tylko interwały bazowe 15m / 1h / 1d,
+# a 30m, 2h, 4h, 12h, 3D, 5D, 1W i 1M składamy lokalnie — przełączanie
+# interwałów w zakładce Wskaźniki nie wymaga zapytań do Yahoo.
+# =============================================================================
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_store import KOLUMNY, pobierz_przyrostowo
+
+# Interwał zakładki Wskaźniki → (interwał bazowy yfinance, reguła agregacji albo None)
+INTERWALY = {
+    "15m": ("15m", None),
+    "30m": ("15m", "30min"),
+    "1h":  ("1h", None),
+    "2h":  ("1h", "2h"),
+    "4h":  ("1h", "4h"),
+    "12h": ("1h", "12h"),
+    "1D":  ("1d", None),
+    "3D":  ("1d", "3D"),
+    "5D":  ("1d", "5D"),
+    "1W":  ("1d", "W"),
+    "1M":  ("1d", "M"),
+}
+
+# Głębokość historii bazy (dni). Limity Yahoo: 15m — 60 dni, 1h — 730 dni,
+# dlatego baza nie może być jedna (1h za 2 lata nie da się złożyć z 15m).
+HISTORIA_BAZY = {"15m": 59, "1h": 729, "1d": 7300}
+
+INTRADAY = {"15m", "1h"}
+
+
+def baza(interwal: str) -> str:
+    """Interwał bazowy dla interwału zakładki (np. "4h" → "1h")."""
+    return INTERWALY[interwal][0]
+
+
+def bazowe(symbol: str, interwal_bazowy: str, fetch_fn) -> pd.DataFrame:
+    """
+    Świece bazowe z magazynu OHLCV (SQLite), dociągając z sieci tylko brakujący ogon.
+    fetch_fn(start_str) -> DataFrame OHLCV dla interwału bazowego.
+    Intraday trzymamy tylko w przesuwanym oknie HISTORIA_BAZY — starsze świece są usuwane.
+    """
+    start = (date.today() - timedelta(days=HISTORIA_BAZY[interwal_bazowy])).isoformat()
+    return pobierz_przyrostowo(symbol, interwal_bazowy, start, fetch_fn, przytnij=interwal_bazowy in INTRADAY)
+
+
+def _etykiety(indeks: pd.DatetimeIndex, regula: str) -> np.ndarray:
+    """Początek kubełka dla każdej świecy (datetime64); stałe okresy liczone od epoki."""
+    if regula == "W":
+        return indeks.to_period("W-SUN").start_time.to_numpy()   # tydzień od poniedziałku, jak 1wk w Yahoo
+    if regula == "M":
+        return indeks.to_period("M").start_time.to_numpy()
+    return indeks.floor(regula).to_numpy()
+
+
+def agreguj(df: pd.DataFrame, regula: str | None) -> pd.DataFrame:
+    """
+    Składa świece OHLCV (indeks naiwny, jak z ohlcv_store) w grubszy interwał
+    (regula: "30min", "2h", "3D", "W", "M"...).
+    Wektorowo: granice kubełków z posortowanego indeksu + ufunc.reduceat
+    (open — pierwsza, high — max, low — min, close — ostatnia, volume — suma).
+    """
+    if regula is None or df.empty:
+        return df
+    df = df.dropna(subset=["Close"])
+    etykiety = _etykiety(df.index, regula)
+    starty = np.flatnonzero(np.r_[True, etykiety[1:] != etykiety[:-1]])
+    konce = np.r_[starty[1:], len(df)] - 1
+    o, h, l, c, v = (df[k].to_numpy(dtype=np.float64) for k in KOLUMNY)
+    wynik = pd.DataFrame({
+        "Open": o[starty],
+        "High": np.maximum.reduceat(h, starty),
+        "Low": np.minimum.reduceat(l, starty),
+        "Close": c[konce],
+        "Volume": np.add.reduceat(np.nan_to_num(v), starty),
+    }, index=pd.DatetimeIndex(etykiety[starty]))
+    return wynik
+
+
+def swiece(df_bazowe: pd.DataFrame, interwal: str, od=None) -> pd.DataFrame:
+    """
+    Świece interwału zakładki ze świec bazowych, od daty `od`.
+    Agregacja na całej bazie, potem cięcie — kubełki (np. 5D) nie zależą od `od`.
+    """
+    wynik = agreguj(df_bazowe, INTERWALY[interwal][1])
+    if od is not None and not wynik.empty:
+        wynik = wynik[wynik.index >= pd.Timestamp(od)]
+    return wynik
@@ -0,0 +1,182 @@
+# =============================================================================
+# chart_utils.py — Próbkowanie serii przed budową wykresów Plotly
+# Wykres nie pokaże więcej punktów niż ma pikseli, a każdy punkt to JSON do
+# przeglądarki i praca renderera. Linie: LTTB (Largest-Triangle-Three-Buckets),
+# świece: agregacja min/max kolejnych świec, słupki: wartość skrajna kubełka.
+# =============================================================================
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# Budżet punktów na serię — ok. dwa punkty na piksel szerokiego wykresu
+MAKS_PUNKTOW = 2000
+# Świece węższe niż ~1 px i tak zlewają się w linię
+MAKS_SWIEC = 1000
+# Do tej szerokości kubełka LTTB liczy tablicę wyborów wektorowo (pamięć ~ n·szer²)
+MAKS_SZEROKOSCI_TABLICY = 32
+
+
+def lttb_indeksy(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Indeksy n punktów wybranych algorytmem LTTB (Steinarsson, 2013): pierwszy,
+    ostatni i z każdego kubełka punkt tworzący największy trójkąt z punktem
+    wybranym poprzednio i średnią następnego kubełka — kształt i szczyty zostają.
+    """
+    dl = len(y)
+    if n >= dl or n < 3:
+        return np.arange(dl)
+    # Granice n-2 kubełków między pierwszym a ostatnim punktem
+    granice = (np.arange(n - 1) * ((dl - 2) / (n - 2))).astype(np.int64) + 1
+    granice[-1] = dl - 1
+    # Średnie kubełków nie zależą od wyboru — liczone z góry (ostatni „kubełek” to ostatni punkt)
+    starty = np.r_[granice[1:-1], dl - 1]
+    dlugosci = np.diff(np.r_[starty, dl])
+    sr_x = np.add.reduceat(x, starty) / dlugosci
+    sr_y = np.add.reduceat(y, starty) / dlugosci
+
+    wybrane = np.empty(n, dtype=np.int64)
+    wybrane[0], wybrane[-1] = 0, dl - 1
+    szer = int(np.diff(granice).max())
+    if szer > MAKS_SZEROKOSCI_TABLICY:
+        a = 0
+        for i in range(n - 2):
+            s, e = granice[i], granice[i + 1]
+            px, py = x[s:e], y[s:e]
+            pole = np.abs((x[a] - sr_x[i]) * (py - y[a]) - (x[a] - px) * (sr_y[i] - y[a]))
+            a = s + int(np.argmax(pole))
+            wybrane[i + 1] = a
+        return wybrane
+
+    # Wąskie kubełki: wybór w kubełku zależy tylko od punktu wybranego w poprzednim,
+    # więc najlepszy punkt liczymy naraz dla każdego kandydata poprzedniego kubełka,
+    # a w pętli zostaje samo przejście po tablicy.
+    idx = granice[:-1, None] + np.arange(szer)
+    poza = idx >= granice[1:, None]
+    idx = np.minimum(idx, dl - 1)
+    px, py = x[idx], y[idx]
+    ax = np.vstack([np.full(szer, x[0]), px[:-1]])[:, :, None]     # kandydaci poprzedniego kubełka
+    ay = np.vstack([np.full(szer, y[0]), py[:-1]])[:, :, None]
+    cx, cy = sr_x[:, None, None], sr_y[:, None, None]
+    pole = np.abs((ax - cx) * (py[:, None, :] - ay) - (ax - px[:, None, :]) * (cy - ay))
+    pole[np.broadcast_to(poza[:, None, :], pole.shape)] = -1.0
+    najlepszy = np.argmax(pole, axis=2).tolist()
+    idx_lista = idx.tolist()
+    j = 0
+    for i in range(n - 2):
+        j = najlepszy[i][j]
+        wybrane[i + 1] = idx_lista[i][j]
+    return wybrane
+
+
+def _os_x(indeks: pd.Index) -> np.ndarray:
+    """Oś x jako float64 (daty → sekundy od pierwszego punktu, bez utraty precyzji)."""
+    if isinstance(indeks, pd.DatetimeIndex):
+        return np.asarray((indeks - indeks[0]).total_seconds(), dtype=np.float64)
+    return np.arange(len(indeks), dtype=np.float64)
+
+
+def linia(seria: pd.Series, maks: int | None = MAKS_PUNKTOW) -> pd.Series:
+    """
+    Seria linii do wykresu: najwyżej ~maks punktów (LTTB), z globalnym minimum
+    i maksimum zawsze zachowanym. Wartości NaN (rozgrzewka wskaźnika) pomijane.
+    maks=None — bez próbkowania.
+    """
+    if maks is None or len(seria) <= maks:
+        return seria
+    seria = seria.dropna()
+    if len(seria) <= maks:
+        return seria
+    y = seria.to_numpy(dtype=np.float64)
+    wybrane = lttb_indeksy(_os_x(seria.index), y, maks)
+    wybrane = np.union1d(wybrane, [int(np.argmin(y)), int(np.argmax(y))])
+    return seria.iloc[wybrane]
+
+
+def _kubelki(dl: int, maks: int) -> np.ndarray:
+    """Początki kubełków po k kolejnych punktów, tak by było ich najwyżej maks."""
+    return np.arange(0, dl, math.ceil(dl / maks))
+
+
+def swiece(df: pd.DataFrame, maks: int | None = MAKS_SWIEC) -> pd.DataFrame:
+    """
+    Świece OHLCV do wykresu: najwyżej maks świec, każda łączy k kolejnych
+    (open — pierwsza, high — max, low — min, close — ostatnia, volume — suma).
+    Indeks = czas pierwszej świecy kubełka. maks=None — bez zmian.
+    """
+    if maks is None or len(df) <= maks:
+        return df
+    starty = _kubelki(len(df), maks)
+    konce = np.r_[starty[1:], len(df)] - 1
+    wynik = {
+        "Open": df["Open"].to_numpy(dtype=np.float64)[starty],
+        "High": np.fmax.reduceat(df["High"].to_numpy(dtype=np.float64), starty),
+        "Low": np.fmin.reduceat(df["Low"].to_numpy(dtype=np.float64), starty),
+        "Close": df["Close"].to_numpy(dtype=np.float64)[konce],
+    }
+    if "Volume" in df:
+        wynik["Volume"] = np.add.reduceat(np.nan_to_num(df["Volume"].to_numpy(dtype=np.float64)), starty)
+    return pd.DataFrame(wynik, index=df.index[starty])
+
+
+def slupki(seria: pd.Series, maks: int | None = MAKS_SWIEC) -> pd.Series:
+    """
+    Seria słupków (np. histogram MACD): najwyżej maks słupków, z każdego kubełka
+    k kolejnych wartość o największym module — znak i skala się nie zmieniają.
+    """
+    if maks is None or len(seria) <= maks:
+        return seria
+    starty = _kubelki(len(seria), maks)
+    y = seria.to_numpy(dtype=np.float64)
+    modul = np.nan_to_num(np.abs(y), nan=-1.0)
+    # Pozycja maksimum modułu w każdym kubełku: kubełki pełne jako wiersze macierzy, ogon osobno
+    k = starty[1] - starty[0] if len(starty) > 1 else len(y)
+    pelne = len(y) // k
+    wybrane = np.argmax(modul[:pelne * k].reshape(pelne, k), axis=1) + np.arange(pelne) * k
+    if pelne * k < len(y):
+        wybrane = np.r_[wybrane, pelne * k + int(np.argmax(modul[pelne * k:]))]
+    return seria.iloc[wybrane]
+
+
+# ─── WebGL ────────────────────────────────────────────────────────────────────
+# Powyżej tylu punktów w wykresie linie rysuje WebGL (scattergl) zamiast SVG
+PROG_WEBGL = 10_000
+# Właściwości śladu scatter nieobsługiwane przez scattergl (usuwane przy zamianie)
+_TYLKO_SVG = {"cliponaxis", "hoveron", "stackgroup", "stackgaps", "groupnorm",
+              "orientation", "fillpattern", "fillgradient", "alignmentgroup", "offsetgroup"}
+
+
+def liczba_punktow(fig) -> int:
+    """Łączna liczba punktów wszystkich śladów wykresu (to, co renderuje przeglądarka)."""
+    return sum(_dlugosc_sladu(slad) for slad in fig.data)
+
+
+def _dlugosc_sladu(slad) -> int:
+    for pole in ("x", "y"):
+        wartosci = getattr(slad, pole, None)
+        if wartosci is not None:
+            return len(wartosci)
+    return 0
+
+
+def webgl(fig, tryb: str = "auto"):
+    """
+    Wykres z liniami (scatter) przełączonymi na WebGL (scattergl).
+
+    tryb: "auto" — gdy wykres ma ponad PROG_WEBGL punktów, "on" — zawsze, "off" — nigdy.
+    Styl śladów (kolory, grubość, kreskowanie, wypełnienia, hovertemplate) i układ
+    (osie, linie, adnotacje) bez zmian; świece i słupki zostają w SVG (brak wersji GL).
+    """
+    if tryb == "off" or (tryb == "auto" and liczba_punktow(fig) <= PROG_WEBGL):
+        return fig
+    slady = []
+    for slad in fig.data:
+        dane = slad.to_plotly_json()
+        if dane.get("type") == "scatter":
+            dane = {k: v for k, v in dane.items() if k not in _TYLKO_SVG}
+            dane["type"] = "scattergl"
+            if isinstance(dane.get("line"), dict) and dane["line"].get("shape") not in (None, "linear", "hv", "vh", "hvh", "vhv"):
+                dane["line"] = {k: v for k, v in dane["line"].items() if k not in ("shape", "smoothing")}
+        slady.append(dane)
+    return type(fig)(data=slady, layout=fig.layout)
@@ -0,0 +1,130 @@
+# =============================================================================
+# circuit_breaker.py — Negatywny cache symboli i bezpiecznik dla Yahoo Finance
+# Zły/wycofany symbol nie jest odpytywany przy każdym wygaśnięciu cache
+# (wykładniczy backoff per symbol), a seria błędów wyłącza Yahoo na chwilę dla wszystkich.
+# =============================================================================
+
+import threading
+import time
+
+# Backoff per symbol: BACKOFF_BAZA · 2^(n-1) sekund po n-tym kolejnym błędzie, max BACKOFF_MAX
+BACKOFF_BAZA = 60
+BACKOFF_MAX = 6 * 3600
+
+# Bezpiecznik: co najmniej PROG_BLEDOW błędów Yahoo (wyjątki, timeouty, limity) w ostatnich
+# OKNO sekundach i udział błędów >= PROG_UDZIALU → Yahoo wyłączone na PRZERWA sekund,
+# potem jedna próba kontrolna. Pusta odpowiedź dla złego symbolu to nie awaria Yahoo.
+OKNO = 60
+PROG_BLEDOW = 8
+PROG_UDZIALU = 0.5
+PRZERWA = 120
+
+
+class YahooNiedostepne(Exception):
+    """Zapytanie pominięte — symbol w negatywnym cache albo bezpiecznik otwarty."""
+
+
+_lock = threading.Lock()
+_symbole = {}          # {symbol: {"bledy": int, "do": float}}
+_wyniki = []           # [(czas, sukces)] z ostatnich OKNO sekund
+_otwarty_do = 0.0      # bezpiecznik otwarty do tego momentu
+_proba_od = 0.0        # stan półotwarty: moment przepuszczenia próby kontrolnej
+
+
+def dozwolone(symbol: str | None = None) -> bool:
+    """
+    Czy wolno teraz odpytać Yahoo o `symbol` (None — dowolne zapytanie).
+    Po upływie PRZERWA przepuszcza dokładnie jedno zapytanie (próba kontrolna).
+    """
+    global _proba_od
+    teraz = time.time()
+    with _lock:
+        wpis = _symbole.get(symbol) if symbol else None
+        if wpis and teraz < wpis["do"]:
+            return False
+        if _otwarty_do:
+            # Próba bez zgłoszonego wyniku (np. przerwany wątek) wygasa po PRZERWA
+            if teraz < _otwarty_do or teraz - _proba_od < PRZERWA:
+                return False
+            _proba_od = teraz
+        return True
+
+
+def zablokowany(symbol: str | None = None) -> bool:
+    """Jak `not dozwolone()`, ale bez zajmowania próby kontrolnej (np. filtr przed zapytaniem zbiorczym)."""
+    teraz = time.time()
+    with _lock:
+        wpis = _symbole.get(symbol) if symbol else None
+        if wpis and teraz < wpis["do"]:
+            return True
+        return bool(_otwarty_do) and (teraz < _otwarty_do or teraz - _proba_od < PRZERWA)
+
+
+def sukces(symbol: str | None = None):
+    """Udane zapytanie — czyści negatywny wpis symbolu i zamyka bezpiecznik."""
+    with _lock:
+        if symbol:
+            _symbole.pop(symbol, None)
+        _yahoo_odpowiada()
+
+
+def porazka(symbol: str | None = None, awaria: bool = True):
+    """
+    Nieudane zapytanie. Symbol trafia do negatywnego cache z wykładniczym backoffem.
+
+    awaria=True — błąd Yahoo (wyjątek, timeout), liczony do bezpiecznika;
+    awaria=False — Yahoo odpowiedziało, ale bez danych (zły/wycofany symbol).
+    """
+    global _otwarty_do, _proba_od
+    teraz = time.time()
+    with _lock:
+        if symbol:
+            wpis = _symbole.setdefault(symbol, {"bledy": 0, "do": 0.0})
+            wpis["bledy"] += 1
+            wpis["do"] = teraz + min(BACKOFF_BAZA * 2 ** (wpis["bledy"] - 1), BACKOFF_MAX)
+        if not awaria:
+            _yahoo_odpowiada()
+            return
+        _zapisz_wynik(False)
+        bledy = sum(1 for _, ok in _wyniki if not ok)
+        if _proba_od or (bledy >= PROG_BLEDOW and bledy / len(_wyniki) >= PROG_UDZIALU):
+            _otwarty_do, _proba_od = teraz + PRZERWA, 0.0
+
+
+def _yahoo_odpowiada():
+    global _otwarty_do, _proba_od
+    _otwarty_do, _proba_od = 0.0, 0.0
+    _zapisz_wynik(True)
+
+
+def _zapisz_wynik(ok: bool):
+    teraz = time.time()
+    _wyniki.append((teraz, ok))
+    while _wyniki and _wyniki[0][0] < teraz - OKNO:
+        _wyniki.pop(0)
+
+
+def wywolaj(symbol: str, fn, pusty=None):
+    """
+    Wywołuje fn() z ochroną: pomija zablokowany symbol (YahooNiedostepne)
+    i rejestruje wynik. pusty(wynik) -> True oznacza brak danych (porażka).
+    Wyjątki z fn są rejestrowane i przekazywane dalej.
+    """
+    if not dozwolone(symbol):
+        raise YahooNiedostepne(symbol)
+    try:
+        wynik = fn()
+    except Exception:
+        porazka(symbol)
+        raise
+    if pusty is not None and pusty(wynik):
+        porazka(symbol, awaria=False)
+    else:
+        sukces(symbol)
+    return wynik
+
+
+def otwarty() -> float:
+    """Sekundy do końca przerwy bezpiecznika (0 — Yahoo dostępne)."""
+    with _lock:
+        return max(0.0, _otwarty_do - time.time())
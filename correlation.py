@@ -0,0 +1,200 @@
+# =============================================================================
+# correlation.py — Silnik korelacji dla dużego uniwersum (setki symboli)
+# Log-stopy zwrotu jako macierz float32, korelacja parami z pełnych obserwacji
+# (jak DataFrame.corr, ale mnożeniami macierzy), opcjonalny shrinkage
+# Ledoit-Wolf i kolejność klastrów do heatmapy. Wyniki w cache per (uniwersum, okno).
+# =============================================================================
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:  # opcjonalnie — klasteryzacja hierarchiczna; bez scipy kolejność spektralna
+    from scipy.cluster.hierarchy import leaves_list, linkage, optimal_leaf_ordering
+    from scipy.spatial.distance import squareform
+except ImportError:
+    linkage = None
+
+# Minimalna liczba wspólnych obserwacji pary — mniej daje NaN (jak min_periods w pandas)
+MIN_OBSERWACJI = 20
+# Liczba wyników trzymanych w cache (LRU)
+ROZMIAR_CACHE = 32
+
+_cache = OrderedDict()   # {(hash uniwersum, okno, opcje...): korelacje (DataFrame albo Series portfela)}
+_lock = threading.Lock()
+
+
+def log_zwroty(ceny: pd.DataFrame) -> np.ndarray:
+    """
+    Macierz (T-1) × N log-stóp zwrotu float32. Zwrot liczony od poprzedniej dostępnej
+    ceny danego symbolu (poniedziałek akcji względem piątku, obok krypto notowanych 24/7);
+    w dniach bez ceny NaN — para liczy się tylko z dni, w których oba symbole mają zwrot.
+    """
+    x = ceny.to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logi = np.log(np.where(x > 0, x, np.nan))
+    zwroty = np.diff(pd.DataFrame(logi).ffill().to_numpy(), axis=0)
+    zwroty[np.isnan(logi[1:])] = np.nan
+    return zwroty.astype(np.float32)
+
+
+def korelacja_parami(zwroty: np.ndarray, min_obserwacji: int = MIN_OBSERWACJI) -> tuple:
+    """
+    Korelacja Pearsona każdej pary z dni, w których obie kolumny mają wartość.
+
+    Sumy dla wszystkich par naraz z iloczynów macierzy (maska obecności M, wartości
+    wyzerowane w lukach): n = MᵀM, Σx = XᵀM, Σx² = (X²)ᵀM, Σxy = XᵀX.
+
+    Returns:
+        (korelacja N×N float32, liczba wspólnych obserwacji N×N)
+    """
+    obecne = ~np.isnan(zwroty)
+    m = obecne.astype(np.float32)
+    # Centrowanie średnią kolumny ogranicza utratę precyzji float32 (korelacja się nie zmienia)
+    srednie = np.nanmean(np.where(obecne, zwroty, np.nan), axis=0) if zwroty.size else np.zeros(zwroty.shape[1])
+    x = np.where(obecne, zwroty - np.nan_to_num(srednie), 0).astype(np.float32)
+
+    n = m.T @ m
+    sx = x.T @ m                  # sx[i, j] = Σ x_i po dniach wspólnych z j
+    sxx = (x * x).T @ m
+    sxy = x.T @ x
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kow = sxy - sx * sx.T / n
+        war_i = sxx - sx * sx / n
+        korelacja = kow / np.sqrt(war_i * war_i.T)
+    korelacja[n < max(min_obserwacji, 2)] = np.nan
+    korelacja = np.clip(korelacja, -1, 1)
+    np.fill_diagonal(korelacja, np.where(np.diag(n) >= max(min_obserwacji, 2), 1.0, np.nan))
+    return korelacja.astype(np.float32), n
+
+
+def shrinkage_ledoit_wolf(zwroty: np.ndarray) -> float:
+    """
+    Optymalna intensywność shrinkage Ledoit-Wolf (cel: macierz jednostkowa) dla
+    standaryzowanych zwrotów. Luki traktowane jak zwrot równy średniej (0 po standaryzacji).
+    """
+    obecne = ~np.isnan(zwroty)
+    if zwroty.shape[0] < 2 or zwroty.shape[1] < 2:
+        return 0.0
+    srednie = np.nanmean(zwroty, axis=0)
+    odch = np.nanstd(zwroty, axis=0)
+    odch[~(odch > 0)] = 1.0
+    x = np.where(obecne, (zwroty - srednie) / odch, 0).astype(np.float64)
+    t, p = x.shape
+    x2 = x * x
+    kow = x.T @ x / t
+    slad = x2.sum(axis=0) / t
+    mu = slad.sum() / p
+    delta_ = (kow ** 2).sum()
+    beta = ((x2.T @ x2).sum() / t - delta_) / (p * t)
+    delta = (delta_ - 2 * mu * slad.sum() + p * mu ** 2) / p
+    beta = min(beta, delta)
+    return 0.0 if delta <= 0 else float(beta / delta)
+
+
+def kolejnosc_klastrow(korelacja: np.ndarray) -> np.ndarray:
+    """
+    Kolejność wierszy/kolumn grupująca skorelowane symbole (dla heatmapy).
+    scipy: średnie wiązanie na odległości sqrt((1-ρ)/2) + optymalna kolejność liści;
+    bez scipy: sortowanie po kącie w płaszczyźnie dwóch głównych wektorów własnych.
+    """
+    n = korelacja.shape[0]
+    if n < 3:
+        return np.arange(n)
+    r = np.nan_to_num(korelacja.astype(np.float64), nan=0.0)
+    np.fill_diagonal(r, 1.0)
+    if linkage is not None:
+        odleglosci = np.sqrt(np.clip((1 - r) / 2, 0, 1))
+        np.fill_diagonal(odleglosci, 0.0)
+        skrocona = squareform(odleglosci, checks=False)
+        drzewo = linkage(skrocona, method="average")
+        return leaves_list(optimal_leaf_ordering(drzewo, skrocona))
+    _, wektory = np.linalg.eigh(r)
+    return np.argsort(np.arctan2(wektory[:, -2], wektory[:, -1]), kind="stable")
+
+
+def hash_uniwersum(ceny: pd.DataFrame) -> str:
+    """
+    Odcisk zestawu symboli, dat i całej macierzy cen. Cały, nie tylko ogon — korekta
+    historii (dywidenda, split) zmienia wcześniejsze wiersze; hash kilku MB to ułamek
+    kosztu samej korelacji.
+    """
+    h = hashlib.sha1(",".join(map(str, ceny.columns)).encode())
+    h.update(pd.util.hash_pandas_object(ceny.index).to_numpy().tobytes())
+    h.update(np.ascontiguousarray(ceny.to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def macierz_korelacji(ceny: pd.DataFrame, okno: int | None = None, shrinkage: bool = False,
+                      klastry: bool = False, min_obserwacji: int = MIN_OBSERWACJI) -> pd.DataFrame:
+    """
+    Macierz korelacji log-zwrotów (float32) dla macierzy zamknięć.
+
+    Args:
+        ceny: indeks = data, kolumny = symbole (np. z pobierz_zamkniecia); luki jako NaN
+        okno: liczba ostatnich wierszy cen (None — całość)
+        shrinkage: True — ρ' = (1-δ)ρ + δI z δ wg Ledoit-Wolf (stabilniejsza przy wielu symbolach)
+        klastry: True — wiersze i kolumny w kolejności klastrów
+    """
+    if okno is not None:
+        ceny = ceny.iloc[-(okno + 1):]
+    klucz = (hash_uniwersum(ceny), okno, shrinkage, klastry, min_obserwacji)
+    with _lock:
+        if klucz in _cache:
+            _cache.move_to_end(klucz)
+            return _cache[klucz].copy()
+
+    symbole = list(ceny.columns)
+    zwroty = log_zwroty(ceny)
+    korelacja, _ = korelacja_parami(zwroty, min_obserwacji)
+    if shrinkage:
+        delta = shrinkage_ledoit_wolf(zwroty)
+        korelacja = ((1 - delta) * korelacja + delta * np.eye(len(symbole))).astype(np.float32)
+    if klastry:
+        kolejnosc = kolejnosc_klastrow(korelacja)
+        korelacja = korelacja[np.ix_(kolejnosc, kolejnosc)]
+        symbole = [symbole[i] for i in kolejnosc]
+    wynik = pd.DataFrame(korelacja, index=symbole, columns=symbole)
+
+    with _lock:
+        _cache[klucz] = wynik
+        while len(_cache) > ROZMIAR_CACHE:
+            _cache.popitem(last=False)
+    return wynik.copy()
+
+
+def korelacja_z_portfelem(ceny: pd.DataFrame, wagi: dict, okno: int | None = None,
+                          min_obserwacji: int = MIN_OBSERWACJI) -> pd.Series:
+    """
+    Korelacja dziennych log-zwrotów portfela (wagi = {symbol: waga}) z każdym symbolem
+    z `ceny`. Jedna kolumna portfela dołączona do macierzy — jedno mnożenie dla całego uniwersum.
+    Cache per (uniwersum, okno, wagi) wspólny z macierz_korelacji.
+    """
+    if okno is not None:
+        ceny = ceny.iloc[-(okno + 1):]
+    klucz = ("portfel", hash_uniwersum(ceny), okno, tuple(sorted(wagi.items())), min_obserwacji)
+    with _lock:
+        if klucz in _cache:
+            _cache.move_to_end(klucz)
+            return _cache[klucz].copy()
+
+    w = pd.Series(wagi, dtype=float).reindex(ceny.columns).fillna(0.0)
+    if w.sum() <= 0:
+        return pd.Series(dtype=np.float32)
+    zwroty = log_zwroty(ceny)
+    # Zwrot portfela ze składników notowanych danego dnia (wagi renormalizowane)
+    wazone = np.where(np.isnan(zwroty), 0, zwroty) @ w.to_numpy(np.float32)
+    pokrycie = (~np.isnan(zwroty)).astype(np.float32) @ w.to_numpy(np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        portfel = np.where(pokrycie > 0, wazone / pokrycie, np.nan).astype(np.float32)
+    korelacja, _ = korelacja_parami(np.column_stack([portfel, zwroty]), min_obserwacji)
+    wynik = pd.Series(korelacja[0, 1:], index=ceny.columns, name="portfel")
+
+    with _lock:
+        _cache[klucz] = wynik
+        while len(_cache) > ROZMIAR_CACHE:
+            _cache.popitem(last=False)
+    return wynik.copy()
@@ -0,0 +1,89 @@
+# =============================================================================
+# fetch_executor.py — Współbieżne pobieranie danych (pula wątków)
+# Ograniczenia równoległości per host, kolejność wyników zachowana,
+# błąd jednego elementu nie przerywa pozostałych.
+# =============================================================================
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Maksymalna liczba równoległych zapytań do jednego hosta
+HOST_LIMITS = {
+    "yahoo": 8,      # yfinance (query1/query2.finance.yahoo.com)
+    "clearbit": 4,   # logo.clearbit.com
+    "blofin": 3,     # openapi.blofin.com (limit zapytań publicznego API)
+    "firestore": 4,  # zapisy WriteBatch (np. usuwanie portfela paczkami)
+}
+_DOMYSLNY_LIMIT = 4
+MAX_WORKERS = 16
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="beta1-fetch")
+_semafory = {}
+_semafory_lock = threading.Lock()
+_w_puli = threading.local()
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # starsze wersje Streamlit / uruchomienie bez Streamlit
+    get_script_run_ctx = None
+try:
+    from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME as _ATRYBUT_CTX
+except ImportError:
+    _ATRYBUT_CTX = "streamlit_script_run_ctx"
+
+
+def _semafor(host: str) -> threading.BoundedSemaphore:
+    with _semafory_lock:
+        if host not in _semafory:
+            _semafory[host] = threading.BoundedSemaphore(HOST_LIMITS.get(host, _DOMYSLNY_LIMIT))
+        return _semafory[host]
+
+
+def rownolegle(fn, items, host: str = "yahoo", domyslna=None) -> list:
+    """
+    Wywołuje fn(item) dla każdego elementu współbieżnie.
+
+    Args:
+        fn: funkcja jednego argumentu (np. pobierz_dywidendy)
+        items: lista argumentów
+        host: klucz limitu równoległości z HOST_LIMITS
+        domyslna: wartość zwracana dla elementu, którego fn rzuciła wyjątek
+
+    Returns:
+        Lista wyników w kolejności items. Czas ≈ najwolniejsze zapytanie,
+        a nie suma wszystkich.
+    """
+    items = list(items)
+    if not items:
+        return []
+    # Wywołanie z wnętrza puli (zagnieżdżone) — szeregowo, żeby nie zakleszczyć puli/semaforów
+    if len(items) == 1 or getattr(_w_puli, "aktywny", False):
+        return [_bezpiecznie(fn, it, domyslna) for it in items]
+
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    sem = _semafor(host)
+
+    def _zadanie(item):
+        # Kontekst Streamlit — st.cache_data / st.session_state działają w wątku roboczym.
+        # Ustawiany zawsze (także None) i przywracany po zadaniu: wątki puli są wspólne,
+        # następne zadanie (inna sesja, wątek tła quote_cache) nie może dostać cudzego ctx.
+        watek = threading.current_thread()
+        poprzedni = getattr(watek, _ATRYBUT_CTX, None)
+        setattr(watek, _ATRYBUT_CTX, ctx)
+        _w_puli.aktywny = True
+        try:
+            with sem:
+                return _bezpiecznie(fn, item, domyslna)
+        finally:
+            _w_puli.aktywny = False
+            setattr(watek, _ATRYBUT_CTX, poprzedni)
+
+    futures = [_executor.submit(_zadanie, it) for it in items]
+    return [f.result() for f in futures]
+
+
+def _bezpiecznie(fn, item, domyslna):
+    try:
+        return fn(item)
+    except Exception:
+        return domyslna
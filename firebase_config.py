@@ -4,12 +4,18 @@
 # =============================================================================
 
 import streamlit as st
+import hashlib
 import json
+import threading
+import time
+import numpy as np
 import requests
 import firebase_admin
 from firebase_admin import credentials, firestore
 from datetime import datetime
 
+from ledger import oblicz_stany_transakcji
+
 # =============================================================================
 # INICJALIZACJA FIREBASE
 # =============================================================================
@@ -205,16 +211,197 @@ def wyslij_reset_hasla(email: str) -> dict:
     except requests.exceptions.RequestException as e:
         return {"error": f"Błąd połączenia: {str(e)[:100]}"}
 
+# =============================================================================
+# CACHE ODCZYTÓW — jeden odczyt transakcji na portfel na rerun
+# =============================================================================
+
+# Cache transakcji w session_state, czyszczony na początku każdego reruna
+_TX_CACHE_KEY = "_tx_cache"
+
+def _cache_transakcji() -> dict:
+    """Zwraca (lub tworzy) cache transakcji bieżącego reruna: {(uid, portfolio_id): list}."""
+    if _TX_CACHE_KEY not in st.session_state:
+        st.session_state[_TX_CACHE_KEY] = {}
+    return st.session_state[_TX_CACHE_KEY]
+
+def nowy_cykl_odczytow():
+    """
+    Rozpoczyna nowy rerun — czyści cache odczytów.
+    Wywoływane raz na początku main(), przed pierwszym pobierz_transakcje().
+    """
+    st.session_state[_TX_CACHE_KEY] = {}
+
+def _uniewaznij_transakcje(uid: str, portfolio_id: str):
+    """Usuwa transakcje (i snapshot pozycji) portfela z cache (po zapisie/usunięciu)."""
+    _cache_transakcji().pop((uid, portfolio_id), None)
+    _cache_transakcji().pop(("pozycje", uid, portfolio_id), None)
+
+# =============================================================================
+# LUSTRO NA ŻYWO — nasłuch on_snapshot portfeli i transakcji
+# =============================================================================
+
+# Lustro nieużywane dłużej niż tyle sekund jest zamykane (zwalnia strumienie gRPC)
+LUSTRO_MAX_BEZCZYNNOSC = 3600
+
+class _LustroUzytkownika:
+    """
+    Długo żyjąca kopia w pamięci users/{uid}/portfolios i ich transakcji.
+    Aktualizowana przez listenery on_snapshot (wątek Firestore Watch) —
+    odczyt w reranie nigdy nie czeka na sieć. `wersja` rośnie przy każdej zmianie.
+    """
+
+    def __init__(self, db, uid: str):
+        self._db = db
+        self._uid = uid
+        self._lock = threading.RLock()
+        self.wersja = 0
+        self.ostatni_dostep = time.time()
+        self._portfele = None          # {pid: dict} — None do pierwszego snapshotu
+        self._transakcje = {}          # {pid: {tx_id: dict}}
+        self._nasluchy_tx = {}         # {pid: Watch}
+        self._pozycje = {}             # {pid: (wersja, pozycje)} — liczone z transakcji lustra
+        self._nasluch_portfeli = self._portfele_ref().on_snapshot(self._na_portfele)
+
+    def _portfele_ref(self):
+        return self._db.collection("users").document(self._uid).collection("portfolios")
+
+    def _na_portfele(self, docs, changes, read_time):
+        with self._lock:
+            # Portfele z tombstone (usuwane w tle) są niewidoczne od razu
+            self._portfele = {d.id: {**dane, "id": d.id} for d in docs
+                              if not (dane := d.to_dict()).get("usuniety")}
+            for pid in list(self._nasluchy_tx):
+                if pid not in self._portfele:
+                    self._nasluchy_tx.pop(pid).unsubscribe()
+                    self._transakcje.pop(pid, None)
+            for pid in self._portfele:
+                if pid not in self._nasluchy_tx:
+                    ref = self._portfele_ref().document(pid).collection("transactions")
+                    self._nasluchy_tx[pid] = ref.on_snapshot(
+                        lambda docs, ch, rt, pid=pid: self._na_transakcje(pid, docs))
+            self.wersja += 1
+
+    def _na_transakcje(self, pid: str, docs):
+        with self._lock:
+            self._transakcje[pid] = {d.id: {**d.to_dict(), "id": d.id} for d in docs}
+            self.wersja += 1
+
+    def portfele(self):
+        """Lista portfeli albo None, jeśli pierwszy snapshot jeszcze nie dotarł."""
+        with self._lock:
+            self.ostatni_dostep = time.time()
+            if self._portfele is None:
+                return None
+            return [dict(p) for p in self._portfele.values()]
+
+    def transakcje(self, pid: str):
+        """Transakcje posortowane jak order_by("data") (remis: ID dokumentu) albo None."""
+        with self._lock:
+            self.ostatni_dostep = time.time()
+            if pid not in self._transakcje:
+                return None
+            txs = sorted(self._transakcje[pid].values(), key=lambda tx: (str(tx.get("data", "")), tx["id"]))
+            return [dict(tx) for tx in txs]
+
+    def pozycje(self, pid: str):
+        """Pozycje portfela odbudowane z transakcji lustra (raz na wersję) albo None."""
+        with self._lock:
+            self.ostatni_dostep = time.time()
+            if pid not in self._transakcje:
+                return None
+            wpis = self._pozycje.get(pid)
+            if wpis is None or wpis[0] != self.wersja:
+                wpis = (self.wersja, pozycje_z_transakcji(list(self._transakcje[pid].values())))
+                self._pozycje[pid] = wpis
+            return {tk: dict(stan) for tk, stan in wpis[1].items()}
+
+    def zastosuj_zapis(self, pid: str, tx_id: str, dane: dict | None):
+        """Natychmiastowe odbicie własnego zapisu (dane=None → usunięcie), zanim dotrze snapshot."""
+        with self._lock:
+            if pid not in self._transakcje:
+                return
+            if dane is None:
+                self._transakcje[pid].pop(tx_id, None)
+            else:
+                self._transakcje[pid][tx_id] = {**dane, "id": tx_id}
+            self.wersja += 1
+
+    def zastosuj_portfel(self, pid: str, dane: dict | None):
+        """Natychmiastowe odbicie utworzenia (dane) lub usunięcia (None) portfela."""
+        with self._lock:
+            if self._portfele is None:
+                return
+            if dane is None:
+                self._portfele.pop(pid, None)
+                self._transakcje.pop(pid, None)
+                if pid in self._nasluchy_tx:
+                    self._nasluchy_tx.pop(pid).unsubscribe()
+            else:
+                self._portfele[pid] = {**dane, "id": pid}
+            self.wersja += 1
+
+    def zamknij(self):
+        with self._lock:
+            for w in self._nasluchy_tx.values():
+                w.unsubscribe()
+            self._nasluchy_tx.clear()
+            self._nasluch_portfeli.unsubscribe()
+
+_lustra = {}
+_lustra_lock = threading.Lock()
+
+def uruchom_lustro(db, uid: str):
+    """
+    Uruchamia (raz na proces) lustro danych użytkownika. Nie blokuje — dopóki
+    pierwszy snapshot nie dotrze, odczyty idą bezpośrednio do Firestore.
+    Przy okazji zamyka lustra bezczynne dłużej niż LUSTRO_MAX_BEZCZYNNOSC.
+    """
+    teraz = time.time()
+    with _lustra_lock:
+        for u in [u for u, l in _lustra.items() if u != uid and teraz - l.ostatni_dostep > LUSTRO_MAX_BEZCZYNNOSC]:
+            _lustra.pop(u).zamknij()
+        if uid not in _lustra:
+            try:
+                _lustra[uid] = _LustroUzytkownika(db, uid)
+            except Exception:
+                return None
+        return _lustra[uid]
+
+def zatrzymaj_lustro(uid: str):
+    """Zamyka listenery użytkownika (np. przy wylogowaniu)."""
+    with _lustra_lock:
+        lustro = _lustra.pop(uid, None)
+    if lustro:
+        lustro.zamknij()
+
+def wersja_danych(uid: str) -> int | None:
+    """
+    Licznik zmian danych użytkownika (portfele + transakcje) z lustra.
+    Klucz dla cache'y obliczeń (księga, statystyki, wykresy). None gdy lustro nie działa.
+    """
+    lustro = _lustra.get(uid)
+    return lustro.wersja if lustro else None
+
+def _lustro(uid: str):
+    return _lustra.get(uid)
+
 # =============================================================================
 # FIRESTORE — CRUD PORTFELI I TRANSAKCJI
 # =============================================================================
 
 def pobierz_portfele(db, uid: str) -> list:
-    """Pobiera listę portfeli użytkownika (max 3)."""
+    """Pobiera listę portfeli użytkownika (max 3). Z lustra, jeśli działa."""
+    lustro = _lustro(uid)
+    if lustro is not None:
+        z_lustra = lustro.portfele()
+        if z_lustra is not None:
+            return z_lustra
     portfele = []
     docs = db.collection("users").document(uid).collection("portfolios").stream()
     for doc in docs:
         dane = doc.to_dict()
+        if dane.get("usuniety"):
+            continue
         dane["id"] = doc.id
         portfele.append(dane)
     return portfele
@@ -233,21 +420,128 @@ def stworz_portfel(db, uid: str, nazwa: str) -> dict:
     ref = db.collection("users").document(uid).collection("portfolios").document()
     dane = {"nazwa": nazwa, "utworzony": datetime.now().isoformat()}
     ref.set(dane)
+    if _lustro(uid):
+        _lustro(uid).zastosuj_portfel(ref.id, dane)
     return {"id": ref.id, "nazwa": nazwa}
 
-def usun_portfel(db, uid: str, portfolio_id: str):
-    """Usuwa portfel i wszystkie jego transakcje."""
-    # Usuń transakcje
-    trans_ref = (db.collection("users").document(uid)
-                 .collection("portfolios").document(portfolio_id)
-                 .collection("transactions"))
-    for doc in trans_ref.stream():
-        doc.reference.delete()
-    # Usuń portfel
-    db.collection("users").document(uid).collection("portfolios").document(portfolio_id).delete()
+def usun_portfel(db, uid: str, portfolio_id: str, w_tle: bool = True, postep=None):
+    """
+    Usuwa portfel i wszystkie jego transakcje.
+
+    Najpierw oznacza portfel tombstone'em (`usuniety`) — od tej chwili znika
+    z pobierz_portfele. Transakcje są kasowane paczkami (dokoncz_usuwanie):
+    w tle (w_tle=True) albo synchronicznie z callbackiem postep(zrobione, wszystkie).
+    Gdy synchroniczne sprzątanie się nie uda (albo rerun je przerwie), resztę
+    kończy wątek w tle, a wyjątek idzie do wywołującego. Sprzątanie przerwane
+    restartem dokańcza wznow_usuwanie() przy kolejnym starcie.
+    """
+    # set(merge=True), nie update() — brakujący dokument (np. usunięty w innej sesji) to nie błąd
+    (db.collection("users").document(uid).collection("portfolios").document(portfolio_id)
+     .set({"usuniety": True, "usuniety_od": datetime.now().isoformat()}, merge=True))
+    _uniewaznij_transakcje(uid, portfolio_id)
+    if _lustro(uid):
+        _lustro(uid).zastosuj_portfel(portfolio_id, None)
+    if w_tle:
+        _usun_w_tle(db, uid, portfolio_id)
+        return
+    try:
+        dokoncz_usuwanie(db, uid, portfolio_id, postep=postep)
+    except BaseException:
+        # Także StopException/RerunException Streamlit — tombstone już jest, sprzątanie nie może utknąć
+        _usun_w_tle(db, uid, portfolio_id)
+        raise
+
+# Portfele, których sprzątanie właśnie trwa w tym procesie: {(uid, portfolio_id)}
+_usuwane = set()
+_usuwane_lock = threading.Lock()
+_wznowieni = set()
+
+def dokoncz_usuwanie(db, uid: str, portfolio_id: str, postep=None) -> int:
+    """
+    Kasuje transakcje portfela paczkami po ROZMIAR_PACZKI (WriteBatch, kilka paczek
+    równolegle), a na końcu sam dokument portfela. Bezpieczne do ponowienia —
+    przy każdym wywołaniu usuwa to, co jeszcze zostało.
+
+    Returns:
+        Liczba usuniętych transakcji.
+    """
+    from fetch_executor import rownolegle
+
+    portfel_ref = db.collection("users").document(uid).collection("portfolios").document(portfolio_id)
+    # list_documents() zwraca same referencje — bez pobierania treści transakcji
+    refs = list(portfel_ref.collection("transactions").list_documents(page_size=ROZMIAR_PACZKI))
+    paczki = [refs[i:i + ROZMIAR_PACZKI] for i in range(0, len(refs), ROZMIAR_PACZKI)]
+    zrobione = [0]
+    zrobione_lock = threading.Lock()
+
+    def _usun_paczke(paczka):
+        batch = db.batch()
+        for ref in paczka:
+            batch.delete(ref)
+        batch.commit()
+        with zrobione_lock:
+            zrobione[0] += len(paczka)
+            if postep:
+                postep(zrobione[0], len(refs))
+        return True
+
+    wyniki = rownolegle(_usun_paczke, paczki, host="firestore", domyslna=False)
+    if not all(wyniki):
+        raise RuntimeError(f"Nie usunięto {wyniki.count(False)} paczek transakcji portfela {portfolio_id}")
+    _pozycje_ref(db, uid, portfolio_id).delete()
+    portfel_ref.delete()
+    _uniewaznij_transakcje(uid, portfolio_id)
+    return len(refs)
+
+def _usun_w_tle(db, uid: str, portfolio_id: str):
+    """Uruchamia dokoncz_usuwanie w wątku demona (raz na portfel w danym procesie)."""
+    klucz = (uid, portfolio_id)
+    with _usuwane_lock:
+        if klucz in _usuwane:
+            return
+        _usuwane.add(klucz)
+
+    def _praca():
+        try:
+            dokoncz_usuwanie(db, uid, portfolio_id)
+        except Exception:
+            pass  # tombstone zostaje — wznow_usuwanie() spróbuje ponownie
+        finally:
+            with _usuwane_lock:
+                _usuwane.discard(klucz)
+
+    threading.Thread(target=_praca, name=f"beta1-usun-{portfolio_id}", daemon=True).start()
+
+def wznow_usuwanie(db, uid: str):
+    """
+    Dokańcza w tle usuwanie portfeli oznaczonych tombstone'em, przerwane np. restartem.
+    Sprawdzane raz na użytkownika w danym procesie.
+    """
+    if uid in _wznowieni:
+        return
+    _wznowieni.add(uid)
+    try:
+        docs = (db.collection("users").document(uid).collection("portfolios")
+                .where("usuniety", "==", True).stream())
+        for doc in docs:
+            _usun_w_tle(db, uid, doc.id)
+    except Exception:
+        _wznowieni.discard(uid)
 
 def pobierz_transakcje(db, uid: str, portfolio_id: str) -> list:
-    """Pobiera wszystkie transakcje z danego portfela."""
+    """
+    Pobiera wszystkie transakcje z danego portfela.
+    W obrębie jednego reruna Firestore jest czytany tylko raz (patrz nowy_cykl_odczytow).
+    """
+    lustro = _lustro(uid)
+    if lustro is not None:
+        z_lustra = lustro.transakcje(portfolio_id)
+        if z_lustra is not None:
+            return z_lustra
+    cache = _cache_transakcji()
+    if (uid, portfolio_id) in cache:
+        # Kopie dictów — wywołujący mogą je modyfikować bez psucia cache
+        return [dict(tx) for tx in cache[(uid, portfolio_id)]]
     transakcje = []
     docs = (db.collection("users").document(uid)
             .collection("portfolios").document(portfolio_id)
@@ -258,23 +552,271 @@ def pobierz_transakcje(db, uid: str, portfolio_id: str) -> list:
         dane = doc.to_dict()
         dane["id"] = doc.id
         transakcje.append(dane)
-    return transakcje
+    cache[(uid, portfolio_id)] = transakcje
+    return [dict(tx) for tx in transakcje]
 
 def dodaj_transakcje(db, uid: str, portfolio_id: str, transakcja: dict) -> str:
-    """Dodaje nową transakcję do portfela. Zwraca ID dokumentu."""
+    """Dodaje nową transakcję do portfela (razem ze snapshotem pozycji). Zwraca ID dokumentu."""
     ref = (db.collection("users").document(uid)
            .collection("portfolios").document(portfolio_id)
            .collection("transactions").document())
     transakcja["utworzony"] = datetime.now().isoformat()
-    ref.set(transakcja)
+    _zapisz_z_pozycjami(db, uid, portfolio_id, ref, transakcja)
+    _uniewaznij_transakcje(uid, portfolio_id)
+    if _lustro(uid):
+        _lustro(uid).zastosuj_zapis(portfolio_id, ref.id, transakcja)
     return ref.id
 
+# Limit operacji w jednym WriteBatch Firestore
+ROZMIAR_PACZKI = 500
+
+def _tresc_importu(transakcja: dict) -> str:
+    """Kanoniczna treść wiersza importu (pola, które definiują transakcję)."""
+    tresc = {k: transakcja.get(k) for k in ("ticker", "typ", "ilosc", "cena_zakupu", "data")}
+    return json.dumps(tresc, sort_keys=True, default=str)
+
+def _id_transakcji_importu(tresc: str, wystapienie: int) -> str:
+    """
+    Deterministyczne ID dokumentu z treści wiersza importu.
+    `wystapienie` rozróżnia identyczne wiersze w jednym pliku (np. dwa takie same zlecenia),
+    więc ponowny import tego samego pliku trafia w te same dokumenty zamiast je dublować.
+    """
+    return "imp_" + hashlib.sha1(f"{tresc}#{wystapienie}".encode()).hexdigest()[:24]
+
+def dodaj_transakcje_zbiorczo(db, uid: str, portfolio_id: str, transakcje: list, postep=None) -> list:
+    """
+    Import wielu transakcji paczkami po ROZMIAR_PACZKI (WriteBatch — jeden round trip na paczkę).
+
+    Idempotentny: ID dokumentów wynikają z treści wierszy, a wiersze już zapisane
+    (np. przy ponowieniu przerwanego importu) są pomijane.
+
+    Args:
+        transakcje: lista dict (ticker, typ, ilosc, cena_zakupu, data[, notatka])
+        postep: opcjonalny callback postep(zrobione, wszystkie) po każdej paczce
+
+    Returns:
+        Lista statusów w kolejności wierszy:
+        {"id": doc_id, "status": "ok" | "pominieto" | "blad", "error": str | None}
+    """
+    col = (db.collection("users").document(uid)
+           .collection("portfolios").document(portfolio_id)
+           .collection("transactions"))
+    wystapienia = {}
+    ids = []
+    for tx in transakcje:
+        tresc = _tresc_importu(tx)
+        wystapienia[tresc] = wystapienia.get(tresc, 0) + 1
+        ids.append(_id_transakcji_importu(tresc, wystapienia[tresc]))
+
+    statusy = []
+    zapisane = {}
+    teraz = datetime.now().isoformat()
+    for start in range(0, len(transakcje), ROZMIAR_PACZKI):
+        paczka = list(zip(ids[start:start + ROZMIAR_PACZKI], transakcje[start:start + ROZMIAR_PACZKI]))
+        try:
+            refs = [col.document(doc_id) for doc_id, _ in paczka]
+            istniejace = {snap.id for snap in db.get_all(refs) if snap.exists}
+            batch = db.batch()
+            nowe = []
+            for ref, (doc_id, tx) in zip(refs, paczka):
+                if doc_id not in istniejace:
+                    dane = {**tx, "utworzony": teraz}
+                    batch.set(ref, dane)
+                    nowe.append((doc_id, dane))
+            if nowe:
+                batch.commit()
+            zapisane.update(nowe)
+            statusy += [{"id": doc_id, "status": "pominieto" if doc_id in istniejace else "ok", "error": None}
+                        for doc_id, _ in paczka]
+        except Exception as e:
+            statusy += [{"id": doc_id, "status": "blad", "error": str(e)[:100]} for doc_id, _ in paczka]
+        if postep:
+            postep(len(statusy), len(transakcje))
+
+    try:
+        if zapisane:
+            try:
+                przebuduj_pozycje(db, uid, portfolio_id)
+            except Exception:
+                # Nieaktualny snapshot usuwamy — pobierz_pozycje() odbuduje go z logu.
+                # Gdy nie da się nawet usunąć, błąd idzie do wywołującego.
+                _pozycje_ref(db, uid, portfolio_id).delete()
+    finally:
+        _uniewaznij_transakcje(uid, portfolio_id)
+        if _lustro(uid):
+            for doc_id, dane in zapisane.items():
+                _lustro(uid).zastosuj_zapis(portfolio_id, doc_id, dane)
+    return statusy
+
 def usun_transakcje(db, uid: str, portfolio_id: str, transaction_id: str):
-    """Usuwa transakcję z portfela."""
-    (db.collection("users").document(uid)
-     .collection("portfolios").document(portfolio_id)
-     .collection("transactions").document(transaction_id)
-     .delete())
+    """Usuwa transakcję z portfela (razem ze snapshotem pozycji)."""
+    ref = (db.collection("users").document(uid)
+           .collection("portfolios").document(portfolio_id)
+           .collection("transactions").document(transaction_id))
+    _zapisz_z_pozycjami(db, uid, portfolio_id, ref, None)
+    _uniewaznij_transakcje(uid, portfolio_id)
+    if _lustro(uid):
+        _lustro(uid).zastosuj_zapis(portfolio_id, transaction_id, None)
+
+# =============================================================================
+# SNAPSHOT POZYCJI — users/{uid}/portfolios/{pid}/meta/pozycje
+# Ilość netto, koszt (średni koszt) i data pierwszego zakupu per ticker,
+# aktualizowane w tej samej transakcji Firestore co zapis/usunięcie transakcji.
+# =============================================================================
+
+# Względna różnica, powyżej której sprawdz_pozycje() zgłasza rozbieżność
+_TOLERANCJA_POZYCJI = 1e-9
+
+def _pozycje_ref(db, uid: str, portfolio_id: str):
+    return (db.collection("users").document(uid)
+            .collection("portfolios").document(portfolio_id)
+            .collection("meta").document("pozycje"))
+
+def _klucz_kolejnosci(tx: dict) -> list:
+    """Kolejność transakcji w księdze — jak order_by("data"), remis: ID dokumentu."""
+    return [str(tx.get("data", "")), tx.get("id", "")]
+
+def _stan_tickera(txs: list, stan: dict | None = None) -> dict:
+    """
+    Fold średniego kosztu po transakcjach jednego tickera (już posortowanych),
+    zaczynając od zapisanego `stan` albo od zera.
+    """
+    if not txs:
+        return stan
+    il_po, k_po = oblicz_stany_transakcji(
+        np.array([float(tx["ilosc"]) for tx in txs]),
+        np.array([float(tx["cena_zakupu"]) for tx in txs]),
+        np.array([tx["typ"] == "Kupno" for tx in txs]),
+        stan_poczatkowy=(stan["ilosc"], stan["koszt"]) if stan else (0.0, 0.0),
+    )
+    zakupy = [str(tx["data"]) for tx in txs if tx["typ"] == "Kupno"]
+    if stan and stan.get("pierwszy_zakup"):
+        zakupy.append(stan["pierwszy_zakup"])
+    return {"ilosc": float(il_po[-1]), "koszt": float(k_po[-1]),
+            "pierwszy_zakup": min(zakupy) if zakupy else None,
+            "ostatnia": _klucz_kolejnosci(txs[-1])}
+
+def pozycje_z_transakcji(transakcje: list) -> dict:
+    """Snapshot pozycji odbudowany z pełnego logu transakcji: {ticker: stan}."""
+    po_tickerach = {}
+    for tx in sorted(transakcje, key=_klucz_kolejnosci):
+        po_tickerach.setdefault(tx["ticker"], []).append(tx)
+    return {tk: _stan_tickera(txs) for tk, txs in po_tickerach.items()}
+
+def _zapisz_z_pozycjami(db, uid: str, portfolio_id: str, tx_ref, dane: dict | None):
+    """
+    Zapis (dane) lub usunięcie (None) transakcji i aktualizacja snapshotu pozycji
+    w jednej transakcji Firestore.
+
+    Dopisanie na końcu historii tickera (najczęstszy przypadek) to krok foldu
+    na zapisanym stanie — czytany jest tylko snapshot. Transakcja z wcześniejszą
+    datą albo usunięcie przelicza tylko ten jeden ticker z jego logu.
+    """
+    col = tx_ref.parent
+    snap_ref = _pozycje_ref(db, uid, portfolio_id)
+
+    @firestore.transactional
+    def _w_transakcji(transaction):
+        snap = snap_ref.get(transaction=transaction)
+        pozycje = snap.to_dict().get("tickery", {}) if snap.exists else None
+        if dane is not None:
+            ticker = dane["ticker"]
+        else:
+            stary = tx_ref.get(transaction=transaction)
+            ticker = stary.to_dict().get("ticker") if stary.exists else None
+        nowa = {**dane, "id": tx_ref.id} if dane is not None else None
+
+        if ticker is None:
+            pass  # usunięcie nieistniejącej transakcji — snapshot bez zmian
+        elif pozycje is None:
+            # Portfel sprzed snapshotów — budujemy go z całego logu
+            # (Transaction.get przyjmuje tylko DocumentReference albo Query — nie samą kolekcję)
+            txs = [{**d.to_dict(), "id": d.id} for d in transaction.get(col.order_by("data")) if d.id != tx_ref.id]
+            pozycje = pozycje_z_transakcji(txs + ([nowa] if nowa else []))
+        elif nowa and (ticker not in pozycje or _klucz_kolejnosci(nowa) > pozycje[ticker]["ostatnia"]):
+            pozycje[ticker] = _stan_tickera([nowa], pozycje.get(ticker))
+        else:
+            txs = [{**d.to_dict(), "id": d.id}
+                   for d in transaction.get(col.where("ticker", "==", ticker)) if d.id != tx_ref.id]
+            stan = pozycje_z_transakcji(txs + ([nowa] if nowa else [])).get(ticker)
+            if stan is None:
+                pozycje.pop(ticker, None)
+            else:
+                pozycje[ticker] = stan
+
+        if dane is not None:
+            transaction.set(tx_ref, dane)
+        else:
+            transaction.delete(tx_ref)
+        if pozycje is not None:
+            transaction.set(snap_ref, {"tickery": pozycje, "zaktualizowano": datetime.now().isoformat()})
+
+    _w_transakcji(db.transaction())
+
+def przebuduj_pozycje(db, uid: str, portfolio_id: str) -> dict:
+    """Odbudowuje snapshot pozycji z pełnego logu transakcji (transakcyjnie). Zwraca {ticker: stan}."""
+    col = (db.collection("users").document(uid)
+           .collection("portfolios").document(portfolio_id)
+           .collection("transactions"))
+    snap_ref = _pozycje_ref(db, uid, portfolio_id)
+
+    @firestore.transactional
+    def _w_transakcji(transaction):
+        pozycje = pozycje_z_transakcji([{**d.to_dict(), "id": d.id} for d in transaction.get(col.order_by("data"))])
+        transaction.set(snap_ref, {"tickery": pozycje, "zaktualizowano": datetime.now().isoformat()})
+        return pozycje
+
+    return _w_transakcji(db.transaction())
+
+def pobierz_pozycje(db, uid: str, portfolio_id: str) -> dict:
+    """
+    Snapshot pozycji portfela: {ticker: {"ilosc", "koszt", "pierwszy_zakup", "ostatnia"}}.
+    Z lustra (transakcje w pamięci, przeliczane raz na wersję) bez czekania na sieć;
+    bez lustra jeden mały dokument zamiast całego logu, czytany raz na rerun.
+    Brakujący snapshot (portfel sprzed tej funkcji) jest budowany z logu.
+    """
+    lustro = _lustro(uid)
+    if lustro is not None:
+        z_lustra = lustro.pozycje(portfolio_id)
+        if z_lustra is not None:
+            return z_lustra
+    cache = _cache_transakcji()
+    klucz = ("pozycje", uid, portfolio_id)
+    if klucz not in cache:
+        snap = _pozycje_ref(db, uid, portfolio_id).get()
+        cache[klucz] = snap.to_dict().get("tickery", {}) if snap.exists else przebuduj_pozycje(db, uid, portfolio_id)
+    return {tk: dict(stan) for tk, stan in cache[klucz].items()}
+
+def sprawdz_pozycje(db, uid: str, portfolio_id: str, napraw: bool = False) -> dict:
+    """
+    Kontrola spójności: porównuje snapshot pozycji z wynikiem odtworzonym z logu.
+
+    Returns:
+        {ticker: {"snapshot": stan | None, "log": stan | None}} — tylko rozbieżne tickery.
+        Pusty dict = snapshot zgodny. napraw=True nadpisuje snapshot wersją z logu.
+    """
+    col = (db.collection("users").document(uid)
+           .collection("portfolios").document(portfolio_id)
+           .collection("transactions"))
+    z_logu = pozycje_z_transakcji([{**d.to_dict(), "id": d.id} for d in col.stream()])
+    snap = _pozycje_ref(db, uid, portfolio_id).get()
+    zapisane = snap.to_dict().get("tickery", {}) if snap.exists else {}
+
+    def _rozne(a, b):
+        if a is None or b is None:
+            return a is not b
+        if a.get("pierwszy_zakup") != b.get("pierwszy_zakup"):
+            return True
+        return any(abs(float(a[k]) - float(b[k])) > _TOLERANCJA_POZYCJI * max(1.0, abs(float(b[k])))
+                   for k in ("ilosc", "koszt"))
+
+    roznice = {tk: {"snapshot": zapisane.get(tk), "log": z_logu.get(tk)}
+               for tk in sorted(set(zapisane) | set(z_logu))
+               if _rozne(zapisane.get(tk), z_logu.get(tk))}
+    if roznice and napraw:
+        przebuduj_pozycje(db, uid, portfolio_id)
+        _uniewaznij_transakcje(uid, portfolio_id)
+    return roznice
 
 def zapisz_profil(db, uid: str, email: str):
     """Zapisuje/aktualizuje profil użytkownika w Firestore."""
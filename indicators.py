@@ -0,0 +1,303 @@
+# =============================================================================
+# indicators.py — Silnik wskaźników technicznych (zakładka Wskaźniki)
+# Rejestr czystych funkcji (świece → serie), liczone tylko wybrane wskaźniki,
+# wyniki zapamiętane per (ticker, interwał, odcisk świec, wskaźnik, parametry) —
+# rerun po zmianie motywu czy checkboxa nie liczy niczego od nowa.
+# =============================================================================
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Liczba zapamiętanych wyników (wskaźnik × zestaw świec), LRU
+ROZMIAR_CACHE = 256
+# Liczba strumieni przyrostowych (ticker × interwał × wskaźnik), LRU
+ROZMIAR_STRUMIENI = 64
+
+_cache = OrderedDict()   # {(ticker, interwał, odcisk, nazwa, parametry): {seria: pd.Series}}
+_strumienie = OrderedDict()  # {(ticker, interwał, nazwa, parametry): _Strumien}
+_lock = threading.Lock()
+
+
+# =============================================================================
+# FUNKCJE WSKAŹNIKÓW — df (kolumny OHLCV) → {nazwa serii: pd.Series}
+# =============================================================================
+def sma(df: pd.DataFrame, okres: int, nazwa: str) -> dict:
+    return {nazwa: df["Close"].rolling(okres).mean()}
+
+
+def ema(df: pd.DataFrame, okres: int, nazwa: str) -> dict:
+    return {nazwa: df["Close"].ewm(span=okres).mean()}
+
+
+def bollinger(df: pd.DataFrame, okres: int = 20, odchylenia: float = 2) -> dict:
+    srodek = df["Close"].rolling(okres).mean()
+    std = df["Close"].rolling(okres).std()
+    return {"BB Upper": srodek + odchylenia * std, "BB Lower": srodek - odchylenia * std, "BB Mid": srodek}
+
+
+def rsi(df: pd.DataFrame, okres: int = 14) -> dict:
+    """RSI ze średnich kroczących zysków i strat (wariant prostej średniej, nie Wildera)."""
+    delta = df["Close"].diff()
+    zyski = delta.where(delta > 0, 0).rolling(okres).mean()
+    straty = (-delta.where(delta < 0, 0)).rolling(okres).mean()
+    return {"RSI": 100 - (100 / (1 + zyski / straty))}
+
+
+def macd(df: pd.DataFrame, szybka: int = 12, wolna: int = 26, sygnal: int = 9) -> dict:
+    linia = df["Close"].ewm(span=szybka).mean() - df["Close"].ewm(span=wolna).mean()
+    return {"MACD": linia, "MACD Signal": linia.ewm(span=sygnal).mean()}
+
+
+# Nazwa w multiselect (ind_sel) → (funkcja, parametry). "Volume" to tylko wykres — bez obliczeń.
+REJESTR = {
+    "SMA 20": (sma, {"okres": 20, "nazwa": "SMA 20"}),
+    "SMA 50": (sma, {"okres": 50, "nazwa": "SMA 50"}),
+    "SMA 200": (sma, {"okres": 200, "nazwa": "SMA 200"}),
+    "EMA 12": (ema, {"okres": 12, "nazwa": "EMA 12"}),
+    "EMA 26": (ema, {"okres": 26, "nazwa": "EMA 26"}),
+    "Bollinger Bands": (bollinger, {"okres": 20, "odchylenia": 2}),
+    "RSI": (rsi, {"okres": 14}),
+    "MACD": (macd, {"szybka": 12, "wolna": 26, "sygnal": 9}),
+}
+
+
+def zarejestruj(nazwa: str, fn, **parametry):
+    """
+    Dodaje wskaźnik do rejestru (fn(df, **parametry) -> {nazwa serii: pd.Series}).
+    Bez wpisu w PRZYROSTOWE wskaźnik jest zawsze liczony od nowa dla nowego zestawu świec.
+    """
+    REJESTR[nazwa] = (fn, parametry)
+
+
+# =============================================================================
+# AKTUALIZACJA PRZYROSTOWA — nowe świece bez liczenia całej historii
+# Stan po ostatniej potwierdzonej (zamkniętej) świecy; trwająca świeca jest
+# liczona ze stanu bez jego zmiany, więc odświeżenie co 30 s kosztuje O(nowe świece).
+#   rolling(n) — ogon n (RSI: n+1) ostatnich zamknięć, wynik jak pełne przeliczenie
+#   ewm        — średnia wykładnicza (adjust=True jak pandas): (wartość, suma wag)
+# Funkcje dalej(stan, x, **p) dostają zamknięcia nowych świec (np.ndarray).
+# =============================================================================
+def _ogon(close: pd.Series, n: int) -> np.ndarray:
+    """Ostatnie n zamknięć (z lewej dopełnione NaN — okno niepełne daje NaN jak w pandas)."""
+    x = close.to_numpy(dtype=np.float64)[-n:]
+    return np.concatenate([np.full(n - len(x), np.nan), x])
+
+
+def _okna(stan: np.ndarray, x: np.ndarray, n: int) -> tuple:
+    """(okna długości n kończące się na każdej nowej świecy, nowy ogon)."""
+    pelne = np.concatenate([stan, x])
+    return np.lib.stride_tricks.sliding_window_view(pelne, n)[-len(x):], pelne[-len(stan):]
+
+
+def _sma_dalej(stan, x, okres, nazwa):
+    okna, stan = _okna(stan, x, okres)
+    return {nazwa: okna.mean(axis=1)}, stan
+
+
+def _bollinger_dalej(stan, x, okres=20, odchylenia=2):
+    okna, stan = _okna(stan, x, okres)
+    srodek, std = okna.mean(axis=1), okna.std(axis=1, ddof=1)
+    return {"BB Upper": srodek + odchylenia * std, "BB Lower": srodek - odchylenia * std, "BB Mid": srodek}, stan
+
+
+def _rsi_dalej(stan, x, okres=14):
+    okna, stan = _okna(stan, x, okres + 1)
+    delta = np.diff(okna, axis=1)
+    zyski = np.where(delta > 0, delta, 0).mean(axis=1)
+    straty = np.where(delta < 0, -delta, 0).mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {"RSI": 100 - (100 / (1 + zyski / straty))}, stan
+
+
+def _ewm_koniec(wartosci: pd.Series, okres: int, n: int) -> tuple:
+    """Stan EWM po n obserwacjach: (ostatnia wartość, suma wag Σ(1-α)^i)."""
+    b = 1 - 2 / (okres + 1)
+    return float(wartosci.iloc[-1]), (1 - b ** n) / (1 - b)
+
+
+def _ewm_dalej(x: np.ndarray, okres: int, stan: tuple) -> tuple:
+    """Kolejne wartości EWM dla nowych obserwacji x; zwraca (wartości, nowy stan)."""
+    b = 1 - 2 / (okres + 1)
+    y, waga = stan
+    wynik = np.empty(len(x))
+    for i, v in enumerate(x):
+        nowa_waga = 1 + b * waga
+        y = (v + b * waga * y) / nowa_waga
+        waga = nowa_waga
+        wynik[i] = y
+    return wynik, (y, waga)
+
+
+def _ema_dalej(stan, x, okres, nazwa):
+    wartosci, stan = _ewm_dalej(x, okres, stan)
+    return {nazwa: wartosci}, stan
+
+
+def _macd_stan(df, serie, szybka=12, wolna=26, sygnal=9):
+    close, n = df["Close"], len(df)
+    return (_ewm_koniec(close.ewm(span=szybka).mean(), szybka, n),
+            _ewm_koniec(close.ewm(span=wolna).mean(), wolna, n),
+            _ewm_koniec(serie["MACD Signal"], sygnal, n))
+
+
+def _macd_dalej(stan, x, szybka=12, wolna=26, sygnal=9):
+    e_szybka, s_szybka = _ewm_dalej(x, szybka, stan[0])
+    e_wolna, s_wolna = _ewm_dalej(x, wolna, stan[1])
+    linia = e_szybka - e_wolna
+    e_sygnal, s_sygnal = _ewm_dalej(linia, sygnal, stan[2])
+    return {"MACD": linia, "MACD Signal": e_sygnal}, (s_szybka, s_wolna, s_sygnal)
+
+
+# Funkcja wskaźnika → (stan(df, serie, **p) po ostatniej świecy df, dalej(stan, x, **p),
+# glowa(**p) — ile pierwszych świec okna zależy od jego początku; None dla EWM, gdzie zależy cała seria)
+PRZYROSTOWE = {
+    sma: (lambda df, serie, okres, nazwa: _ogon(df["Close"], okres), _sma_dalej,
+          lambda okres, nazwa: okres),
+    bollinger: (lambda df, serie, okres=20, odchylenia=2: _ogon(df["Close"], okres), _bollinger_dalej,
+                lambda okres=20, odchylenia=2: okres),
+    rsi: (lambda df, serie, okres=14: _ogon(df["Close"], okres + 1), _rsi_dalej,
+          lambda okres=14: okres + 1),
+    ema: (lambda df, serie, okres, nazwa: _ewm_koniec(serie[nazwa], okres, len(df)), _ema_dalej, None),
+    macd: (_macd_stan, _macd_dalej, None),
+}
+
+
+class _Strumien:
+    """Wartości (np.ndarray) i stan wskaźnika do ostatniej potwierdzonej świecy."""
+
+    def __init__(self, fn, parametry: dict, df: pd.DataFrame):
+        self.parametry = parametry
+        stan_fn, self._dalej_fn, glowa = PRZYROSTOWE[fn]
+        self._fn = fn
+        self.glowa = glowa(**parametry) if glowa else 0
+        self.poczatek = df.index[0]
+        serie = fn(df, **parametry)
+        self.stan = stan_fn(df, serie, **parametry)
+        self.wartosci = {k: v.to_numpy(dtype=np.float64) for k, v in serie.items()}
+        self.ts, self.close = df.index[-1], float(df["Close"].iloc[-1])
+        self.lock = threading.Lock()
+
+    def _dalej(self, x: np.ndarray) -> tuple:
+        return self._dalej_fn(self.stan, x, **self.parametry)
+
+    def pasuje(self, indeks: pd.Index, close: np.ndarray) -> int | None:
+        """
+        Liczba świec do ostatniej potwierdzonej włącznie, jeśli (indeks, close) kontynuują
+        zapisane świece (jest potwierdzona świeca z tą samą ceną, bez luk w cenach); inaczej None.
+        """
+        k = int(indeks.searchsorted(self.ts, side="right"))
+        if k == 0 or indeks[k - 1] != self.ts or k > len(next(iter(self.wartosci.values()))):
+            return None
+        if close[k - 1] != self.close:
+            return None  # świeca skorygowana przez giełdę — liczymy od nowa
+        if np.isnan(close[k:]).any():
+            return None
+        return k
+
+    def aktualizuj(self, indeks: pd.Index, close: np.ndarray, k: int) -> dict:
+        """Serie dla świec: potwierdzone nowe świece zmieniają stan, trwająca (ostatnia) nie."""
+        x = close[k:]
+        if len(x) > 1:
+            nowe, self.stan = self._dalej(x[:-1])
+            self.wartosci = {n: np.concatenate([v, nowe[n]])[-len(close):] for n, v in self.wartosci.items()}
+            self.ts, self.close = indeks[-2], float(x[-2])
+            k, x = len(close) - 1, x[-1:]
+        trwajaca = self._dalej(x)[0] if len(x) else {}
+        serie = {n: np.concatenate([v[len(v) - k:], trwajaca[n]]) if n in trwajaca else v[len(v) - k:]
+                 for n, v in self.wartosci.items()}
+        if self.glowa and indeks[0] != self.poczatek:
+            # Okno przesunięte: strumień zna świece sprzed jego początku, pełne przeliczenie nie.
+            # Pierwsze świece okna liczymy więc z samego okna — rozgrzewka (NaN) jak w pandas.
+            h = min(self.glowa, len(close))
+            glowa = self._fn(pd.DataFrame({"Close": close[:h]}, index=indeks[:h]), **self.parametry)
+            serie = {n: np.concatenate([glowa[n].to_numpy(dtype=np.float64), v[h:]]) for n, v in serie.items()}
+        return {n: pd.Series(v, index=indeks, name=n, copy=False) for n, v in serie.items()}
+
+
+# =============================================================================
+# OBLICZANIE Z CACHE
+# =============================================================================
+def odcisk_swiec(df: pd.DataFrame) -> str:
+    """Odcisk zestawu świec: indeks + OHLCV (każda zmiana świecy daje inny klucz)."""
+    idx = df.index
+    czasy = idx.asi8 if isinstance(idx, pd.DatetimeIndex) else pd.util.hash_pandas_object(idx, index=False).to_numpy()
+    h = hashlib.sha1(np.ascontiguousarray(czasy).tobytes())
+    for kolumna in ("Open", "High", "Low", "Close", "Volume"):
+        if kolumna in df:
+            h.update(np.ascontiguousarray(df[kolumna].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def oblicz(df: pd.DataFrame, wybrane, ticker: str = "", interwal: str = "") -> dict:
+    """
+    Serie wybranych wskaźników dla świec df.
+
+    Args:
+        df: świece (indeks = czas, kolumny Open/High/Low/Close/Volume)
+        wybrane: nazwy z REJESTR (np. st.session_state.ind_sel); pozostałe są pomijane
+        ticker, interwal: część klucza cache (czytelność i brak kolizji między wykresami)
+
+    Returns:
+        {nazwa serii: pd.Series} — nowy słownik przy każdym wywołaniu (serie współdzielone, nie modyfikować)
+    """
+    odcisk = close = None
+    wynik = {}
+    wybrane = set(wybrane)
+    for nazwa, (fn, parametry) in REJESTR.items():   # kolejność rejestru = kolejność legendy
+        if nazwa not in wybrane:
+            continue
+        if odcisk is None:
+            odcisk = odcisk_swiec(df)
+        klucz = (ticker, interwal, odcisk, nazwa, tuple(sorted(parametry.items())))
+        with _lock:
+            serie = _cache.get(klucz)
+            if serie is not None:
+                _cache.move_to_end(klucz)
+        if serie is None:
+            if close is None:
+                close = df["Close"].to_numpy(dtype=np.float64)
+            serie = _przyrostowo(fn, parametry, df, close, (ticker, interwal, nazwa, klucz[-1]))
+            with _lock:
+                _cache[klucz] = serie
+                while len(_cache) > ROZMIAR_CACHE:
+                    _cache.popitem(last=False)
+        wynik.update(serie)
+    return wynik
+
+
+def _przyrostowo(fn, parametry: dict, df: pd.DataFrame, close: np.ndarray, klucz: tuple) -> dict:
+    """
+    Serie wskaźnika dla df: z aktualizacji strumienia, gdy df kontynuuje poprzednie
+    świece tego (ticker, interwał), w przeciwnym razie pełne przeliczenie.
+
+    Przesuwane okno świec (np. ostatnie N z BloFin): SMA, Bollinger i RSI są zgodne
+    z pełnym przeliczeniem okna, łącznie z rozgrzewką (pierwsze świece liczone z samego
+    okna). EWM (EMA, MACD) liczy dalej od pierwszej widzianej świecy — różnica względem
+    liczenia od początku okna zanika jak (1-α)^N, czyli poniżej precyzji float64 już
+    przy kilkuset świecach; w krótszym oknie pierwsze wartości mogą się różnić.
+    """
+    if fn not in PRZYROSTOWE or len(df) < 2:
+        return fn(df, **parametry)
+    with _lock:
+        strumien = _strumienie.get(klucz)
+        if strumien is not None:
+            _strumienie.move_to_end(klucz)
+    if strumien is not None:
+        with strumien.lock:
+            k = strumien.pasuje(df.index, close)
+            if k is not None:
+                return strumien.aktualizuj(df.index, close, k)
+    # Nowy strumień: stan po przedostatniej świecy (ostatnia może być jeszcze otwarta)
+    if np.isnan(close).any():
+        return fn(df, **parametry)
+    strumien = _Strumien(fn, parametry, df.iloc[:-1])
+    wynik = strumien.aktualizuj(df.index, close, len(df) - 1)
+    with _lock:
+        _strumienie[klucz] = strumien
+        while len(_strumienie) > ROZMIAR_STRUMIENI:
+            _strumienie.popitem(last=False)
+    return wynik
@@ -33,6 +33,20 @@ APP_FILES = [
     "ticker_db.py",
     "translations.py",
     "statistics.py",
+    "ledger.py",
+    "ohlcv_store.py",
+    "fetch_executor.py",
+    "quote_cache.py",
+    "market_hours.py",
+    "circuit_breaker.py",
+    "market_data.py",
+    "shared_cache.py",
+    "single_flight.py",
+    "instrument_meta.py",
+    "correlation.py",
+    "indicators.py",
+    "candles.py",
+    "chart_utils.py",
     "xtb_mapping.py",
     "logo_fetcher.py",
     "ocr_reader.py",
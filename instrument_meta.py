@@ -0,0 +1,152 @@
+# =============================================================================
+# instrument_meta.py — Trwały magazyn metadanych instrumentów (.info z Yahoo)
+# .info to jedno z najwolniejszych zapytań Yahoo — dawniej osobno dla nazwy,
+# sektora, dywidend, kalendarza i loga. Teraz raz na symbol na TTL_METADANYCH,
+# zapis w SQLite (.cache/) wspólny dla procesów i przeżywający restart.
+# =============================================================================
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import circuit_breaker
+from market_data import dostawca
+from ohlcv_store import CACHE_DIR
+from single_flight import wspolnie
+
+META_PATH = os.path.join(CACHE_DIR, "instruments.sqlite")
+
+# Metadane (nazwa, sektor, typ, strona www) zmieniają się rzadko
+TTL_METADANYCH = 3 * 86400
+# Pusta odpowiedź (zły symbol, ETF bez .info) — ponowna próba szybciej
+TTL_PUSTYCH = 6 * 3600
+
+_pamiec = {}           # {symbol: (info, zapisano)} — bez odczytu z dysku przy każdym wywołaniu
+_lock = threading.Lock()
+_schemat_gotowy = False
+
+
+def _polaczenie():
+    global _schemat_gotowy
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(META_PATH, timeout=30)
+    if not _schemat_gotowy:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS instruments (
+            symbol TEXT PRIMARY KEY, info TEXT NOT NULL, updated REAL NOT NULL)""")
+        conn.commit()
+        _schemat_gotowy = True
+    return conn
+
+
+def _aktualne(info: dict, zapisano: float, teraz: float) -> bool:
+    return teraz - zapisano < (TTL_METADANYCH if info else TTL_PUSTYCH)
+
+
+def _z_dysku(symbol: str):
+    try:
+        conn = _polaczenie()
+        try:
+            wiersz = conn.execute("SELECT info, updated FROM instruments WHERE symbol=?", (symbol,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return (json.loads(wiersz[0]), wiersz[1]) if wiersz else None
+
+
+def _zapisz(symbol: str, info: dict):
+    teraz = time.time()
+    with _lock:
+        _pamiec[symbol] = (info, teraz)
+    try:
+        conn = _polaczenie()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO instruments VALUES (?, ?, ?)",
+                             (symbol, json.dumps(info, default=str), teraz))
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        pass
+
+
+def info(symbol: str) -> dict:
+    """
+    Słownik .info dla symbolu yfinance ({} gdy brak danych).
+
+    Kolejność: pamięć procesu → SQLite → jedno zapytanie do dostawcy (łączone
+    między wątkami, chronione bezpiecznikiem Yahoo). Przeterminowany wpis jest
+    zwracany, gdy odświeżenie się nie uda.
+    """
+    teraz = time.time()
+    with _lock:
+        wpis = _pamiec.get(symbol)
+    if wpis is None:
+        wpis = _z_dysku(symbol)
+        if wpis is not None:
+            with _lock:
+                _pamiec[symbol] = wpis
+    if wpis is not None and _aktualne(wpis[0], wpis[1], teraz):
+        return wpis[0]
+    return wspolnie(("instrument_meta", symbol), lambda: _odswiez(symbol, wpis))
+
+
+def _odswiez(symbol: str, stary):
+    try:
+        nowe = circuit_breaker.wywolaj(symbol, lambda: dostawca().info(symbol),
+                                       pusty=lambda i: not isinstance(i, dict) or len(i) <= 1)
+    except Exception:
+        # Yahoo niedostępne / symbol w negatywnym cache — ostatnia znana wartość, bez zapisu
+        return stary[0] if stary else {}
+    nowe = nowe if isinstance(nowe, dict) and len(nowe) > 1 else {}
+    if not nowe and stary and stary[0]:
+        return stary[0]
+    _zapisz(symbol, nowe)
+    return nowe
+
+
+# ─── Pola używane przez aplikację ─────────────────────────────────────────────
+def nazwa(symbol: str) -> str | None:
+    i = info(symbol)
+    return i.get("shortName") or i.get("longName")
+
+
+def sektor(symbol: str) -> str | None:
+    return info(symbol).get("sector") or None
+
+
+def typ(symbol: str) -> str | None:
+    """quoteType: EQUITY, ETF, CRYPTOCURRENCY, INDEX..."""
+    return info(symbol).get("quoteType") or None
+
+
+def stopa_dywidendy(symbol: str) -> float:
+    return info(symbol).get("dividendYield", 0) or 0
+
+
+def strona(symbol: str) -> str:
+    return info(symbol).get("website", "") or ""
+
+
+def uniewaznij(symbol: str | None = None):
+    """Usuwa wpis (albo wszystkie) — następne info() pobierze dane od nowa."""
+    with _lock:
+        if symbol is None:
+            _pamiec.clear()
+        else:
+            _pamiec.pop(symbol, None)
+    try:
+        conn = _polaczenie()
+        try:
+            with conn:
+                if symbol is None:
+                    conn.execute("DELETE FROM instruments")
+                else:
+                    conn.execute("DELETE FROM instruments WHERE symbol=?", (symbol,))
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        pass
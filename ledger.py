@@ -0,0 +1,272 @@
+# =============================================================================
+# ledger.py — Silnik księgi pozycji (wektorowy)
+# Ilość netto i kapitał (metoda średniego kosztu) dla każdej pary (data, ticker)
+# =============================================================================
+
+import numpy as np
+import pandas as pd
+
+
+def przygotuj_transakcje(transakcje: list) -> pd.DataFrame:
+    """
+    Zamienia listę transakcji (dict z Firestore) na DataFrame gotowy dla księgi.
+
+    Kolumny: ticker, typ, data (datetime), ilosc (float), cena_zakupu (float).
+    Sortowanie po dacie jest stabilne — transakcje z tego samego dnia
+    zachowują kolejność z listy (tak jak w pętli iterrows).
+    """
+    if not transakcje:
+        return pd.DataFrame(columns=["ticker", "typ", "data", "ilosc", "cena_zakupu"])
+    df = pd.DataFrame(transakcje)
+    df["data"] = pd.to_datetime(df["data"])
+    df["ilosc"] = df["ilosc"].astype(float)
+    df["cena_zakupu"] = df["cena_zakupu"].astype(float)
+    return df.sort_values("data", kind="mergesort").reset_index(drop=True)
+
+
+def oblicz_stany_transakcji(ilosci: np.ndarray, ceny: np.ndarray, kupno: np.ndarray,
+                            stan_poczatkowy: tuple = (0.0, 0.0)):
+    """
+    Stan pozycji (ilość netto, koszt netto) po każdej transakcji jednego tickera.
+
+    Średni koszt zależy od kolejności transakcji (sprzedaż obcinana do posiadanej
+    ilości), więc ten krok to jedno przejście O(liczba transakcji) — niezależne
+    od liczby dni. Wszystko na siatce (data × ticker) jest już wektorowe.
+
+    stan_poczatkowy — (ilość, koszt) przed pierwszą z podanych transakcji;
+    pozwala dopisać nowe transakcje do zapisanego stanu bez przeliczania historii.
+
+    Returns:
+        (ilosc_po, koszt_po) — np.ndarray o długości len(ilosci)
+    """
+    n = len(ilosci)
+    ilosc_po = np.empty(n)
+    koszt_po = np.empty(n)
+    ilosc_netto, koszt_netto = (float(v) for v in stan_poczatkowy)
+    for i, (il, cn, k) in enumerate(zip(ilosci.tolist(), ceny.tolist(), kupno.tolist())):
+        if k:
+            ilosc_netto += il
+            koszt_netto += il * cn
+        elif ilosc_netto > 0:
+            sr = koszt_netto / ilosc_netto
+            sprzedaz = min(il, ilosc_netto)
+            koszt_netto -= sr * sprzedaz
+            ilosc_netto -= sprzedaz
+        ilosc_po[i] = ilosc_netto
+        koszt_po[i] = koszt_netto
+    return ilosc_po, koszt_po
+
+
+def oblicz_pozycje_dzienne(df_tx: pd.DataFrame, daty: pd.DatetimeIndex, tickery: list):
+    """
+    Macierze ilości i kosztu netto (dni × tickery) przez złączenie „as-of”.
+
+    Dla każdej daty brany jest stan po ostatniej transakcji z datą <= tej daty
+    (np.searchsorted). Przed pierwszą transakcją ilość i koszt wynoszą 0.
+
+    Returns:
+        (ilosci, koszty) — np.ndarray o kształcie (len(daty), len(tickery))
+    """
+    siatka = daty.values.astype("datetime64[ns]")
+    ilosci = np.zeros((len(daty), len(tickery)))
+    koszty = np.zeros((len(daty), len(tickery)))
+    for j, ticker in enumerate(tickery):
+        df_t = df_tx[df_tx["ticker"] == ticker]
+        if df_t.empty:
+            continue
+        il_po, k_po = oblicz_stany_transakcji(
+            df_t["ilosc"].to_numpy(float), df_t["cena_zakupu"].to_numpy(float),
+            (df_t["typ"] == "Kupno").to_numpy(),
+        )
+        daty_tx = df_t["data"].values.astype("datetime64[ns]")
+        idx = np.searchsorted(daty_tx, siatka, side="right") - 1
+        aktywne = idx >= 0
+        ilosci[aktywne, j] = il_po[idx[aktywne]]
+        koszty[aktywne, j] = k_po[idx[aktywne]]
+    return ilosci, koszty
+
+
+# Prefiks kolumn z ilością posiadaną per ticker w ramce oblicz_szereg_z_cen()
+ILOSC_PREFIX = "Ilość: "
+
+
+def oblicz_szereg_z_cen(df_tx: pd.DataFrame, df_hist: pd.DataFrame) -> pd.DataFrame:
+    """
+    Wspólny szereg czasowy portfela — jedno przejście po siatce (data × ticker).
+
+    Args:
+        df_tx: transakcje z przygotuj_transakcje()
+        df_hist: ceny zamknięcia (indeks = daty, kolumny = tickery), już wypełnione ffill/bfill
+
+    Returns:
+        DataFrame z kolumnami: Data, ROI (%), Wartość ($), Kapitał ($)
+        oraz „Ilość: <ticker>” (ilość netto posiadana danego dnia) dla każdego tickera.
+    """
+    if df_tx.empty or df_hist.empty:
+        return pd.DataFrame()
+    # Kolejność tickerów jak w oryginalnej pętli (unique() z transakcji)
+    tickery = [tk for tk in df_tx["ticker"].unique() if tk in df_hist.columns]
+    ilosci, koszty = oblicz_pozycje_dzienne(df_tx, df_hist.index, tickery)
+    ceny = df_hist[tickery].to_numpy(float) if tickery else np.zeros((len(df_hist), 0))
+
+    # Sumowanie kolumna po kolumnie — ta sama kolejność dodawania co w pętli
+    wartosc = np.zeros(len(df_hist))
+    kapital = np.zeros(len(df_hist))
+    for j in range(len(tickery)):
+        wartosc += np.maximum(ilosci[:, j], 0) * ceny[:, j]
+        kapital += np.maximum(koszty[:, j], 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(kapital > 0, (wartosc - kapital) / kapital * 100, 0.0)
+
+    # round() z Pythona zamiast np.round — identyczne zaokrąglenie jak w starej pętli
+    return _ramka_szeregu(df_hist.index, [round(v, 2) for v in roi.tolist()],
+                          [round(v, 2) for v in wartosc.tolist()],
+                          [round(v, 2) for v in kapital.tolist()], ilosci, tickery)
+
+
+def _ramka_szeregu(daty, roi: list, wartosc: list, kapital: list, ilosci: np.ndarray, tickery: list) -> pd.DataFrame:
+    wynik = pd.DataFrame({"Data": daty, "ROI (%)": roi, "Wartość ($)": wartosc, "Kapitał ($)": kapital})
+    posiadane = pd.DataFrame(np.maximum(ilosci, 0), columns=[f"{ILOSC_PREFIX}{tk}" for tk in tickery])
+    return pd.concat([wynik, posiadane], axis=1)
+
+
+def oblicz_roi_z_cen(df_tx: pd.DataFrame, df_hist: pd.DataFrame) -> pd.DataFrame:
+    """Dzienny ROI (%), wartość rynkowa i kapitał portfela (bez kolumn ilości)."""
+    szereg = oblicz_szereg_z_cen(df_tx, df_hist)
+    if szereg.empty:
+        return szereg
+    return szereg[["Data", "ROI (%)", "Wartość ($)", "Kapitał ($)"]]
+
+
+class KsiegaPrzyrostowa:
+    """
+    Szereg portfela utrzymywany między przeliczeniami (np. w st.session_state).
+
+    Pamięta stany po każdej transakcji per ticker (ilość/koszt narastająco),
+    macierze pozycji na siatce dni i ostatni wynik. aktualizuj() szuka
+    najwcześniejszej daty, której dotyczy zmiana (dodana/usunięta transakcja,
+    zmieniona cena, nowy dzień notowań), i przelicza tylko wiersze od tej daty.
+    Fold średniego kosztu jest wznawiany od pierwszej zmienionej transakcji.
+    Wynik jest identyczny z oblicz_szereg_z_cen() na tych samych danych.
+    """
+
+    def __init__(self):
+        self._stany = {}          # {ticker: {"daty", "ilosci", "ceny", "kupno", "il_po", "k_po"}}
+        self._hist = None
+        self._tickery = []
+        self._ilosci = self._koszty = None
+        self._wartosc = self._kapital = None
+        self._zaokraglone = ([], [], [])   # ROI, wartość, kapitał po round()
+        self.szereg = pd.DataFrame()
+        self.przeliczone_wiersze = 0       # ile wierszy siatki przeliczyło ostatnie aktualizuj()
+
+    def _pierwszy_zmieniony_wiersz_cen(self, df_hist: pd.DataFrame, tickery: list) -> int:
+        """Indeks pierwszego dnia, w którym ceny (wspólnych tickerów) różnią się od poprzednich."""
+        stare = self._hist
+        if stare is None or stare.empty:
+            return 0
+        n = min(len(stare), len(df_hist))
+        if not stare.index[:n].equals(df_hist.index[:n]):
+            return 0
+        wspolne = [tk for tk in tickery if tk in stare.columns]
+        a = stare[wspolne].to_numpy(float)[:n]
+        b = df_hist[wspolne].to_numpy(float)[:n]
+        rozne = np.flatnonzero(~((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1))
+        return int(rozne[0]) if len(rozne) else n
+
+    def _aktualizuj_stan_tickera(self, nowy: dict, stary: dict | None):
+        """
+        Nowy stan tickera i data pierwszej zmienionej transakcji (None = bez zmian).
+        Fold jest liczony od pierwszej pozycji, na której log różni się od poprzedniego.
+        """
+        p = 0
+        if stary is not None:
+            n = min(len(stary["daty"]), len(nowy["daty"]))
+            rowne = np.ones(n, dtype=bool)
+            for k in ("daty", "ilosci", "ceny", "kupno"):
+                rowne &= stary[k][:n] == nowy[k][:n]
+            p = int(np.argmin(rowne)) if not rowne.all() else n
+            if p == n == len(stary["daty"]) == len(nowy["daty"]):
+                return stary, None
+        start = (stary["il_po"][p - 1], stary["k_po"][p - 1]) if p else (0.0, 0.0)
+        il_ogon, k_ogon = oblicz_stany_transakcji(nowy["ilosci"][p:], nowy["ceny"][p:], nowy["kupno"][p:],
+                                                  stan_poczatkowy=start)
+        nowy["il_po"] = np.concatenate([stary["il_po"][:p], il_ogon]) if p else il_ogon
+        nowy["k_po"] = np.concatenate([stary["k_po"][:p], k_ogon]) if p else k_ogon
+        kandydaci = [d[p] for d in (nowy["daty"], stary["daty"] if stary else []) if p < len(d)]
+        return nowy, min(kandydaci)
+
+    def aktualizuj(self, df_tx: pd.DataFrame, df_hist: pd.DataFrame) -> pd.DataFrame:
+        """
+        Args:
+            df_tx: transakcje z przygotuj_transakcje()
+            df_hist: ceny zamknięcia (jak dla oblicz_szereg_z_cen)
+
+        Returns:
+            Ten sam DataFrame co oblicz_szereg_z_cen(df_tx, df_hist).
+        """
+        if df_tx.empty or df_hist.empty:
+            self.__init__()
+            return self.szereg
+        tickery = [tk for tk in df_tx["ticker"].unique() if tk in df_hist.columns]
+        daty = df_hist.index.values.astype("datetime64[ns]")
+        n = len(daty)
+        r0 = self._pierwszy_zmieniony_wiersz_cen(df_hist, tickery)
+
+        # Kolumny transakcji jako tablice + pozycje wierszy per ticker (jedno grupowanie)
+        kolumny = {"daty": df_tx["data"].values.astype("datetime64[ns]"),
+                   "ilosci": df_tx["ilosc"].to_numpy(float),
+                   "ceny": df_tx["cena_zakupu"].to_numpy(float),
+                   "kupno": (df_tx["typ"] == "Kupno").to_numpy()}
+        grupy = df_tx.groupby("ticker", sort=False).indices
+        stany = {}
+        for tk in tickery:
+            wiersze = grupy[tk]
+            stany[tk], zmiana = self._aktualizuj_stan_tickera({k: v[wiersze] for k, v in kolumny.items()},
+                                                              self._stany.get(tk))
+            if zmiana is not None:
+                r0 = min(r0, int(np.searchsorted(daty, zmiana, side="left")))
+        for tk, stary in self._stany.items():
+            if tk not in stany:   # ticker zniknął z portfela (usunięte wszystkie transakcje)
+                r0 = min(r0, int(np.searchsorted(daty, stary["daty"][0], side="left")))
+        if r0 >= n and n == len(self.szereg) and tickery == self._tickery:
+            self._stany, self._hist, self.przeliczone_wiersze = stany, df_hist, 0
+            return self.szereg
+
+        # Głowa siatki (wiersze < r0) przepisana z poprzedniego wyniku, ogon liczony od nowa
+        ilosci = np.zeros((n, len(tickery)))
+        koszty = np.zeros((n, len(tickery)))
+        wartosc = np.zeros(n)
+        kapital = np.zeros(n)
+        if r0 > 0:
+            for j, tk in enumerate(tickery):
+                if tk in self._tickery:
+                    ilosci[:r0, j] = self._ilosci[:r0, self._tickery.index(tk)]
+                    koszty[:r0, j] = self._koszty[:r0, self._tickery.index(tk)]
+            wartosc[:r0] = self._wartosc[:r0]
+            kapital[:r0] = self._kapital[:r0]
+        ogon = daty[r0:]
+        ceny = df_hist[tickery].to_numpy(float)[r0:] if tickery else np.zeros((n - r0, 0))
+        for j, tk in enumerate(tickery):
+            s = stany[tk]
+            idx = np.searchsorted(s["daty"], ogon, side="right") - 1
+            aktywne = idx >= 0
+            ilosci[r0:, j][aktywne] = s["il_po"][idx[aktywne]]
+            koszty[r0:, j][aktywne] = s["k_po"][idx[aktywne]]
+            wartosc[r0:] += np.maximum(ilosci[r0:, j], 0) * ceny[:, j]
+            kapital[r0:] += np.maximum(koszty[r0:, j], 0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            roi = np.where(kapital[r0:] > 0, (wartosc[r0:] - kapital[r0:]) / kapital[r0:] * 100, 0.0)
+        stare_roi, stare_wart, stare_kap = self._zaokraglone
+        self._zaokraglone = (
+            stare_roi[:r0] + [round(v, 2) for v in roi.tolist()],
+            stare_wart[:r0] + [round(v, 2) for v in wartosc[r0:].tolist()],
+            stare_kap[:r0] + [round(v, 2) for v in kapital[r0:].tolist()],
+        )
+        self._stany, self._hist, self._tickery = stany, df_hist, tickery
+        self._ilosci, self._koszty, self._wartosc, self._kapital = ilosci, koszty, wartosc, kapital
+        self.przeliczone_wiersze = n - r0
+        self.szereg = _ramka_szeregu(df_hist.index, *self._zaokraglone, ilosci, tickery)
+        return self.szereg
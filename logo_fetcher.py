@@ -6,6 +6,10 @@
 import streamlit as st
 import requests
 
+import instrument_meta
+from market_data import offline
+from xtb_mapping import resolve_xtb_ticker
+
 # Cache for logo URLs — persisted in session_state to survive reruns
 _LOGO_CACHE_KEY = "_logo_cache"
 
@@ -51,10 +55,14 @@ def get_logo_url(ticker: str) -> str | None:
     
     logo_url = None
     
-    # Strategy 1: yfinance info
+    # Offline (dostawca fixture) — bez zapytań do Clearbit
+    if offline():
+        cache[ticker] = None
+        return None
+
+    # Strategy 1: yfinance info (instrument_meta — wspólny, trwały cache .info)
     try:
-        import yfinance as yf
-        info = yf.Ticker(ticker).info
+        info = instrument_meta.info(resolve_xtb_ticker(ticker))
         
         # Direct logo URL (some tickers have it)
         logo_url = info.get("logo_url")
@@ -0,0 +1,435 @@
+# =============================================================================
+# market_data.py — Źródła danych rynkowych (MarketDataProvider)
+# Jeden interfejs dla notowań/świec OHLCV, metadanych, dywidend i kalendarza:
+# yfinance, BloFin (świece krypto) i deterministyczne dane testowe (offline).
+# Wybór dostawcy: BETA1_MARKET_DATA (yfinance | fixture | record),
+# BETA1_MARKET_DATA_KRYPTO (blofin | yfinance | fixture) — świece krypto
+# (swiece_krypto: instId i bary BloFin mapowane na symbol i interwał dostawcy).
+# =============================================================================
+
+import json
+import os
+from abc import ABC, abstractmethod
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+import requests
+
+import candles
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.environ.get("BETA1_FIXTURES_DIR", os.path.join(APP_DIR, "fixtures"))
+
+KOLUMNY = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class MarketDataProvider(ABC):
+    """
+    Interfejs dostawcy danych rynkowych. Każdy dostawca implementuje historia();
+    pozostałe metody zwracają puste wyniki, gdy dostawca danej kategorii nie obsługuje
+    (np. BloFin nie ma metadanych spółek).
+    Błędy sieci są przekazywane wyjątkiem — obsługa (cache, circuit_breaker) jest po stronie wywołującego.
+    """
+
+    nazwa = "bazowy"
+
+    @abstractmethod
+    def historia(self, symbol: str, start=None, end=None, period: str | None = None,
+                 interval: str = "1d", limit: int | None = None) -> pd.DataFrame:
+        """Świece OHLCV (indeks = czas, kolumny KOLUMNY). Pusta ramka, gdy brak danych."""
+
+    def historia_wielu(self, symbole: list, **kwargs) -> dict:
+        """{symbol: DataFrame OHLCV} — domyślnie po jednym zapytaniu na symbol."""
+        return {s: self.historia(s, **kwargs) for s in symbole}
+
+    def info(self, symbol: str) -> dict:
+        """Metadane instrumentu (jak yfinance .info: shortName, sector, quoteType, website, ...)."""
+        return {}
+
+    def typ_instrumentu(self, symbol: str) -> str:
+        """Lekki odczyt typu instrumentu ("EQUITY", "ETF", ...) bez pełnego .info."""
+        return ""
+
+    def dywidendy(self, symbol: str) -> pd.Series:
+        """Wypłacone dywidendy na akcję (indeks = data wypłaty)."""
+        return pd.Series(dtype=float)
+
+    def kalendarz(self, symbol: str):
+        """Nadchodzące wydarzenia (jak yfinance .calendar) albo None."""
+        return None
+
+    def daty_wynikow(self, symbol: str):
+        """Daty publikacji wyników (jak yfinance .earnings_dates) albo None."""
+        return None
+
+
+def _tylko_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    if df is None or df.empty:
+        return pd.DataFrame(columns=KOLUMNY)
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    return df[[c for c in KOLUMNY if c in df.columns]]
+
+
+# =============================================================================
+# YFINANCE
+# =============================================================================
+class YFinanceProvider(MarketDataProvider):
+    nazwa = "yfinance"
+
+    def __init__(self):
+        import yfinance as yf
+        self._yf = yf
+
+    def historia(self, symbol, start=None, end=None, period=None, interval="1d", limit=None):
+        kwargs = {"interval": interval, "auto_adjust": True}
+        if period:
+            kwargs["period"] = period
+        else:
+            kwargs.update(start=start, end=end)
+        df = _tylko_ohlcv(self._yf.Ticker(symbol).history(**kwargs))
+        return df.tail(limit) if limit else df
+
+    def historia_wielu(self, symbole, start=None, end=None, period=None, interval="1d", limit=None):
+        """Jedno zapytanie yf.download dla wszystkich symboli."""
+        if not symbole:
+            return {}
+        kwargs = {"interval": interval, "group_by": "ticker", "auto_adjust": True,
+                  "progress": False, "threads": True}
+        if period:
+            kwargs["period"] = period
+        else:
+            kwargs.update(start=start, end=end)
+        data = self._yf.download(list(symbole), **kwargs)
+        wynik = {}
+        for s in symbole:
+            try:
+                df = data[s] if isinstance(data.columns, pd.MultiIndex) else data
+            except KeyError:
+                continue
+            df = _tylko_ohlcv(df).dropna(how="all")
+            wynik[s] = df.tail(limit) if limit else df
+        return wynik
+
+    def info(self, symbol):
+        return self._yf.Ticker(symbol).info or {}
+
+    def typ_instrumentu(self, symbol):
+        fast = getattr(self._yf.Ticker(symbol), "fast_info", None)
+        return fast.get("quoteType", "") if fast is not None else ""
+
+    def dywidendy(self, symbol):
+        return self._yf.Ticker(symbol).dividends
+
+    def kalendarz(self, symbol):
+        return self._yf.Ticker(symbol).calendar
+
+    def daty_wynikow(self, symbol):
+        return self._yf.Ticker(symbol).earnings_dates
+
+
+# =============================================================================
+# BLOFIN — świece kryptowalut (publiczne API, bez klucza)
+# =============================================================================
+class BloFinProvider(MarketDataProvider):
+    """Tylko historia świec. `symbol` = instId BloFin (np. BTC-USDT), `interval` = bar BloFin (1D, 4H...)."""
+
+    nazwa = "blofin"
+    URL = "https://openapi.blofin.com/api/v1/market/candles"
+    MAX_STRON = 6          # max 6 stron = do 8640 świec
+    NA_STRONE = 1440
+
+    def historia(self, symbol, start=None, end=None, period=None, interval="1D", limit=300):
+        wiersze = []
+        pozostalo = limit or 300
+        after_ts = None
+        for _ in range(self.MAX_STRON):
+            if pozostalo <= 0:
+                break
+            paczka = min(pozostalo, self.NA_STRONE)
+            params = {"instId": symbol, "bar": interval, "limit": paczka}
+            if after_ts:
+                params["after"] = str(after_ts)
+            data = requests.get(self.URL, params=params, timeout=10).json()
+            if data.get("code") != "0" or not data.get("data"):
+                break
+            rows = data["data"]
+            wiersze.extend(rows)
+            pozostalo -= len(rows)
+            # BloFin zwraca od najnowszych; ostatni wiersz = najstarszy — 'after' sięga dalej wstecz
+            after_ts = int(float(rows[-1][0]))
+            if len(rows) < paczka:
+                break
+            time.sleep(0.1)  # grzecznościowy limit zapytań
+
+        if not wiersze:
+            return pd.DataFrame(columns=KOLUMNY)
+        df = pd.DataFrame(wiersze, columns=["ts", "Open", "High", "Low", "Close",
+                                            "Volume", "VolCcy", "VolCcyQuote", "Confirm"])
+        df["ts"] = pd.to_datetime(df["ts"].astype(float), unit="ms")
+        df = df.drop_duplicates(subset=["ts"]).set_index("ts").sort_index()
+        for c in KOLUMNY:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+        return df[KOLUMNY]
+
+
+# =============================================================================
+# FIXTURE — deterministyczne dane offline (testy obciążeniowe, benchmarki)
+# =============================================================================
+_SEKTORY = ["Technology", "Financial Services", "Healthcare", "Energy",
+            "Consumer Cyclical", "Industrials", "Utilities"]
+# Interwały yfinance i bary BloFin → częstotliwość pandas
+_CZESTOTLIWOSC = {"1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min", "1h": "1h", "60m": "1h",
+                  "90m": "90min", "1d": "B", "5d": "5B", "1wk": "W-FRI", "1mo": "BME",
+                  "1H": "1h", "2H": "2h", "4H": "4h", "12H": "12h", "1D": "D", "3D": "3D", "1W": "W", "1M": "MS"}
+_DZIENNE = {"B", "5B", "W-FRI", "BME", "D", "3D", "W", "MS"}
+_POCZATEK = pd.Timestamp("2015-01-02")
+
+
+def _ziarno(*czesci) -> int:
+    return zlib.crc32("|".join(map(str, czesci)).encode())
+
+
+class FixtureProvider(MarketDataProvider):
+    """
+    Dane z plików `<FIXTURES_DIR>/<symbol>.csv` / `<symbol>.json` (nagrane przez
+    RecordingProvider), a dla pozostałych symboli — syntetyczne, deterministyczne:
+    ten sam symbol i data dają zawsze te same wartości. Bez sieci.
+    """
+
+    nazwa = "fixture"
+
+    def __init__(self, katalog: str = FIXTURES_DIR):
+        self.katalog = katalog
+
+    def _plik(self, symbol: str, rozszerzenie: str) -> str:
+        return os.path.join(self.katalog, f"{symbol.replace('/', '_')}.{rozszerzenie}")
+
+    def historia(self, symbol, start=None, end=None, period=None, interval="1d", limit=None):
+        koniec = pd.Timestamp(end) if end is not None else pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+        czest = _CZESTOTLIWOSC.get(interval, "B")
+        if period:
+            poczatek = koniec - pd.Timedelta(days=_dni_okresu(period))
+        elif start is not None:
+            poczatek = pd.Timestamp(start)
+        elif limit and czest not in _DZIENNE:
+            poczatek = koniec - limit * pd.Timedelta(czest)
+        else:
+            poczatek = _POCZATEK
+        plik = self._plik(symbol, "csv")
+        if os.path.exists(plik):
+            df = pd.read_csv(plik, index_col=0, parse_dates=True)
+        else:
+            df = self._syntetyczne(symbol, interval, poczatek, koniec)
+        df = df[(df.index >= poczatek) & (df.index < koniec)]
+        return df.tail(limit) if limit else df
+
+    def _syntetyczne(self, symbol: str, interval: str, poczatek, koniec) -> pd.DataFrame:
+        czest = _CZESTOTLIWOSC.get(interval, "B")
+        dzienne = czest in _DZIENNE
+        # Dane dzienne liczone zawsze od _POCZATEK — wartość dla daty nie zależy od zakresu zapytania
+        od = _POCZATEK if dzienne else poczatek.floor("D")
+        indeks = pd.date_range(od, koniec, freq=czest)
+        if indeks.empty:
+            return pd.DataFrame(columns=KOLUMNY)
+        n = len(indeks)
+
+        def rng(kolumna: str):
+            # Osobny strumień na kolumnę — prefiks serii nie zależy od jej długości
+            return np.random.default_rng(_ziarno(symbol, interval, "" if dzienne else od.date(), kolumna))
+
+        dryf, zmiennosc = 0.0003, 0.012 + (_ziarno(symbol) % 20) / 1000
+        close = (20 + _ziarno(symbol) % 480) * np.exp(np.cumsum(rng("Close").normal(dryf, zmiennosc, n)))
+        otwarcie = close * np.exp(rng("Open").normal(0, zmiennosc / 3, n))
+        rozpietosc = np.abs(rng("HL").normal(0, zmiennosc / 2, n))
+        return pd.DataFrame({
+            "Open": otwarcie,
+            "High": np.maximum(otwarcie, close) * (1 + rozpietosc),
+            "Low": np.minimum(otwarcie, close) * (1 - rozpietosc),
+            "Close": close,
+            "Volume": rng("Volume").integers(10_000, 5_000_000, n).astype(float),
+        }, index=indeks)
+
+    def info(self, symbol):
+        plik = self._plik(symbol, "json")
+        if os.path.exists(plik):
+            with open(plik, "r", encoding="utf-8") as f:
+                return json.load(f)
+        z = _ziarno(symbol)
+        return {"shortName": f"{symbol} (fixture)", "symbol": symbol,
+                "quoteType": "ETF" if z % 9 == 0 else "EQUITY",
+                "sector": _SEKTORY[z % len(_SEKTORY)],
+                "dividendYield": round((z % 50) / 1000, 3) if z % 3 == 0 else None,
+                "currency": "USD"}
+
+    def typ_instrumentu(self, symbol):
+        return self.info(symbol).get("quoteType", "")
+
+    def dywidendy(self, symbol):
+        if not self.info(symbol).get("dividendYield"):
+            return pd.Series(dtype=float)
+        daty = pd.date_range(_POCZATEK, pd.Timestamp.now(), freq="QE")
+        return pd.Series(round(0.1 + (_ziarno(symbol) % 90) / 100, 2), index=daty, name="Dividends")
+
+    def kalendarz(self, symbol):
+        return {"Earnings Date": [self._nastepne_wyniki(symbol).date()]}
+
+    def daty_wynikow(self, symbol):
+        nastepne = self._nastepne_wyniki(symbol)
+        daty = pd.DatetimeIndex([nastepne - pd.DateOffset(months=3 * i) for i in range(4)], name="Earnings Date")
+        return pd.DataFrame({"EPS Estimate": [1.0] * 4, "Reported EPS": [np.nan] + [1.0] * 3}, index=daty)
+
+    def _nastepne_wyniki(self, symbol: str) -> pd.Timestamp:
+        return pd.Timestamp.now().normalize() + pd.Timedelta(days=7 + _ziarno(symbol, "wyniki") % 80)
+
+
+def _dni_okresu(period: str) -> int:
+    """'5d', '1mo', '1y', 'max' → przybliżona liczba dni kalendarzowych."""
+    if period == "max":
+        return (pd.Timestamp.now() - _POCZATEK).days
+    for przyrostek, dni in (("mo", 31), ("wk", 7), ("d", 1), ("y", 366)):
+        if period.endswith(przyrostek):
+            return int(period[:-len(przyrostek)]) * dni
+    return 31
+
+
+# =============================================================================
+# RECORD — nagrywanie odpowiedzi prawdziwego dostawcy do FIXTURES_DIR (do odtworzenia offline)
+# =============================================================================
+class RecordingProvider(MarketDataProvider):
+    """Przekazuje zapytania do `wewnetrzny` i zapisuje świece/metadane jako pliki fixture."""
+
+    nazwa = "record"
+
+    def __init__(self, wewnetrzny: MarketDataProvider, katalog: str = FIXTURES_DIR):
+        self._w = wewnetrzny
+        self.katalog = katalog
+
+    def _zapisz(self, symbol: str, df: pd.DataFrame):
+        if df.empty:
+            return
+        os.makedirs(self.katalog, exist_ok=True)
+        plik = os.path.join(self.katalog, f"{symbol.replace('/', '_')}.csv")
+        if os.path.exists(plik):
+            stare = pd.read_csv(plik, index_col=0, parse_dates=True)
+            df = pd.concat([stare, df])
+            df = df[~df.index.duplicated(keep="last")].sort_index()
+        df.to_csv(plik)
+
+    def historia(self, symbol, **kwargs):
+        df = self._w.historia(symbol, **kwargs)
+        if kwargs.get("interval", "1d") == "1d":
+            self._zapisz(symbol, df)
+        return df
+
+    def historia_wielu(self, symbole, **kwargs):
+        wynik = self._w.historia_wielu(symbole, **kwargs)
+        if kwargs.get("interval", "1d") == "1d":
+            for s, df in wynik.items():
+                self._zapisz(s, df)
+        return wynik
+
+    def info(self, symbol):
+        info = self._w.info(symbol)
+        if info:
+            os.makedirs(self.katalog, exist_ok=True)
+            with open(os.path.join(self.katalog, f"{symbol.replace('/', '_')}.json"), "w", encoding="utf-8") as f:
+                json.dump(info, f, default=str)
+        return info
+
+    def typ_instrumentu(self, symbol):
+        return self._w.typ_instrumentu(symbol)
+
+    def dywidendy(self, symbol):
+        return self._w.dywidendy(symbol)
+
+    def kalendarz(self, symbol):
+        return self._w.kalendarz(symbol)
+
+    def daty_wynikow(self, symbol):
+        return self._w.daty_wynikow(symbol)
+
+
+# =============================================================================
+# WYBÓR DOSTAWCY
+# =============================================================================
+DOSTAWCY = {
+    "yfinance": YFinanceProvider,
+    "blofin": BloFinProvider,
+    "fixture": FixtureProvider,
+}
+_instancje = {}
+
+
+def _utworz(nazwa: str) -> MarketDataProvider:
+    if nazwa not in _instancje:
+        if nazwa == "record":
+            _instancje[nazwa] = RecordingProvider(_utworz("yfinance"))
+        else:
+            _instancje[nazwa] = DOSTAWCY[nazwa]()
+    return _instancje[nazwa]
+
+
+# Dostawcy dopuszczalni w BETA1_MARKET_DATA_KRYPTO
+DOSTAWCY_KRYPTO = ("blofin", "yfinance", "fixture")
+
+
+def dostawca(klasa: str = "akcje") -> MarketDataProvider:
+    """
+    Dostawca dla klasy aktywów: "akcje" (notowania, historia, metadane — domyślnie yfinance)
+    albo "krypto" (świece kryptowalut — domyślnie BloFin). W trybie fixture oba są offline.
+    """
+    glowny = os.environ.get("BETA1_MARKET_DATA", "yfinance")
+    if klasa == "krypto":
+        if glowny == "fixture":
+            return _utworz("fixture")
+        nazwa = os.environ.get("BETA1_MARKET_DATA_KRYPTO", "blofin")
+        if nazwa not in DOSTAWCY_KRYPTO:
+            raise ValueError(f"BETA1_MARKET_DATA_KRYPTO={nazwa!r} — dozwolone: {', '.join(DOSTAWCY_KRYPTO)}")
+        return _utworz(nazwa)
+    return _utworz(glowny)
+
+
+# Bar BloFin → interwał zakładki Wskaźniki (candles.INTERWALY: baza yfinance + reguła agregacji)
+_BAR_NA_INTERWAL = {"15m": "15m", "30m": "30m", "1H": "1h", "2H": "2h", "4H": "4h", "12H": "12h",
+                    "1D": "1D", "3D": "3D", "1W": "1W", "1M": "1M"}
+_CZAS_BARU = {"15m": "15min", "30m": "30min", "1H": "1h", "2H": "2h", "4H": "4h", "12H": "12h",
+              "1D": "1D", "3D": "3D", "1W": "7D", "1M": "31D"}
+
+
+def symbol_yfinance_krypto(inst_id: str) -> str:
+    """instId BloFin → symbol Yahoo (BTC-USDT → BTC-USD)."""
+    baza, _, kwotowana = inst_id.upper().partition("-")
+    return f"{baza}-USD" if kwotowana in ("", "USDT", "USDC", "USD") else f"{baza}-{kwotowana}"
+
+
+def swiece_krypto(inst_id: str, bar: str = "1D", limit: int = 300) -> pd.DataFrame:
+    """
+    Świece krypto w konwencji BloFin (instId, bar, limit) u dowolnego dostawcy krypto.
+    yfinance: symbol BTC-USD, bar → interwał bazowy Yahoo (15m / 1h / 1d) z agregacją
+    lokalną (candles.agreguj) i zakresem przyciętym do głębokości historii Yahoo.
+    Indeks zawsze naiwny w UTC — jak świece BloFin.
+    """
+    zrodlo = dostawca("krypto")
+    if not isinstance(zrodlo, YFinanceProvider):
+        return zrodlo.historia(inst_id, interval=bar, limit=limit)
+    interwal = _BAR_NA_INTERWAL[bar]
+    bazowy, regula = candles.INTERWALY[interwal]
+    teraz = pd.Timestamp.now(tz="UTC").tz_localize(None)
+    # Zapas 2 barów na niepełny pierwszy kubełek agregacji
+    start = max(teraz - (limit + 2) * pd.Timedelta(_CZAS_BARU[bar]),
+                teraz - pd.Timedelta(days=candles.HISTORIA_BAZY[bazowy]))
+    df = zrodlo.historia(symbol_yfinance_krypto(inst_id), start=start.date().isoformat(), interval=bazowy)
+    if df.empty:
+        return df
+    if df.index.tz is not None:
+        df = df.tz_convert("UTC").tz_localize(None)
+    return candles.agreguj(df, regula).tail(limit)
+
+
+def offline() -> bool:
+    """True w trybie fixture — moduły pomocnicze (np. loga) nie powinny sięgać do sieci."""
+    return os.environ.get("BETA1_MARKET_DATA", "yfinance") == "fixture"
@@ -0,0 +1,130 @@
+# =============================================================================
+# market_hours.py — Polityka TTL cache zależna od godzin sesji giełdowych
+# Giełda zamknięta → dane nie mogą się zmienić do otwarcia (długi cache),
+# giełda otwarta → krótki, kryptowaluty (24/7) → osobna polityka.
+# =============================================================================
+
+from datetime import datetime, time as dtime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from xtb_mapping import XTB_SUFFIX_TO_YF
+
+# Sesje notowań ciągłych per sufiks yfinance: (strefa czasowa, otwarcie, zamknięcie).
+# Tylko dni robocze, bez kalendarza świąt — w święto giełda jest traktowana jak
+# otwarta (krótki TTL), czyli bezpiecznie: najwyżej kilka zbędnych zapytań.
+GIELDY = {
+    "":    ("America/New_York", dtime(9, 30), dtime(16, 0)),    # NYSE / NASDAQ
+    ".L":  ("Europe/London", dtime(8, 0), dtime(16, 30)),
+    ".DE": ("Europe/Berlin", dtime(9, 0), dtime(17, 30)),       # Xetra
+    ".PA": ("Europe/Paris", dtime(9, 0), dtime(17, 30)),
+    ".AS": ("Europe/Amsterdam", dtime(9, 0), dtime(17, 30)),
+    ".MC": ("Europe/Madrid", dtime(9, 0), dtime(17, 30)),
+    ".MI": ("Europe/Rome", dtime(9, 0), dtime(17, 30)),
+    ".WA": ("Europe/Warsaw", dtime(9, 0), dtime(17, 0)),        # GPW
+    ".ST": ("Europe/Stockholm", dtime(9, 0), dtime(17, 30)),
+    ".OL": ("Europe/Oslo", dtime(9, 0), dtime(16, 20)),
+    ".CO": ("Europe/Copenhagen", dtime(9, 0), dtime(17, 0)),
+    ".HE": ("Europe/Helsinki", dtime(10, 0), dtime(18, 30)),
+    ".LS": ("Europe/Lisbon", dtime(8, 0), dtime(16, 30)),
+    ".VI": ("Europe/Vienna", dtime(9, 0), dtime(17, 30)),
+    ".IR": ("Europe/Dublin", dtime(8, 0), dtime(16, 30)),
+    ".SW": ("Europe/Zurich", dtime(9, 0), dtime(17, 30)),
+    ".HK": ("Asia/Hong_Kong", dtime(9, 30), dtime(16, 0)),
+    ".AX": ("Australia/Sydney", dtime(10, 0), dtime(16, 0)),
+    ".T":  ("Asia/Tokyo", dtime(9, 0), dtime(15, 30)),
+}
+# Każdy sufiks z mapowania XTB musi mieć kalendarz
+assert set(XTB_SUFFIX_TO_YF.values()) <= set(GIELDY), "brak sesji dla sufiksu z XTB_SUFFIX_TO_YF"
+
+# TTL (sekundy) per rodzaj danych
+TTL = {
+    "notowania": {"otwarta": 300, "krypto": 120, "domyslny": 900},
+    "historia": {"otwarta": 1800, "krypto": 1800, "domyslny": 3600},
+}
+# Po zamknięciu sesji dane jeszcze przez chwilę się zmieniają (aukcja zamknięcia,
+# korekty Yahoo) — w tym oknie obowiązuje TTL jak dla otwartej giełdy
+PO_ZAMKNIECIU = timedelta(minutes=30)
+# Maksymalny TTL zamkniętego rynku (np. weekend) — zabezpieczenie przed błędem kalendarza
+MAX_TTL_ZAMKNIETEJ = 24 * 3600
+
+
+def sufiks_gieldy(symbol: str) -> str | None:
+    """
+    Sufiks yfinance z kluczy GIELDY albo None dla symboli spoza kalendarza
+    (indeksy ^, waluty =X, kontrakty =F, nieznane giełdy).
+    """
+    s = symbol.upper()
+    if s.startswith("^") or "=" in s:
+        return None
+    if "." not in s:
+        return ""
+    sufiks = s[s.rindex("."):]
+    return sufiks if sufiks in GIELDY else None
+
+
+def _sesja(sufiks: str, dzien, strefa):
+    """(otwarcie, zamknięcie) sesji w danym dniu jako datetime ze strefą."""
+    _, otw, zam = GIELDY[sufiks]
+    return datetime.combine(dzien, otw, strefa), datetime.combine(dzien, zam, strefa)
+
+
+def stan_rynku(sufiks: str, teraz: datetime):
+    """
+    (otwarta, następne otwarcie) — `otwarta` obejmuje też okno PO_ZAMKNIECIU.
+    `teraz` musi mieć strefę czasową.
+    """
+    strefa = ZoneInfo(GIELDY[sufiks][0])
+    lokalnie = teraz.astimezone(strefa)
+    for dni in range(8):
+        dzien = lokalnie.date() + timedelta(days=dni)
+        if dzien.weekday() >= 5:
+            continue
+        otwarcie, zamkniecie = _sesja(sufiks, dzien, strefa)
+        if lokalnie < otwarcie:
+            return False, otwarcie
+        if lokalnie < zamkniecie + PO_ZAMKNIECIU:
+            return True, otwarcie
+    return False, lokalnie + timedelta(days=7)  # nieosiągalne przy 5 dniach roboczych
+
+
+def ttl(symbol: str, rodzaj: str = "notowania", krypto: bool = False, teraz: datetime | None = None) -> float:
+    """
+    Czas życia wpisu cache (s) dla symbolu yfinance.
+
+    Args:
+        symbol: symbol yfinance (po resolve_xtb_ticker)
+        rodzaj: "notowania" albo "historia"
+        krypto: True dla kryptowalut (is_crypto) — rynek 24/7
+        teraz: moment odniesienia (domyślnie teraz, UTC)
+    """
+    polityka = TTL[rodzaj]
+    if krypto:
+        return polityka["krypto"]
+    sufiks = sufiks_gieldy(symbol)
+    if sufiks is None:
+        return polityka["domyslny"]
+    teraz = teraz or datetime.now(timezone.utc)
+    otwarta, nastepne_otwarcie = stan_rynku(sufiks, teraz)
+    if otwarta:
+        return polityka["otwarta"]
+    do_otwarcia = (nastepne_otwarcie - teraz).total_seconds()
+    return max(polityka["otwarta"], min(do_otwarcia, MAX_TTL_ZAMKNIETEJ))
+
+
+def klucz_okna(symbol: str, rodzaj: str = "historia", krypto: bool = False,
+               teraz: datetime | None = None) -> str:
+    """
+    Klucz okna ważności do st.cache_data (TTL funkcji jest stały, więc zmienny TTL
+    realizujemy argumentem, który zmienia się dopiero po wygaśnięciu okna).
+
+    Zamknięta giełda → klucz = moment następnego otwarcia (stały do otwarcia),
+    otwarta / krypto / poza kalendarzem → numer okna długości ttl().
+    """
+    teraz = teraz or datetime.now(timezone.utc)
+    sufiks = None if krypto else sufiks_gieldy(symbol)
+    if sufiks is not None:
+        otwarta, nastepne_otwarcie = stan_rynku(sufiks, teraz)
+        if not otwarta:
+            return f"z{int(nastepne_otwarcie.timestamp())}"
+    dlugosc = ttl(symbol, rodzaj, krypto, teraz)
+    return f"o{int(teraz.timestamp() // dlugosc)}"
@@ -0,0 +1,238 @@
+# =============================================================================
+# ohlcv_store.py — Trwały lokalny magazyn świec OHLCV (SQLite)
+# Klucz: (symbol yfinance, interwał). Przeżywa restart procesu i jest wspólny
+# dla wszystkich sesji na hoście — dociągamy tylko świece po ostatniej zapisanej.
+# =============================================================================
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("BETA1_CACHE_DIR", os.path.join(APP_DIR, ".cache"))
+STORE_PATH = os.path.join(CACHE_DIR, "ohlcv.sqlite")
+
+KOLUMNY = ["Open", "High", "Low", "Close", "Volume"]
+
+# Względna różnica zamknięcia na nakładającej się świecy, powyżej której uznajemy,
+# że Yahoo przeliczył historię (dywidenda / split) i pobieramy całość od nowa
+_TOLERANCJA_KOREKTY = 1e-6
+
+_lock = threading.Lock()
+_schemat_gotowy = False
+_log = logging.getLogger(__name__)
+
+
+@contextmanager
+def _polaczenie():
+    """Połączenie SQLite w trybie WAL (wiele procesów czyta, jeden pisze naraz)."""
+    global _schemat_gotowy
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(STORE_PATH, timeout=30)
+    try:
+        if not _schemat_gotowy:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS bars (
+                symbol TEXT NOT NULL, interval TEXT NOT NULL, ts INTEGER NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (symbol, interval, ts)) WITHOUT ROWID""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS coverage (
+                symbol TEXT NOT NULL, interval TEXT NOT NULL,
+                start INTEGER NOT NULL, updated REAL NOT NULL,
+                PRIMARY KEY (symbol, interval))""")
+            conn.commit()
+            _schemat_gotowy = True
+        yield conn
+    finally:
+        conn.close()
+
+
+def _ts(wartosc) -> int:
+    """Timestamp (naiwny, czas lokalny giełdy) → sekundy epoki."""
+    return int(pd.Timestamp(wartosc).timestamp())
+
+
+def _normalizuj(df: pd.DataFrame) -> pd.DataFrame:
+    """Ujednolica ramkę z yfinance: indeks naiwny, kolumny OHLCV."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=KOLUMNY)
+    df = df.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    idx = pd.to_datetime(df.index)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    df.index = idx
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    for c in KOLUMNY:
+        if c not in df.columns:
+            df[c] = float("nan")
+    return df[KOLUMNY]
+
+
+def odczytaj(symbol: str, interval: str, start=None, end=None) -> pd.DataFrame:
+    """Zwraca zapisane świece (indeks = data, kolumny OHLCV) z zakresu [start, end]."""
+    sql = "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol=? AND interval=?"
+    params = [symbol, interval]
+    if start is not None:
+        sql += " AND ts >= ?"; params.append(_ts(start))
+    if end is not None:
+        sql += " AND ts <= ?"; params.append(_ts(end))
+    sql += " ORDER BY ts"
+    with _polaczenie() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    if not rows:
+        return pd.DataFrame(columns=KOLUMNY)
+    df = pd.DataFrame(rows, columns=["ts"] + KOLUMNY)
+    df.index = pd.to_datetime(df.pop("ts"), unit="s")
+    df.index.name = None
+    return df
+
+
+def zapisz(symbol: str, interval: str, df: pd.DataFrame, pokrycie_od=None, zastap: bool = False,
+           usun_przed=None):
+    """
+    Zapisuje świece (upsert). pokrycie_od — początek zakresu, który jest kompletny.
+    zastap=True najpierw usuwa wszystkie świece (symbol, interwał).
+    usun_przed — retencja: świece starsze są usuwane, pokrycie zaczyna się najwcześniej tam.
+    """
+    df = _normalizuj(df)
+    wiersze = [(symbol, interval, _ts(idx), *[None if pd.isna(v) else float(v) for v in row])
+               for idx, row in zip(df.index, df.itertuples(index=False))]
+    with _lock, _polaczenie() as conn, conn:
+        if zastap:
+            conn.execute("DELETE FROM bars WHERE symbol=? AND interval=?", (symbol, interval))
+        conn.executemany("INSERT OR REPLACE INTO bars VALUES (?,?,?,?,?,?,?,?)", wiersze)
+        if pokrycie_od is not None:
+            start = _ts(pokrycie_od)
+            conn.execute("""INSERT INTO coverage VALUES (?,?,?,?)
+                ON CONFLICT(symbol, interval) DO UPDATE SET
+                start = CASE WHEN excluded.start < coverage.start OR ? THEN excluded.start ELSE coverage.start END,
+                updated = excluded.updated""", (symbol, interval, start, time.time(), zastap))
+        if usun_przed is not None:
+            granica = _ts(usun_przed)
+            conn.execute("DELETE FROM bars WHERE symbol=? AND interval=? AND ts < ?", (symbol, interval, granica))
+            conn.execute("UPDATE coverage SET start = MAX(start, ?) WHERE symbol=? AND interval=?",
+                         (granica, symbol, interval))
+
+
+def _pokrycie(symbol: str, interval: str):
+    """
+    (start pokrycia, ts świecy kotwicy) albo None, jeśli symbol nie był jeszcze pobierany.
+    Kotwica to przedostatnia zapisana świeca — ostatnia może być niepełna (trwająca sesja).
+    """
+    with _polaczenie() as conn:
+        cov = conn.execute("SELECT start FROM coverage WHERE symbol=? AND interval=?",
+                           (symbol, interval)).fetchone()
+        if cov is None:
+            return None
+        ostatnie = conn.execute("SELECT ts FROM bars WHERE symbol=? AND interval=? ORDER BY ts DESC LIMIT 2",
+                                (symbol, interval)).fetchall()
+    return cov[0], (ostatnie[-1][0] if ostatnie else None)
+
+
+def pobierz_przyrostowo(symbol: str, interval: str, start: str, fetch_fn, przytnij: bool = False) -> pd.DataFrame:
+    """
+    Zwraca świece od `start`, dociągając z sieci tylko brakujący ogon.
+
+    Args:
+        symbol: symbol yfinance (po _resolve_ticker)
+        interval: np. "1d"
+        start: data początkowa "YYYY-MM-DD"
+        fetch_fn: fetch_fn(start_str) -> DataFrame z OHLCV (np. yf.Ticker(s).history)
+        przytnij: True — świece sprzed `start` są usuwane przy zapisie (przesuwane okno
+            retencji, np. intraday w limicie historii Yahoo); magazyn nie rośnie bez końca
+
+    Pierwsze pobranie (albo żądanie starszego zakresu niż zapisany) ściąga całość
+    od `start`. Kolejne pobierają od przedostatniej zapisanej świecy — ostatnia
+    (być może niepełna) jest nadpisywana, a przedostatnia służy do wykrycia korekty
+    historii (dywidenda/split), po której cały zakres jest pobierany od nowa.
+    Błąd sieci (albo zapisu) jest logowany i zwraca to, co już jest w magazynie.
+    """
+    usun_przed = start if przytnij else None
+    pokrycie = _pokrycie(symbol, interval)
+    try:
+        od = _brakujace_od(pokrycie, start)
+        nowe = fetch_fn(od)
+        if od != start and _korekta(symbol, interval, pokrycie, nowe):
+            od = _dzien(pokrycie[0])
+            zapisz(symbol, interval, fetch_fn(od), pokrycie_od=od, zastap=True, usun_przed=usun_przed)
+        else:
+            zapisz(symbol, interval, nowe, pokrycie_od=start, usun_przed=usun_przed)
+    except Exception as e:
+        # Dostawca rzuca dowolne wyjątki (HTTP, parsowanie, YahooNiedostepne) — fallback na magazyn
+        _log.warning("Nie dociągnięto %s %s (%s: %s) — świece z magazynu", symbol, interval, type(e).__name__, e)
+    return odczytaj(symbol, interval, start=start)
+
+
+def pobierz_przyrostowo_wielu(symbole: list, interval: str, start: str, fetch_wielu_fn) -> dict:
+    """
+    pobierz_przyrostowo dla wielu symboli: symbole o tym samym brakującym zakresie
+    (np. wszystkie nowe albo z tą samą świecą kotwicy) pobierane jednym zapytaniem.
+
+    Args:
+        fetch_wielu_fn: fetch_wielu_fn(symbole, start_str) -> {symbol: DataFrame OHLCV}
+            (np. historia_wielu dostawcy — jedno yf.download); brakujący symbol = bez zmian
+
+    Returns:
+        {symbol: DataFrame} jak z pobierz_przyrostowo (błąd sieci — to, co w magazynie).
+    """
+    grupy = {}          # {od: [(symbol, pokrycie)]}
+    for symbol in symbole:
+        pokrycie = _pokrycie(symbol, interval)
+        grupy.setdefault(_brakujace_od(pokrycie, start), []).append((symbol, pokrycie))
+    od_nowa = {}        # {od: [symbol]} — historia skorygowana przez Yahoo
+    for od, elementy in grupy.items():
+        try:
+            dane = fetch_wielu_fn([symbol for symbol, _ in elementy], od)
+        except Exception as e:
+            _log.warning("Nie dociągnięto %d symboli %s od %s (%s: %s) — świece z magazynu",
+                         len(elementy), interval, od, type(e).__name__, e)
+            continue
+        for symbol, pokrycie in elementy:
+            nowe = dane.get(symbol)
+            if nowe is None:
+                continue
+            if od != start and _korekta(symbol, interval, pokrycie, nowe):
+                od_nowa.setdefault(_dzien(pokrycie[0]), []).append(symbol)
+            else:
+                zapisz(symbol, interval, nowe, pokrycie_od=start)
+    for od, skorygowane in od_nowa.items():
+        try:
+            dane = fetch_wielu_fn(skorygowane, od)
+        except Exception as e:
+            _log.warning("Nie pobrano od nowa %d skorygowanych symboli %s (%s: %s)",
+                         len(skorygowane), interval, type(e).__name__, e)
+            continue
+        for symbol in skorygowane:
+            if symbol in dane:
+                zapisz(symbol, interval, dane[symbol], pokrycie_od=od, zastap=True)
+    return {symbol: odczytaj(symbol, interval, start=start) for symbol in symbole}
+
+
+def _dzien(ts: int) -> str:
+    return pd.to_datetime(ts, unit="s").strftime("%Y-%m-%d")
+
+
+def _brakujace_od(pokrycie, start: str) -> str:
+    """Od kiedy pobierać: `start` przy braku pokrycia (albo krótszym), inaczej od świecy kotwicy."""
+    if pokrycie is None or pokrycie[0] > _ts(start) or pokrycie[1] is None:
+        return start
+    return _dzien(pokrycie[1])
+
+
+def _korekta(symbol: str, interval: str, pokrycie, nowe: pd.DataFrame) -> bool:
+    """Czy zamknięcie świecy kotwicy różni się od zapisanego (Yahoo przeliczył historię)."""
+    kotwica = pd.to_datetime(pokrycie[1], unit="s")
+    nowe = _normalizuj(nowe)
+    stare = odczytaj(symbol, interval, start=kotwica, end=kotwica)
+    if nowe.empty or stare.empty or kotwica not in nowe.index:
+        return False
+    c_stare = float(stare["Close"].iloc[0])
+    c_nowe = float(nowe.loc[kotwica, "Close"])
+    return bool(c_stare) and abs(c_nowe / c_stare - 1) > _TOLERANCJA_KOREKTY
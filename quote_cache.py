@@ -0,0 +1,95 @@
+# =============================================================================
+# quote_cache.py — Cache notowań „stale-while-revalidate”
+# Raz widziana cena jest zwracana natychmiast (z wiekiem), a wygasające wpisy
+# odświeża wątek w tle — render nigdy nie czeka na yfinance po raz drugi.
+# =============================================================================
+
+import threading
+import time
+
+# Domyślny czas życia notowania (s); pobierz(ttl=...) może podać własną politykę
+TTL_NOTOWAN = 900
+# Odświeżanie w tle startuje wcześniej — przy tej części TTL
+ODSWIEZ_PRZY = 0.8
+# Minimalny odstęp między próbami pobrania tego samego tickera (po błędzie)
+PONOW_PO = 60
+
+_wpisy = {}            # {ticker: {"wynik": dict, "czas": float, "proba": float, "ttl": float}}
+_odswiezane = set()    # tickery, dla których trwa odświeżanie w tle
+_lock = threading.Lock()
+
+
+def pobierz(tickery, fetch_fn, ttl=TTL_NOTOWAN) -> tuple:
+    """
+    Notowania tickerów z cache, z odświeżaniem w tle.
+
+    Args:
+        tickery: lista/krotka tickerów
+        fetch_fn: fetch_fn(tuple tickerów) -> {ticker: dict notowania} (zapytanie sieciowe)
+        ttl: czas życia wpisu (s) albo funkcja ttl(ticker) — wyznaczana w chwili
+             pobrania (np. market_hours.ttl: do otwarcia giełdy, gdy jest zamknięta)
+
+    Returns:
+        (wyniki, wiek) — {ticker: dict notowania}, {ticker: wiek w sekundach}.
+        Tylko tickery nigdy wcześniej niewidziane są pobierane synchronicznie.
+    """
+    tickery = list(tickery)
+    with _lock:
+        brak = [tk for tk in tickery if tk not in _wpisy]
+    if brak:
+        _zapisz(_bezpiecznie(fetch_fn, brak), brak, ttl)
+
+    teraz = time.time()
+    with _lock:
+        do_odswiezenia = [tk for tk in tickery if tk in _wpisy and tk not in _odswiezane
+                          and _wymaga_odswiezenia(_wpisy[tk], teraz)]
+        _odswiezane.update(do_odswiezenia)
+        wyniki = {tk: dict(_wpisy[tk]["wynik"]) for tk in tickery if tk in _wpisy}
+        wiek = {tk: teraz - _wpisy[tk]["czas"] for tk in wyniki}
+    if do_odswiezenia:
+        threading.Thread(target=_odswiez_w_tle, args=(do_odswiezenia, fetch_fn, ttl),
+                         name="beta1-quotes", daemon=True).start()
+    return wyniki, wiek
+
+
+def _wymaga_odswiezenia(wpis: dict, teraz: float) -> bool:
+    if teraz - wpis["proba"] < PONOW_PO:
+        return False
+    return bool(wpis["wynik"].get("error")) or teraz - wpis["czas"] > wpis["ttl"] * ODSWIEZ_PRZY
+
+
+def odswiezane(tickery) -> bool:
+    """Czy dla któregoś z tickerów trwa właśnie odświeżanie w tle."""
+    with _lock:
+        return any(tk in _odswiezane for tk in tickery)
+
+
+def _odswiez_w_tle(tickery: list, fetch_fn, ttl):
+    try:
+        _zapisz(_bezpiecznie(fetch_fn, tickery), tickery, ttl)
+    finally:
+        with _lock:
+            _odswiezane.difference_update(tickery)
+
+
+def _bezpiecznie(fetch_fn, tickery: list) -> dict:
+    try:
+        return fetch_fn(tuple(tickery)) or {}
+    except Exception:
+        return {}
+
+
+def _zapisz(nowe: dict, tickery: list, ttl):
+    """Nowe notowania do cache. Błąd odświeżenia nie nadpisuje ostatniej dobrej ceny."""
+    teraz = time.time()
+    ttle = {tk: float(ttl(tk)) if callable(ttl) else float(ttl) for tk in tickery}
+    with _lock:
+        for tk in tickery:
+            wynik = nowe.get(tk) or {"error": f"Nie znaleziono danych: {tk}"}
+            stary = _wpisy.get(tk)
+            if not wynik.get("error"):
+                _wpisy[tk] = {"wynik": wynik, "czas": teraz, "proba": teraz, "ttl": ttle[tk]}
+            elif stary is not None and not stary["wynik"].get("error"):
+                stary["proba"] = teraz
+            else:
+                _wpisy[tk] = {"wynik": wynik, "czas": teraz, "proba": teraz, "ttl": ttle[tk]}
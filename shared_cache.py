@@ -0,0 +1,321 @@
+# =============================================================================
+# shared_cache.py — Wspólny cache danych rynkowych między procesami/workerami
+# st.cache_data żyje w pamięci jednego procesu — przy kilku workerach Streamlit
+# każdy pobierał te same ^GSPC / WIG20.WA / popularne historie osobno.
+# Backend wybiera BETA1_SHARED_CACHE:
+#   off    — wyłączony (domyślnie, zachowanie jak dawniej)
+#   sqlite — plik SQLite w .cache/ (workery na jednym hoście)
+#   redis  — serwer zgodny z Redis (BETA1_SHARED_CACHE_URL, pakiet `redis` opcjonalny)
+#   pamiec — wersja w pamięci procesu (testy, jeden worker)
+# Single-flight: dany klucz pobiera naraz tylko jeden worker, pozostali czekają na wynik.
+# =============================================================================
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+
+from ohlcv_store import CACHE_DIR
+
+SHARED_CACHE_PATH = os.path.join(CACHE_DIR, "shared.sqlite")
+PREFIKS = "beta1:"
+
+# Blokada single-flight wygasa sama po tym czasie (worker padł w trakcie pobierania)
+CZAS_BLOKADY = 60
+# Jak długo czekamy na wynik cudzego pobierania, zanim pobierzemy sami
+CZEKAJ_MAX = 30
+_CZEKAJ_KROK = 0.1
+
+
+# =============================================================================
+# BACKENDY
+# Wspólny interfejs: odczytaj(klucz) -> bytes | None, zapisz(klucz, dane, ttl),
+# zablokuj(klucz, wlasciciel, czas) -> bool, odblokuj(klucz, wlasciciel).
+# =============================================================================
+class PamiecBackend:
+    """Backend w pamięci procesu — zastępnik Redis do testów i pojedynczego workera."""
+
+    def __init__(self):
+        self._dane = {}       # {klucz: (bytes, wygasa)}
+        self._blokady = {}    # {klucz: (wlasciciel, wygasa)}
+        self._lock = threading.Lock()
+
+    def odczytaj(self, klucz):
+        with self._lock:
+            wpis = self._dane.get(klucz)
+            if wpis is None:
+                return None
+            if wpis[1] <= time.time():
+                del self._dane[klucz]
+                return None
+            return wpis[0]
+
+    def zapisz(self, klucz, dane, ttl):
+        with self._lock:
+            self._dane[klucz] = (dane, time.time() + ttl)
+
+    def zablokuj(self, klucz, wlasciciel, czas):
+        teraz = time.time()
+        with self._lock:
+            wpis = self._blokady.get(klucz)
+            if wpis is not None and wpis[1] > teraz:
+                return False
+            self._blokady[klucz] = (wlasciciel, teraz + czas)
+            return True
+
+    def odblokuj(self, klucz, wlasciciel):
+        with self._lock:
+            wpis = self._blokady.get(klucz)
+            if wpis is not None and wpis[0] == wlasciciel:
+                del self._blokady[klucz]
+
+
+class SQLiteBackend:
+    """Plik SQLite (WAL) — wspólny dla wszystkich procesów na hoście."""
+
+    def __init__(self, sciezka: str = SHARED_CACHE_PATH):
+        self.sciezka = sciezka
+        os.makedirs(os.path.dirname(sciezka), exist_ok=True)
+        with self._polaczenie() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS locks (
+                key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)""")
+
+    def _polaczenie(self):
+        # isolation_level=None — transakcje jawnie (BEGIN IMMEDIATE przy blokadzie)
+        return _Polaczenie(self.sciezka)
+
+    def odczytaj(self, klucz):
+        with self._polaczenie() as conn:
+            wiersz = conn.execute("SELECT value, expires FROM entries WHERE key=?", (klucz,)).fetchone()
+        if wiersz is None or wiersz[1] <= time.time():
+            return None
+        return wiersz[0]
+
+    def zapisz(self, klucz, dane, ttl):
+        teraz = time.time()
+        with self._polaczenie() as conn:
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (klucz, dane, teraz + ttl))
+            # Sprzątanie przy okazji zapisu — plik nie rośnie bez końca
+            conn.execute("DELETE FROM entries WHERE expires <= ?", (teraz,))
+
+    def zablokuj(self, klucz, wlasciciel, czas):
+        teraz = time.time()
+        with self._polaczenie() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM locks WHERE key=? AND expires <= ?", (klucz, teraz))
+                kursor = conn.execute("INSERT OR IGNORE INTO locks VALUES (?, ?, ?)",
+                                      (klucz, wlasciciel, teraz + czas))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return kursor.rowcount == 1
+
+    def odblokuj(self, klucz, wlasciciel):
+        with self._polaczenie() as conn:
+            conn.execute("DELETE FROM locks WHERE key=? AND owner=?", (klucz, wlasciciel))
+
+
+class _Polaczenie:
+    """Połączenie SQLite w trybie autocommit, zamykane po bloku with."""
+
+    def __init__(self, sciezka):
+        self.conn = sqlite3.connect(sciezka, timeout=30, isolation_level=None)
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc):
+        self.conn.close()
+
+
+class RedisBackend:
+    """Serwer zgodny z Redis (Redis, Valkey, KeyDB...) — workery na wielu hostach."""
+
+    # Zwolnienie tylko własnej blokady (porównanie właściciela i DEL atomowo)
+    _ODBLOKUJ = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+    def __init__(self, url: str | None = None):
+        import redis  # opcjonalna zależność — tylko dla BETA1_SHARED_CACHE=redis
+        self._r = redis.Redis.from_url(url or os.environ.get("BETA1_SHARED_CACHE_URL", "redis://localhost:6379/0"))
+
+    def odczytaj(self, klucz):
+        return self._r.get(klucz)
+
+    def zapisz(self, klucz, dane, ttl):
+        self._r.set(klucz, dane, px=max(1, int(ttl * 1000)))
+
+    def zablokuj(self, klucz, wlasciciel, czas):
+        return bool(self._r.set("lock:" + klucz, wlasciciel, nx=True, px=int(czas * 1000)))
+
+    def odblokuj(self, klucz, wlasciciel):
+        self._r.eval(self._ODBLOKUJ, 1, "lock:" + klucz, wlasciciel)
+
+
+BACKENDY = {
+    "sqlite": SQLiteBackend,
+    "redis": RedisBackend,
+    "pamiec": PamiecBackend,
+}
+_backend = None
+_backend_lock = threading.Lock()
+_WLASCICIEL = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def backend():
+    """Aktywny backend wg BETA1_SHARED_CACHE albo None (wyłączony / niedostępny)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            nazwa = os.environ.get("BETA1_SHARED_CACHE", "off")
+            try:
+                _backend = BACKENDY[nazwa]() if nazwa in BACKENDY else False
+            except Exception:
+                # Brak pakietu redis / serwera / prawa zapisu — działamy bez wspólnego cache
+                _backend = False
+        return _backend or None
+
+
+def ustaw_backend(nowy):
+    """Podmienia backend (np. PamiecBackend() w testach, None — wyłącza)."""
+    global _backend
+    with _backend_lock:
+        _backend = nowy if nowy is not None else False
+
+
+# =============================================================================
+# API
+# =============================================================================
+def pobierz(klucz: str, ttl: float, fetch_fn, pusty=None):
+    """
+    Wartość spod klucza ze wspólnego cache albo fetch_fn() — pobierana przez jeden worker naraz.
+
+    Args:
+        klucz: klucz wpisu (z wersją i argumentami funkcji)
+        ttl: czas życia wpisu (s)
+        fetch_fn: fetch_fn() -> wartość (picklowalna)
+        pusty: pusty(wartość) -> True — wynik nie trafia do cache (błąd / brak danych)
+
+    Bez backendu to po prostu fetch_fn(). Błąd backendu nigdy nie blokuje pobrania.
+    """
+    b = backend()
+    if b is None:
+        return fetch_fn()
+    klucz = PREFIKS + klucz
+    trafienie = _odczytaj(b, klucz)
+    if trafienie is not _BRAK:
+        return trafienie
+
+    termin = time.time() + CZEKAJ_MAX
+    while True:
+        if _zablokuj(b, klucz):
+            try:
+                # Ktoś mógł zapisać wynik między odczytem a blokadą
+                trafienie = _odczytaj(b, klucz)
+                if trafienie is not _BRAK:
+                    return trafienie
+                wynik = fetch_fn()
+                if pusty is None or not pusty(wynik):
+                    _zapisz(b, klucz, wynik, ttl)
+                return wynik
+            finally:
+                _odblokuj(b, klucz)
+        # Inny worker pobiera ten klucz — czekamy na jego wynik
+        time.sleep(_CZEKAJ_KROK)
+        trafienie = _odczytaj(b, klucz)
+        if trafienie is not _BRAK:
+            return trafienie
+        if time.time() >= termin:
+            return fetch_fn()
+
+
+def pobierz_wiele(klucze: dict, ttl, fetch_fn, pusty=None) -> dict:
+    """
+    Wersja zbiorcza: klucze = {element: klucz}, fetch_fn(lista elementów) -> {element: wartość}.
+    Jedno zapytanie o elementy, których nie ma w cache i których nikt inny nie pobiera.
+
+    Args:
+        ttl: czas życia (s) albo funkcja ttl(element)
+        pusty: pusty(wartość) -> True — wartość nie trafia do cache
+    """
+    b = backend()
+    if b is None:
+        return fetch_fn(list(klucze)) if klucze else {}
+    pelne = {el: PREFIKS + k for el, k in klucze.items()}
+    wyniki = {}
+    oczekujace = list(pelne)
+    termin = time.time() + CZEKAJ_MAX
+    while True:
+        for el in list(oczekujace):
+            trafienie = _odczytaj(b, pelne[el])
+            if trafienie is not _BRAK:
+                wyniki[el] = trafienie
+                oczekujace.remove(el)
+        # Jak w pobierz(): blokadę próbujemy przy każdym przejściu — gdy inny worker skończył,
+        # nie zapisując wyniku (pusty / brak w paczce), pobieramy od razu zamiast czekać CZEKAJ_MAX
+        zablokowane = [el for el in oczekujace if _zablokuj(b, pelne[el])]
+        try:
+            # Ktoś mógł zapisać wynik między odczytem a blokadą
+            moje = []
+            for el in zablokowane:
+                trafienie = _odczytaj(b, pelne[el])
+                if trafienie is _BRAK:
+                    moje.append(el)
+                else:
+                    wyniki[el] = trafienie
+            if moje:
+                nowe = fetch_fn(moje) or {}
+                for el in moje:
+                    if el in nowe and (pusty is None or not pusty(nowe[el])):
+                        _zapisz(b, pelne[el], nowe[el], ttl(el) if callable(ttl) else ttl)
+                wyniki.update({el: nowe[el] for el in moje if el in nowe})
+        finally:
+            for el in zablokowane:
+                _odblokuj(b, pelne[el])
+        oczekujace = [el for el in oczekujace if el not in wyniki and el not in zablokowane]
+        if not oczekujace:
+            return wyniki
+        # Elementy pobierane przez inne workery — czekamy na ich wynik, po terminie sami
+        if time.time() >= termin:
+            wyniki.update(fetch_fn(oczekujace) or {})
+            return wyniki
+        time.sleep(_CZEKAJ_KROK)
+
+
+_BRAK = object()
+
+
+def _odczytaj(b, klucz):
+    try:
+        dane = b.odczytaj(klucz)
+        return _BRAK if dane is None else pickle.loads(dane)
+    except Exception:
+        return _BRAK
+
+
+def _zapisz(b, klucz, wartosc, ttl):
+    try:
+        b.zapisz(klucz, pickle.dumps(wartosc, protocol=pickle.HIGHEST_PROTOCOL), float(ttl))
+    except Exception:
+        pass
+
+
+def _zablokuj(b, klucz) -> bool:
+    try:
+        return b.zablokuj(klucz, _WLASCICIEL + f"-{threading.get_ident()}", CZAS_BLOKADY)
+    except Exception:
+        # Backend niedostępny — pobieramy sami (bez single-flight, ale bez blokowania)
+        return True
+
+
+def _odblokuj(b, klucz):
+    try:
+        b.odblokuj(klucz, _WLASCICIEL + f"-{threading.get_ident()}")
+    except Exception:
+        pass
@@ -0,0 +1,93 @@
+# =============================================================================
+# single_flight.py — Łączenie jednoczesnych identycznych pobrań (w procesie)
+# Gdy wiele sesji naraz nie trafi w cache (otwarcie giełdy, wygaśnięcie TTL),
+# pierwsza wykonuje zapytanie, a pozostałe czekają na jego wynik.
+# =============================================================================
+
+import copy
+import functools
+import threading
+
+_w_locie = {}          # {klucz: _Lot} — trwające pobrania
+_lock = threading.Lock()
+_dolaczone = 0         # licznik wywołań obsłużonych cudzym wynikiem (diagnostyka)
+
+
+class _Lot:
+    __slots__ = ("zdarzenie", "wynik", "wyjatek", "zakonczony")
+
+    def __init__(self):
+        self.zdarzenie = threading.Event()
+        self.wynik = None
+        self.wyjatek = None
+        self.zakonczony = False    # False po zdarzeniu — lider przerwany, bez wyniku
+
+
+def wspolnie(klucz, fn):
+    """
+    fn() wykonywane raz dla wszystkich jednoczesnych wywołań z tym samym kluczem.
+    Czekający dostają kopię wyniku (albo ten sam wyjątek). Bez cache — po
+    zakończeniu pobrania kolejne wywołanie znów uruchamia fn().
+    Gdy lidera przerwie BaseException (StopException / RerunException Streamlit
+    przy zatrzymaniu albo rerunie jego sesji), czekający ponawiają pobranie sami.
+    """
+    global _dolaczone
+    with _lock:
+        lot = _w_locie.get(klucz)
+        lider = lot is None
+        if lider:
+            lot = _w_locie[klucz] = _Lot()
+        else:
+            _dolaczone += 1
+    if not lider:
+        lot.zdarzenie.wait()
+        if not lot.zakonczony:
+            return wspolnie(klucz, fn)
+        if lot.wyjatek is not None:
+            raise lot.wyjatek
+        # Kopia — wynik (np. DataFrame) nie może być współdzielony między sesjami
+        return copy.deepcopy(lot.wynik)
+    try:
+        lot.wynik = fn()
+        lot.zakonczony = True
+        return lot.wynik
+    except Exception as e:
+        lot.wyjatek = e
+        lot.zakonczony = True
+        raise
+    finally:
+        with _lock:
+            _w_locie.pop(klucz, None)
+        lot.zdarzenie.set()
+
+
+def jeden_lot(fn):
+    """
+    Dekorator: jednoczesne wywołania fn z tymi samymi argumentami łączone w jedno.
+    Stosowany pod @st.cache_data — cache Streamlit nie łączy równoległych chybień.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        klucz = (fn.__module__, fn.__qualname__, _hashowalny(args), _hashowalny(kwargs))
+        return wspolnie(klucz, lambda: fn(*args, **kwargs))
+    return wrapper
+
+
+def _hashowalny(wartosc):
+    """Argumenty → klucz słownika (listy i słowniki jako krotki)."""
+    if isinstance(wartosc, dict):
+        return tuple(sorted((k, _hashowalny(v)) for k, v in wartosc.items()))
+    if isinstance(wartosc, (list, tuple, set, frozenset)):
+        elementy = tuple(_hashowalny(v) for v in wartosc)
+        return tuple(sorted(elementy, key=repr)) if isinstance(wartosc, (set, frozenset)) else elementy
+    try:
+        hash(wartosc)
+        return wartosc
+    except TypeError:
+        return repr(wartosc)
+
+
+def dolaczone() -> int:
+    """Ile wywołań od startu procesu dostało wynik cudzego, trwającego pobrania."""
+    with _lock:
+        return _dolaczone
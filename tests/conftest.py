@@ -0,0 +1,49 @@
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_firestore
+
+
+@pytest.fixture
+def fc(monkeypatch):
+    """firebase_config na fake Firestore: pusty session_state, transakcje z fake_firestore."""
+    for modul in ("streamlit", "firebase_admin", "requests"):
+        pytest.importorskip(modul)
+    import firebase_config
+
+    monkeypatch.setattr(firebase_config, "st", types.SimpleNamespace(session_state={}))
+    monkeypatch.setattr(firebase_config.firestore, "transactional", fake_firestore.transactional)
+    for uid in list(firebase_config._lustra):
+        firebase_config.zatrzymaj_lustro(uid)
+    firebase_config._wznowieni.clear()
+    yield firebase_config
+    for uid in list(firebase_config._lustra):
+        firebase_config.zatrzymaj_lustro(uid)
+
+
+@pytest.fixture
+def db():
+    return fake_firestore.FakeFirestore()
+
+
+class Zegar:
+    """Zamiennik modułu time dla modułów z TTL: time() zwraca `teraz`, przesun() je zmienia."""
+
+    def __init__(self, teraz=1_700_000_000.0):
+        self.teraz = teraz
+
+    def time(self):
+        return self.teraz
+
+    def przesun(self, sekundy):
+        self.teraz += sekundy
+
+
+@pytest.fixture
+def zegar():
+    return Zegar()
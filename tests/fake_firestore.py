@@ -0,0 +1,215 @@
+# =============================================================================
+# fake_firestore.py — Firestore w pamięci do testów (bez emulatora i sieci)
+# Tylko to, czego używa firebase_config: dokumenty, kolekcje, zapytania
+# where/order_by, WriteBatch, transakcje i listenery on_snapshot.
+# Transaction.get jak w google-cloud-firestore: tylko DocumentReference albo Query.
+# =============================================================================
+
+import copy
+import itertools
+
+_auto_id = itertools.count(1)
+
+
+class NotFound(Exception):
+    """Odpowiednik google.api_core.exceptions.NotFound."""
+
+
+class Snapshot:
+    def __init__(self, ref, dane):
+        self.reference = ref
+        self.id = ref.id
+        self.exists = dane is not None
+        self._dane = copy.deepcopy(dane)
+
+    def to_dict(self):
+        return copy.deepcopy(self._dane) if self.exists else None
+
+
+class Watch:
+    def __init__(self, db, sciezka, callback):
+        self._db = db
+        self.sciezka = sciezka
+        self.callback = callback
+        self.aktywny = True
+
+    def unsubscribe(self):
+        self.aktywny = False
+        self._db.nasluchy.discard(self)
+
+
+class Query:
+    def __init__(self, kolekcja, filtry=(), kolejnosc=None):
+        self._kolekcja = kolekcja
+        self._filtry = tuple(filtry)
+        self._kolejnosc = kolejnosc
+
+    def where(self, pole, op, wartosc):
+        assert op == "==", "fake obsługuje tylko =="
+        return Query(self._kolekcja, self._filtry + ((pole, wartosc),), self._kolejnosc)
+
+    def order_by(self, pole):
+        return Query(self._kolekcja, self._filtry, pole)
+
+    def stream(self):
+        snapy = [s for s in self._kolekcja._snapy()
+                 if all(s.to_dict().get(p) == w for p, w in self._filtry)]
+        if self._kolejnosc:
+            # Jak w Firestore: dokumenty bez pola sortowania nie trafiają do wyniku
+            snapy = sorted((s for s in snapy if self._kolejnosc in s.to_dict()),
+                           key=lambda s: (s.to_dict()[self._kolejnosc], s.id))
+        return iter(snapy)
+
+
+class CollectionReference:
+    """Celowo NIE dziedziczy po Query — tak jak w google-cloud-firestore."""
+
+    def __init__(self, db, sciezka):
+        self._db = db
+        self.sciezka = sciezka
+        self.id = sciezka[-1]
+
+    def document(self, doc_id=None):
+        return DocumentReference(self._db, self.sciezka + (doc_id or f"auto{next(_auto_id)}",))
+
+    def where(self, pole, op, wartosc):
+        return Query(self).where(pole, op, wartosc)
+
+    def order_by(self, pole):
+        return Query(self).order_by(pole)
+
+    def stream(self):
+        return Query(self).stream()
+
+    def list_documents(self, page_size=None):
+        return [s.reference for s in self._snapy()]
+
+    def on_snapshot(self, callback):
+        watch = Watch(self._db, self.sciezka, callback)
+        self._db.nasluchy.add(watch)
+        self._db.powiadom(watch)
+        return watch
+
+    def _snapy(self):
+        n = len(self.sciezka) + 1
+        return [Snapshot(DocumentReference(self._db, s), d) for s, d in sorted(self._db.dokumenty.items())
+                if len(s) == n and s[:-1] == self.sciezka]
+
+
+class DocumentReference:
+    def __init__(self, db, sciezka):
+        self._db = db
+        self.sciezka = sciezka
+        self.id = sciezka[-1]
+
+    @property
+    def parent(self):
+        return CollectionReference(self._db, self.sciezka[:-1])
+
+    def collection(self, nazwa):
+        return CollectionReference(self._db, self.sciezka + (nazwa,))
+
+    def get(self, transaction=None):
+        if transaction is not None:
+            transaction._odczyt()
+        return Snapshot(self, self._db.dokumenty.get(self.sciezka))
+
+    def set(self, dane, merge=False):
+        self._db.zapisz([("set", self, dane, merge)])
+
+    def update(self, dane):
+        if self.sciezka not in self._db.dokumenty:
+            raise NotFound(f"No document to update: {'/'.join(self.sciezka)}")
+        self._db.zapisz([("set", self, dane, True)])
+
+    def delete(self):
+        self._db.zapisz([("delete", self, None, False)])
+
+
+class WriteBatch:
+    def __init__(self, db):
+        self._db = db
+        self._operacje = []
+
+    def set(self, ref, dane, merge=False):
+        self._operacje.append(("set", ref, dane, merge))
+
+    def delete(self, ref):
+        self._operacje.append(("delete", ref, None, False))
+
+    def commit(self):
+        self._db.zapisz(self._operacje)
+        self._operacje = []
+
+
+class Transaction(WriteBatch):
+    """Odczyty przed zapisami, zapisy widoczne dopiero po commit()."""
+
+    def _odczyt(self):
+        if self._operacje:
+            raise RuntimeError("Firestore transactions require all reads to be executed before all writes.")
+
+    def get(self, ref_or_query):
+        self._odczyt()
+        if isinstance(ref_or_query, DocumentReference):
+            return iter([ref_or_query.get()])
+        if isinstance(ref_or_query, Query):
+            return ref_or_query.stream()
+        raise ValueError('Value for argument "ref_or_query" must be a DocumentReference or a Query.')
+
+
+def transactional(fn):
+    """Zamiennik firestore.transactional: wywołanie fn(transaction), potem commit."""
+    def wrapper(transaction, *args, **kwargs):
+        wynik = fn(transaction, *args, **kwargs)
+        transaction.commit()
+        return wynik
+    return wrapper
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.dokumenty = {}        # {ścieżka (krotka): dict}
+        self.nasluchy = set()      # aktywne Watch
+        self.wstrzymane = False    # True — snapshoty czekają na dostarcz() (opóźnienie sieci)
+        self._zalegle = []
+
+    def collection(self, nazwa):
+        return CollectionReference(self, (nazwa,))
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def transaction(self):
+        return Transaction(self)
+
+    def get_all(self, refs):
+        return [ref.get() for ref in refs]
+
+    def zapisz(self, operacje):
+        dotkniete = set()
+        for rodzaj, ref, dane, merge in operacje:
+            if rodzaj == "delete":
+                self.dokumenty.pop(ref.sciezka, None)
+            elif merge and ref.sciezka in self.dokumenty:
+                self.dokumenty[ref.sciezka] = {**self.dokumenty[ref.sciezka], **copy.deepcopy(dane)}
+            else:
+                self.dokumenty[ref.sciezka] = copy.deepcopy(dane)
+            dotkniete.add(ref.sciezka[:-1])
+        for watch in list(self.nasluchy):
+            if watch.sciezka in dotkniete:
+                self.powiadom(watch)
+
+    def powiadom(self, watch):
+        if self.wstrzymane:
+            self._zalegle.append(watch)
+            return
+        if watch.aktywny:
+            watch.callback(CollectionReference(self, watch.sciezka)._snapy(), [], None)
+
+    def dostarcz(self):
+        """Dostarcza wstrzymane snapshoty (stan z chwili dostarczenia, jak Watch)."""
+        self.wstrzymane = False
+        zalegle, self._zalegle = self._zalegle, []
+        for watch in dict.fromkeys(zalegle):
+            self.powiadom(watch)
@@ -0,0 +1,59 @@
+"""Składanie świec grubszych interwałów z bazy (candles.agreguj / swiece) kontra resample pandas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import candles
+
+AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def _baza(n, czestotliwosc, ziarno=0):
+    rng = np.random.default_rng(ziarno)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    indeks = pd.date_range("2024-01-03 09:30", periods=n, freq=czestotliwosc)
+    return pd.DataFrame({"Open": close + rng.normal(0, 0.2, n), "High": close + 1, "Low": close - 1,
+                         "Close": close, "Volume": rng.integers(1, 100, n).astype(float)}, index=indeks)
+
+
+def _resample(df, regula):
+    if regula == "W":
+        wynik = df.resample("W-MON", label="left", closed="left").agg(AGG)
+    elif regula == "M":
+        wynik = df.resample("MS").agg(AGG)
+    elif isinstance(pd.tseries.frequencies.to_offset(regula), pd.offsets.Tick):
+        wynik = df.resample(regula, origin="epoch").agg(AGG)
+    else:
+        wynik = df.resample(regula).agg(AGG)
+    return wynik.dropna(subset=["Close"])
+
+
+@pytest.mark.parametrize("interwal, czestotliwosc", [
+    ("30m", "15min"), ("2h", "1h"), ("4h", "1h"), ("12h", "1h"),
+    ("3D", "1D"), ("5D", "1D"), ("1W", "1D"), ("1M", "1D"),
+])
+def test_agregacja_jak_resample(interwal, czestotliwosc):
+    df = _baza(1500, czestotliwosc)
+    df = df[df.index.dayofweek < 5] if czestotliwosc == "1D" else df       # luki weekendowe akcji
+    regula = candles.INTERWALY[interwal][1]
+    wynik = candles.agreguj(df, regula)
+    wzorzec = _resample(df, regula)
+    pd.testing.assert_frame_equal(wynik, wzorzec, check_freq=False, check_names=False)
+
+
+def test_kubelki_niezalezne_od_poczatku_danych():
+    df = _baza(400, "1D")
+    pelne = candles.swiece(df, "5D", od="2024-06-01")
+    przyciete = candles.swiece(df.iloc[3:], "5D", od="2024-06-01")
+    pd.testing.assert_frame_equal(pelne, przyciete)
+    assert pelne.index[0] >= pd.Timestamp("2024-06-01")
+
+
+def test_swiece_bazowe_bez_agregacji_i_brakujace_zamkniecie():
+    df = _baza(100, "1h")
+    assert candles.swiece(df, "1h") is df
+    df.iloc[5, df.columns.get_loc("Close")] = np.nan      # niepełna świeca z Yahoo
+    wynik = candles.agreguj(df, "4h")
+    assert not wynik["Close"].isna().any()
+    assert candles.baza("4h") == "1h" and candles.baza("1W") == "1d"
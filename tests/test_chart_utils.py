@@ -0,0 +1,102 @@
+"""Próbkowanie serii do wykresów (chart_utils): LTTB, agregacja świec i słupków."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import chart_utils
+
+
+def _seria(n, ziarno=0):
+    rng = np.random.default_rng(ziarno)
+    return pd.Series(np.cumsum(rng.normal(0, 1, n)), index=pd.date_range("2020-01-01", periods=n, freq="h"))
+
+
+def _lttb_referencyjne(x, y, n):
+    """LTTB krok po kroku (Steinarsson, 2013) — wzorzec dla wersji wektorowej."""
+    dl = len(y)
+    granice = (np.arange(n - 1) * ((dl - 2) / (n - 2))).astype(np.int64) + 1
+    granice[-1] = dl - 1
+    wybrane, a = [0], 0
+    for i in range(n - 2):
+        s, e = granice[i], granice[i + 1]
+        ns, ne = (granice[i + 1], granice[i + 2]) if i + 2 < len(granice) else (dl - 1, dl)
+        cx, cy = x[ns:ne].mean(), y[ns:ne].mean()
+        pole = np.abs((x[a] - cx) * (y[s:e] - y[a]) - (x[a] - x[s:e]) * (cy - y[a]))
+        a = s + int(np.argmax(pole))
+        wybrane.append(a)
+    return np.array(wybrane + [dl - 1])
+
+
+@pytest.mark.parametrize("n, maks", [(5000, 500), (100_000, 2000), (3001, 1500)])
+def test_lttb_zgodne_z_referencja(n, maks):
+    y = _seria(n).to_numpy()
+    x = np.arange(n, dtype=np.float64)
+    np.testing.assert_array_equal(chart_utils.lttb_indeksy(x, y, maks), _lttb_referencyjne(x, y, maks))
+
+
+def test_linia_budzet_i_skrajne_punkty():
+    seria = _seria(50_000)
+    wynik = chart_utils.linia(seria, 1000)
+    assert len(wynik) <= 1002                       # LTTB + ewentualnie min i max
+    assert wynik.index.is_monotonic_increasing
+    assert wynik.iloc[0] == seria.iloc[0] and wynik.iloc[-1] == seria.iloc[-1]
+    assert wynik.max() == seria.max() and wynik.min() == seria.min()
+
+
+def test_linia_krotka_albo_bez_probkowania():
+    seria = _seria(500)
+    assert chart_utils.linia(seria, 1000) is seria
+    assert chart_utils.linia(_seria(5000), None).size == 5000
+
+
+def test_linia_pomija_nan_rozgrzewki():
+    seria = _seria(5000)
+    seria.iloc[:199] = np.nan                       # np. SMA 200
+    wynik = chart_utils.linia(seria, 500)
+    assert not wynik.isna().any() and wynik.index[0] == seria.index[199]
+
+
+def _ohlcv(n):
+    close = _seria(n).to_numpy() + 100
+    return pd.DataFrame({"Open": close - 0.5, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.arange(n, dtype=float)}, index=pd.date_range("2020-01-01", periods=n, freq="h"))
+
+
+def test_swiece_agregacja_ohlc():
+    df = _ohlcv(2500)
+    wynik = chart_utils.swiece(df, 1000)
+    k = 3                                           # ceil(2500 / 1000) świec w kubełku
+    assert len(wynik) == 834 and len(wynik) <= 1000
+    kubelek = df.iloc[k:2 * k]
+    pierwszy = wynik.iloc[1]
+    assert wynik.index[1] == kubelek.index[0]
+    assert pierwszy["Open"] == kubelek["Open"].iloc[0] and pierwszy["Close"] == kubelek["Close"].iloc[-1]
+    assert pierwszy["High"] == kubelek["High"].max() and pierwszy["Low"] == kubelek["Low"].min()
+    assert pierwszy["Volume"] == kubelek["Volume"].sum()
+    # Ostatni, niepełny kubełek (1 świeca) i zakres całości bez zmian
+    assert wynik["Close"].iloc[-1] == df["Close"].iloc[-1]
+    assert wynik["High"].max() == df["High"].max() and wynik["Low"].min() == df["Low"].min()
+    assert wynik["Volume"].sum() == df["Volume"].sum()
+
+
+def test_swiece_bez_wolumenu_i_krotkie():
+    df = _ohlcv(300)
+    assert chart_utils.swiece(df, 1000) is df
+    wynik = chart_utils.swiece(df.drop(columns="Volume"), 100)
+    assert list(wynik.columns) == ["Open", "High", "Low", "Close"] and len(wynik) == 100
+
+
+def test_slupki_najwiekszy_modul_w_kubelku():
+    wartosci = np.array([1.0, -5.0, 2.0, 3.0, np.nan, -1.0, 0.5])
+    seria = pd.Series(wartosci)
+    wynik = chart_utils.slupki(seria, 3)            # kubełki po 3: [1,-5,2] [3,nan,-1] [0.5]
+    assert wynik.tolist() == [-5.0, 3.0, 0.5]
+    assert wynik.index.tolist() == [1, 3, 6]
+
+
+def test_slupki_budzet():
+    seria = _seria(10_001)
+    wynik = chart_utils.slupki(seria, 1000)
+    assert len(wynik) <= 1000
+    assert wynik.abs().max() == seria.abs().max()
@@ -0,0 +1,76 @@
+"""Negatywny cache symboli i bezpiecznik Yahoo (circuit_breaker) na sztucznym zegarze."""
+
+import pytest
+
+import circuit_breaker as cb
+
+
+@pytest.fixture(autouse=True)
+def czysty_stan(monkeypatch, zegar):
+    monkeypatch.setattr(cb, "time", zegar)
+    monkeypatch.setattr(cb, "_symbole", {})
+    monkeypatch.setattr(cb, "_wyniki", [])
+    monkeypatch.setattr(cb, "_otwarty_do", 0.0)
+    monkeypatch.setattr(cb, "_proba_od", 0.0)
+
+
+def _otworz():
+    for _ in range(cb.PROG_BLEDOW):
+        cb.porazka()
+    assert cb.otwarty() == cb.PRZERWA
+
+
+def test_backoff_symbolu_wykladniczy(zegar):
+    cb.porazka("ZLY", awaria=False)
+    assert cb.zablokowany("ZLY") and not cb.zablokowany("AAPL")
+    zegar.przesun(cb.BACKOFF_BAZA)
+    assert cb.dozwolone("ZLY")
+    cb.porazka("ZLY", awaria=False)
+    zegar.przesun(cb.BACKOFF_BAZA)
+    assert cb.zablokowany("ZLY")                    # drugi błąd — 2 × BACKOFF_BAZA
+    zegar.przesun(cb.BACKOFF_BAZA)
+    assert not cb.zablokowany("ZLY")
+    # Pusta odpowiedź to nie awaria Yahoo — bezpiecznik zamknięty
+    assert cb.otwarty() == 0
+
+
+def test_seria_bledow_otwiera_bezpiecznik():
+    for _ in range(cb.PROG_BLEDOW - 1):
+        cb.porazka()
+    assert cb.otwarty() == 0
+    cb.porazka()
+    assert cb.otwarty() == cb.PRZERWA
+    assert not cb.dozwolone() and cb.zablokowany("AAPL")
+    with pytest.raises(cb.YahooNiedostepne):
+        cb.wywolaj("AAPL", lambda: 1)
+
+
+def test_polotwarty_jedna_proba_sukces_zamyka(zegar):
+    _otworz()
+    zegar.przesun(cb.PRZERWA)
+    assert not cb.zablokowany()                     # podgląd nie zajmuje próby
+    assert cb.dozwolone("AAPL")                     # próba kontrolna przepuszczona...
+    assert not cb.dozwolone("MSFT")                 # ...ale tylko jedna
+    assert cb.zablokowany("MSFT")
+    cb.sukces("AAPL")
+    assert cb.otwarty() == 0
+    assert cb.dozwolone("MSFT") and cb.dozwolone("NVDA")
+
+
+def test_polotwarty_nieudana_proba_otwiera_ponownie(zegar):
+    _otworz()
+    zegar.przesun(cb.PRZERWA)
+    assert cb.dozwolone()
+    cb.porazka()                                    # jeden błąd próby wystarcza
+    assert cb.otwarty() == cb.PRZERWA
+    assert not cb.dozwolone()
+
+
+def test_proba_bez_wyniku_wygasa(zegar):
+    _otworz()
+    zegar.przesun(cb.PRZERWA)
+    assert cb.dozwolone()                           # próba, której wątek przerwano
+    zegar.przesun(cb.PRZERWA - 1)
+    assert not cb.dozwolone()
+    zegar.przesun(1)
+    assert cb.dozwolone()                           # następna próba kontrolna
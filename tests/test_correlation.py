@@ -0,0 +1,49 @@
+"""Silnik korelacji: zgodność z pandas i cache per (uniwersum, okno)."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlation
+
+
+@pytest.fixture(autouse=True)
+def pusty_cache():
+    correlation._cache.clear()
+
+
+def _ceny(n=120, symbole="ABCDE", ziarno=0):
+    rng = np.random.default_rng(ziarno)
+    zwroty = rng.normal(0, 0.01, (n, len(symbole)))
+    zwroty[:, 1] += zwroty[:, 0]                      # B skorelowane z A
+    return pd.DataFrame(100 * np.exp(np.cumsum(zwroty, axis=0)), columns=list(symbole),
+                        index=pd.date_range("2024-01-01", periods=n))
+
+
+def test_zgodnosc_z_pandas():
+    ceny = _ceny()
+    wzorzec = np.log(ceny).diff().corr()
+    assert np.allclose(correlation.macierz_korelacji(ceny).to_numpy(), wzorzec.to_numpy(), atol=1e-5)
+
+
+def test_korekta_wczesniejszej_historii_zmienia_klucz():
+    ceny = _ceny()
+    przed = correlation.macierz_korelacji(ceny)
+    # Dywidenda przelicza starsze zamknięcia A — ogon (ostatnie wiersze) bez zmian
+    skorygowane = ceny.copy()
+    skorygowane.iloc[:60, 0] *= np.linspace(0.8, 1.0, 60)
+    assert correlation.hash_uniwersum(skorygowane) != correlation.hash_uniwersum(ceny)
+    po = correlation.macierz_korelacji(skorygowane)
+    assert not np.allclose(przed.to_numpy(), po.to_numpy())
+
+
+def test_korelacja_z_portfelem_cache_per_wagi():
+    ceny = _ceny()
+    a = correlation.korelacja_z_portfelem(ceny, {"A": 1.0, "B": 2.0})
+    b = correlation.korelacja_z_portfelem(ceny, {"B": 2.0, "A": 1.0})
+    assert len(correlation._cache) == 1 and a.equals(b)
+    correlation.korelacja_z_portfelem(ceny, {"A": 1.0})
+    assert len(correlation._cache) == 2
+    # Wynik z cache to kopia — modyfikacja nie psuje wpisu
+    a.iloc[0] = 5.0
+    assert correlation.korelacja_z_portfelem(ceny, {"A": 1.0, "B": 2.0}).iloc[0] != 5.0
@@ -0,0 +1,28 @@
+"""Pula fetch_executor: kolejność wyników, błędy elementów, kontekst Streamlit wątków puli."""
+
+import threading
+
+import fetch_executor
+
+
+def _ctx_watku(_):
+    return getattr(threading.current_thread(), fetch_executor._ATRYBUT_CTX, None)
+
+
+def test_kolejnosc_i_domyslna():
+    def fn(x):
+        if x == 3:
+            raise ValueError(x)
+        return x * 10
+    assert fetch_executor.rownolegle(fn, range(6), domyslna=-1) == [0, 10, 20, -1, 40, 50]
+
+
+def test_ctx_sesji_nie_zostaje_w_watkach_puli(monkeypatch):
+    sesja = object()
+    monkeypatch.setattr(fetch_executor, "get_script_run_ctx", lambda: sesja)
+    n = 4 * fetch_executor.MAX_WORKERS
+    assert fetch_executor.rownolegle(_ctx_watku, range(n)) == [sesja] * n
+
+    # Następne zadania bez ctx (wątek tła) — żaden wątek puli nie ma ctx poprzedniej sesji
+    monkeypatch.setattr(fetch_executor, "get_script_run_ctx", lambda: None)
+    assert fetch_executor.rownolegle(_ctx_watku, range(n)) == [None] * n
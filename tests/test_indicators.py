@@ -0,0 +1,118 @@
+"""Wskaźniki: strumienie przyrostowe kontra pełne przeliczenie oraz cache wyników (oblicz)."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators
+
+WSZYSTKIE = list(indicators.REJESTR)
+# Rolling — zgodne z pełnym przeliczeniem także w przesuwanym oknie; EWM — tylko w rosnącym
+ROLLING = ["SMA 20", "SMA 50", "Bollinger Bands", "RSI"]
+
+
+@pytest.fixture(autouse=True)
+def czyste_cache():
+    indicators._cache.clear()
+    indicators._strumienie.clear()
+
+
+def _swiece(n, ziarno=0):
+    rng = np.random.default_rng(ziarno)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": 1.0}, index=pd.date_range("2024-01-01", periods=n, freq="15min"))
+
+
+def _pelne(df, wybrane):
+    wynik = {}
+    for nazwa in wybrane:
+        fn, parametry = indicators.REJESTR[nazwa]
+        wynik.update(fn(df, **parametry))
+    return wynik
+
+
+def _zgodne(a, b, atol=1e-9):
+    assert set(a) == set(b)
+    for n in a:
+        assert a[n].index.equals(b[n].index), n
+        np.testing.assert_allclose(a[n].to_numpy(), b[n].to_numpy(), atol=atol, equal_nan=True, err_msg=n)
+
+
+def test_rosnace_swiece_jak_pelne_przeliczenie():
+    df = _swiece(600)
+    for koniec in range(400, 601, 7):
+        okno = df.iloc[:koniec]
+        _zgodne(indicators.oblicz(okno, WSZYSTKIE, "BTC-USDT", "15m"), _pelne(okno, WSZYSTKIE))
+    assert len(indicators._strumienie) == len(WSZYSTKIE)   # liczone przyrostowo, nie od nowa
+
+
+def test_przesuwane_okno_rolling_jak_pelne_przeliczenie():
+    df = _swiece(700)
+    for start in range(0, 200, 9):
+        okno = df.iloc[start:start + 300]
+        wynik = indicators.oblicz(okno, ROLLING, "BTC-USDT", "15m")
+        # Rozgrzewka (NaN na początku okna) jak w pandas, dalej te same wartości
+        _zgodne(wynik, _pelne(okno, ROLLING))
+
+
+def test_przesuwane_okno_ewm_zbiega_do_pelnego():
+    df = _swiece(1500)
+    for start in range(0, 600, 50):
+        okno = df.iloc[start:start + 900]
+        wynik = indicators.oblicz(okno, ["EMA 12", "MACD"], "BTC-USDT", "15m")
+        pelne = _pelne(okno, ["EMA 12", "MACD"])
+        # Różnica tylko na początku okna (waga (1-α)^N) — ogon zgodny
+        for n in wynik:
+            np.testing.assert_allclose(wynik[n].to_numpy()[300:], pelne[n].to_numpy()[300:], atol=1e-9)
+
+
+def test_skorygowana_swieca_liczy_od_nowa():
+    df = _swiece(300)
+    indicators.oblicz(df.iloc[:250], ["SMA 20"], "X", "1h")
+    zmienione = df.copy()
+    zmienione.iloc[248, zmienione.columns.get_loc("Close")] *= 1.05
+    _zgodne(indicators.oblicz(zmienione, ["SMA 20"], "X", "1h"), _pelne(zmienione, ["SMA 20"]))
+
+
+def _liczacy(monkeypatch):
+    """Wskaźnik spoza PRZYROSTOWE zapisujący każde przeliczenie."""
+    wywolania = []
+
+    def fn(df, okres):
+        wywolania.append(len(df))
+        return {"Licznik": df["Close"].rolling(okres).max()}
+    monkeypatch.setitem(indicators.REJESTR, "Licznik", (fn, {"okres": 5}))
+    return wywolania
+
+
+def test_cache_te_same_swiece_bez_przeliczenia(monkeypatch):
+    wywolania = _liczacy(monkeypatch)
+    df = _swiece(200)
+    pierwszy = indicators.oblicz(df, ["Licznik"], "X", "1h")
+    drugi = indicators.oblicz(df.copy(), ["Licznik"], "X", "1h")    # rerun Streamlit — nowa kopia tych samych świec
+    assert wywolania == [200]
+    assert drugi["Licznik"] is pierwszy["Licznik"]
+    # Inny interwał to inny klucz
+    indicators.oblicz(df, ["Licznik"], "X", "4h")
+    assert wywolania == [200, 200]
+
+
+def test_cache_tylko_wybrane_wskazniki(monkeypatch):
+    wywolania = _liczacy(monkeypatch)
+    wynik = indicators.oblicz(_swiece(100), ["SMA 20", "RSI"], "X", "1h")
+    assert set(wynik) == {"SMA 20", "RSI"}
+    assert wywolania == []
+    assert {klucz[3] for klucz in indicators._cache} == {"SMA 20", "RSI"}
+
+
+def test_cache_zmieniona_swieca_nowy_klucz(monkeypatch):
+    wywolania = _liczacy(monkeypatch)
+    df = _swiece(100)
+    zmienione = df.copy()
+    zmienione.iloc[-1, zmienione.columns.get_loc("Volume")] = 2.0
+    assert indicators.odcisk_swiec(df) == indicators.odcisk_swiec(df.copy())
+    assert indicators.odcisk_swiec(df) != indicators.odcisk_swiec(zmienione)
+    indicators.oblicz(df, ["Licznik"], "X", "1h")
+    indicators.oblicz(zmienione, ["Licznik"], "X", "1h")
+    assert wywolania == [100, 100]
@@ -0,0 +1,83 @@
+"""Magazyn metadanych instrumentów (instrument_meta): TTL pełnych i pustych odpowiedzi."""
+
+import pytest
+
+pytest.importorskip("requests")
+import circuit_breaker  # noqa: E402
+import instrument_meta  # noqa: E402
+
+PELNE = {"shortName": "Apple Inc.", "sector": "Technology", "quoteType": "EQUITY"}
+
+
+class Dostawca:
+    def __init__(self, odpowiedzi):
+        self.odpowiedzi = odpowiedzi    # {symbol: dict | Exception}
+        self.wywolania = []
+
+    def info(self, symbol):
+        self.wywolania.append(symbol)
+        wynik = self.odpowiedzi.get(symbol, {})
+        if isinstance(wynik, Exception):
+            raise wynik
+        return dict(wynik)
+
+
+@pytest.fixture
+def yahoo(monkeypatch, tmp_path, zegar):
+    for modul in (instrument_meta, circuit_breaker):
+        monkeypatch.setattr(modul, "time", zegar)
+    monkeypatch.setattr(circuit_breaker, "_symbole", {})
+    monkeypatch.setattr(circuit_breaker, "_wyniki", [])
+    monkeypatch.setattr(circuit_breaker, "_otwarty_do", 0.0)
+    monkeypatch.setattr(circuit_breaker, "_proba_od", 0.0)
+    monkeypatch.setattr(instrument_meta, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(instrument_meta, "META_PATH", str(tmp_path / "instruments.sqlite"))
+    monkeypatch.setattr(instrument_meta, "_schemat_gotowy", False)
+    monkeypatch.setattr(instrument_meta, "_pamiec", {})
+    dostawca = Dostawca({"AAPL": PELNE})
+    monkeypatch.setattr(instrument_meta, "dostawca", lambda: dostawca)
+    return dostawca
+
+
+def test_pelne_info_do_konca_ttl(yahoo, zegar):
+    assert instrument_meta.nazwa("AAPL") == "Apple Inc."
+    zegar.przesun(instrument_meta.TTL_METADANYCH - 1)
+    assert instrument_meta.sektor("AAPL") == "Technology"
+    assert yahoo.wywolania == ["AAPL"]
+    zegar.przesun(1)
+    instrument_meta.info("AAPL")
+    assert yahoo.wywolania == ["AAPL", "AAPL"]
+
+
+def test_pusta_odpowiedz_krotszy_ttl(yahoo, zegar):
+    assert instrument_meta.info("NOWY") == {}
+    zegar.przesun(instrument_meta.TTL_PUSTYCH - 1)
+    assert instrument_meta.info("NOWY") == {}
+    assert yahoo.wywolania == ["NOWY"]
+
+    # Po TTL_PUSTYCH (a nie TTL_METADANYCH) ponowna próba — symbol zaczął być notowany
+    yahoo.odpowiedzi["NOWY"] = PELNE
+    zegar.przesun(1)
+    assert instrument_meta.typ("NOWY") == "EQUITY"
+    assert yahoo.wywolania == ["NOWY", "NOWY"]
+
+
+def test_pusta_odpowiedz_nie_nadpisuje_znanych_danych(yahoo, zegar):
+    instrument_meta.info("AAPL")
+    yahoo.odpowiedzi["AAPL"] = {"trailingPegRatio": None}      # .info bez treści
+    zegar.przesun(instrument_meta.TTL_METADANYCH)
+    assert instrument_meta.nazwa("AAPL") == "Apple Inc."
+
+
+def test_blad_dostawcy_zwraca_ostatnie_dane(yahoo, zegar):
+    instrument_meta.info("AAPL")
+    yahoo.odpowiedzi["AAPL"] = ConnectionError("timeout")
+    zegar.przesun(instrument_meta.TTL_METADANYCH)
+    assert instrument_meta.nazwa("AAPL") == "Apple Inc."
+
+
+def test_dane_z_dysku_po_restarcie(yahoo, monkeypatch):
+    instrument_meta.info("AAPL")
+    monkeypatch.setattr(instrument_meta, "_pamiec", {})          # nowy proces, ten sam plik
+    assert instrument_meta.nazwa("AAPL") == "Apple Inc."
+    assert yahoo.wywolania == ["AAPL"]
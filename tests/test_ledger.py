@@ -0,0 +1,66 @@
+"""Księga przyrostowa (KsiegaPrzyrostowa.aktualizuj) kontra pełne przeliczenie oblicz_szereg_z_cen."""
+
+import numpy as np
+import pandas as pd
+
+from ledger import KsiegaPrzyrostowa, oblicz_szereg_z_cen, przygotuj_transakcje
+
+TRANSAKCJE = [
+    {"ticker": "AAPL", "typ": "Kupno", "ilosc": 10, "cena_zakupu": 100.0, "data": "2024-01-02"},
+    {"ticker": "MSFT", "typ": "Kupno", "ilosc": 5, "cena_zakupu": 300.0, "data": "2024-01-05"},
+    {"ticker": "AAPL", "typ": "Sprzedaż", "ilosc": 4, "cena_zakupu": 110.0, "data": "2024-01-20"},
+    {"ticker": "AAPL", "typ": "Kupno", "ilosc": 2, "cena_zakupu": 95.0, "data": "2024-02-01"},
+    {"ticker": "MSFT", "typ": "Sprzedaż", "ilosc": 50, "cena_zakupu": 320.0, "data": "2024-02-10"},  # ponad stan
+]
+
+
+def _ceny(dni, ziarno=0):
+    rng = np.random.default_rng(ziarno)
+    indeks = pd.date_range("2024-01-01", periods=dni, freq="D")
+    return pd.DataFrame({"AAPL": 100 + np.cumsum(rng.normal(0, 1, dni)),
+                         "MSFT": 300 + np.cumsum(rng.normal(0, 2, dni))}, index=indeks)
+
+
+def _zgodne(ksiega, transakcje, ceny):
+    df_tx = przygotuj_transakcje(transakcje)
+    pd.testing.assert_frame_equal(ksiega.aktualizuj(df_tx, ceny), oblicz_szereg_z_cen(df_tx, ceny))
+
+
+def test_nowe_dni_notowan_tylko_ogon():
+    ksiega = KsiegaPrzyrostowa()
+    ceny = _ceny(80)
+    _zgodne(ksiega, TRANSAKCJE, ceny.iloc[:60])
+    _zgodne(ksiega, TRANSAKCJE, ceny)
+    assert ksiega.przeliczone_wiersze == 20
+    _zgodne(ksiega, TRANSAKCJE, ceny)
+    assert ksiega.przeliczone_wiersze == 0
+
+
+def test_dodana_i_usunieta_transakcja_od_jej_daty():
+    ksiega = KsiegaPrzyrostowa()
+    ceny = _ceny(80)
+    _zgodne(ksiega, TRANSAKCJE, ceny)
+    nowa = {"ticker": "MSFT", "typ": "Kupno", "ilosc": 1, "cena_zakupu": 310.0, "data": "2024-03-01"}
+    _zgodne(ksiega, TRANSAKCJE + [nowa], ceny)
+    assert ksiega.przeliczone_wiersze == 80 - 60          # od 2024-03-01 (wiersz 60)
+    _zgodne(ksiega, [tx for i, tx in enumerate(TRANSAKCJE) if i != 2], ceny)
+    assert ksiega.przeliczone_wiersze == 80 - 19          # usunięta sprzedaż z 2024-01-20
+
+
+def test_korekta_ceny_i_znikniety_ticker():
+    ksiega = KsiegaPrzyrostowa()
+    ceny = _ceny(80)
+    _zgodne(ksiega, TRANSAKCJE, ceny)
+    skorygowane = ceny.copy()
+    skorygowane.iloc[70:, 0] *= 0.5                      # split/dywidenda w ogonie
+    _zgodne(ksiega, TRANSAKCJE, skorygowane)
+    assert ksiega.przeliczone_wiersze == 10
+    _zgodne(ksiega, [tx for tx in TRANSAKCJE if tx["ticker"] == "AAPL"], skorygowane)
+
+
+def test_pusty_portfel_resetuje_stan():
+    ksiega = KsiegaPrzyrostowa()
+    ceny = _ceny(30)
+    _zgodne(ksiega, TRANSAKCJE, ceny)
+    assert ksiega.aktualizuj(przygotuj_transakcje([]), ceny).empty
+    _zgodne(ksiega, TRANSAKCJE[:2], ceny)
@@ -0,0 +1,113 @@
+"""Lustro na żywo (on_snapshot portfeli i transakcji) na fake Firestore."""
+
+UID = "u1"
+
+
+def _portfele(db):
+    return db.collection("users").document(UID).collection("portfolios")
+
+
+def _tx(ticker, data):
+    return {"ticker": ticker, "typ": "Kupno", "ilosc": 1, "cena_zakupu": 10.0, "data": data}
+
+
+def _przygotuj(db):
+    _portfele(db).document("p1").set({"nazwa": "Główny"})
+    _portfele(db).document("p1").collection("transactions").document("b").set(_tx("MSFT", "2024-02-01"))
+    _portfele(db).document("p1").collection("transactions").document("a").set(_tx("AAPL", "2024-01-01"))
+
+
+def test_pierwszy_snapshot_wypelnia_lustro(fc, db):
+    _przygotuj(db)
+    lustro = fc.uruchom_lustro(db, UID)
+    assert [p["id"] for p in lustro.portfele()] == ["p1"]
+    # Odczyt z lustra — posortowany jak order_by("data")
+    assert [tx["id"] for tx in lustro.transakcje("p1")] == ["a", "b"]
+    assert [tx["id"] for tx in fc.pobierz_transakcje(db, UID, "p1")] == ["a", "b"]
+    assert fc.wersja_danych(UID) > 0
+
+
+def test_bez_snapshotu_odczyt_z_firestore(fc, db):
+    _przygotuj(db)
+    db.wstrzymane = True
+    lustro = fc.uruchom_lustro(db, UID)
+    assert lustro.portfele() is None
+    assert [p["id"] for p in fc.pobierz_portfele(db, UID)] == ["p1"]
+    db.dostarcz()
+    assert lustro.portfele() is not None
+
+
+def test_wlasny_zapis_widoczny_przed_snapshotem(fc, db):
+    _przygotuj(db)
+    fc.uruchom_lustro(db, UID)
+    przed = fc.wersja_danych(UID)
+
+    db.wstrzymane = True              # snapshot z echem zapisu jeszcze nie dotarł
+    tx_id = fc.dodaj_transakcje(db, UID, "p1", _tx("NVDA", "2024-03-01"))
+    assert [tx["id"] for tx in fc.pobierz_transakcje(db, UID, "p1")] == ["a", "b", tx_id]
+    assert fc.wersja_danych(UID) > przed
+
+    db.dostarcz()                     # echo z serwera — bez duplikatu, te same dane
+    txs = fc.pobierz_transakcje(db, UID, "p1")
+    assert [tx["id"] for tx in txs] == ["a", "b", tx_id]
+    assert txs[-1]["ticker"] == "NVDA"
+
+    fc.usun_transakcje(db, UID, "p1", tx_id)
+    assert [tx["id"] for tx in fc.pobierz_transakcje(db, UID, "p1")] == ["a", "b"]
+
+
+def test_zmiana_zdalna_podbija_wersje(fc, db):
+    _przygotuj(db)
+    fc.uruchom_lustro(db, UID)
+    przed = fc.wersja_danych(UID)
+
+    # Zapis z innej sesji / urządzenia — prosto do Firestore, z pominięciem lustra
+    _portfele(db).document("p1").collection("transactions").document("c").set(_tx("TSLA", "2024-04-01"))
+    assert fc.wersja_danych(UID) > przed
+    assert [tx["id"] for tx in fc.pobierz_transakcje(db, UID, "p1")] == ["a", "b", "c"]
+
+    przed = fc.wersja_danych(UID)
+    _portfele(db).document("p2").set({"nazwa": "Drugi"})
+    assert fc.wersja_danych(UID) > przed
+    assert {p["id"] for p in fc.pobierz_portfele(db, UID)} == {"p1", "p2"}
+
+
+def test_portfele_z_tombstone_niewidoczne(fc, db):
+    _przygotuj(db)
+    _portfele(db).document("p2").set({"nazwa": "Usuwany", "usuniety": True})
+    lustro = fc.uruchom_lustro(db, UID)
+    assert [p["id"] for p in fc.pobierz_portfele(db, UID)] == ["p1"]
+    assert lustro.transakcje("p2") is None
+
+    # Tombstone ustawiony zdalnie: portfel znika, nasłuch jego transakcji zamknięty
+    _portfele(db).document("p1").set({"usuniety": True}, merge=True)
+    assert fc.pobierz_portfele(db, UID) == []
+    assert lustro.transakcje("p1") is None
+    assert {w.sciezka[-1] for w in db.nasluchy} == {"portfolios"}
+
+
+def test_wylogowanie_zamyka_nasluchy(fc, db):
+    _przygotuj(db)
+    fc.uruchom_lustro(db, UID)
+    assert len(db.nasluchy) == 2      # portfele + transakcje p1
+
+    fc.zatrzymaj_lustro(UID)
+    assert db.nasluchy == set()
+    assert fc.wersja_danych(UID) is None
+    # Po wylogowaniu zmiany w Firestore nie trafiają już do lustra
+    _portfele(db).document("p1").collection("transactions").document("c").set(_tx("TSLA", "2024-04-01"))
+    assert [tx["id"] for tx in fc.pobierz_transakcje(db, UID, "p1")] == ["a", "b", "c"]
+
+
+def test_pozycje_z_lustra_bez_odczytu_firestore(fc, db, monkeypatch):
+    _przygotuj(db)
+    fc.uruchom_lustro(db, UID)
+
+    def _siec(*args, **kwargs):
+        raise AssertionError("odczyt meta/pozycje mimo działającego lustra")
+    monkeypatch.setattr(fc, "_pozycje_ref", _siec)
+    assert set(fc.pobierz_pozycje(db, UID, "p1")) == {"AAPL", "MSFT"}
+
+    # Zmiana zdalna — nowa wersja lustra, pozycje przeliczone
+    _portfele(db).document("p1").collection("transactions").document("c").set(_tx("AAPL", "2024-04-01"))
+    assert fc.pobierz_pozycje(db, UID, "p1")["AAPL"]["ilosc"] == 2
@@ -0,0 +1,54 @@
+"""Interfejs dostawców danych i świece krypto (swiece_krypto) u dostawcy yfinance."""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("requests")
+import market_data  # noqa: E402
+
+
+def test_dostawca_musi_miec_historie():
+    with pytest.raises(TypeError):
+        market_data.MarketDataProvider()
+
+    class BezHistorii(market_data.MarketDataProvider):
+        pass
+    with pytest.raises(TypeError):
+        BezHistorii()
+
+
+class _Yahoo(market_data.YFinanceProvider):
+    """YFinanceProvider bez sieci: godzinowe świece od `start`, zapisane wywołania."""
+
+    def __init__(self):
+        self.wywolania = []
+
+    def historia(self, symbol, start=None, end=None, period=None, interval="1d", limit=None):
+        self.wywolania.append((symbol, interval))
+        czestotliwosc = {"15m": "15min", "1h": "1h", "1d": "1D"}[interval]
+        indeks = pd.date_range(start, pd.Timestamp.now(tz="UTC").tz_localize(None), freq=czestotliwosc, tz="UTC")
+        return pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5, "Volume": 1.0}, index=indeks)
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    monkeypatch.setenv("BETA1_MARKET_DATA_KRYPTO", "yfinance")
+    monkeypatch.delenv("BETA1_MARKET_DATA", raising=False)
+    zrodlo = _Yahoo()
+    monkeypatch.setitem(market_data._instancje, "yfinance", zrodlo)
+    return zrodlo
+
+
+@pytest.mark.parametrize("bar, bazowy", [("15m", "15m"), ("4H", "1h"), ("1D", "1d"), ("1W", "1d")])
+def test_bar_blofin_na_interwal_yahoo(yahoo, bar, bazowy):
+    df = market_data.swiece_krypto("BTC-USDT", bar, limit=20)
+    assert yahoo.wywolania == [("BTC-USD", bazowy)]
+    assert len(df) == 20
+    assert df.index.tz is None                      # naiwny UTC jak BloFin
+
+
+def test_nieznany_dostawca_krypto(monkeypatch):
+    monkeypatch.setenv("BETA1_MARKET_DATA_KRYPTO", "coingecko")
+    monkeypatch.delenv("BETA1_MARKET_DATA", raising=False)
+    with pytest.raises(ValueError):
+        market_data.dostawca("krypto")
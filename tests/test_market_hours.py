@@ -0,0 +1,72 @@
+"""TTL cache wg godzin sesji (market_hours) na granicach sesji."""
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import market_hours as mh
+
+NY = ZoneInfo("America/New_York")
+WAWA = ZoneInfo("Europe/Warsaw")
+# Środa 2024-03-13 (po zmianie czasu w USA, przed zmianą w Europie)
+SRODA = datetime(2024, 3, 13)
+
+
+def _o(strefa, dzien, godzina, minuta=0, sekunda=0):
+    return (dzien.replace(hour=godzina, minute=minuta, second=sekunda, tzinfo=strefa)).astimezone(timezone.utc)
+
+
+@pytest.mark.parametrize("symbol, oczekiwany", [
+    ("AAPL", ""), ("PKN.WA", ".WA"), ("SAP.DE", ".DE"), ("^GSPC", None), ("EURUSD=X", None), ("X.XX", None),
+])
+def test_sufiks_gieldy(symbol, oczekiwany):
+    assert mh.sufiks_gieldy(symbol) == oczekiwany
+
+
+def test_sesja_otwarta_krotki_ttl():
+    assert mh.ttl("AAPL", teraz=_o(NY, SRODA, 9, 30)) == mh.TTL["notowania"]["otwarta"]
+    assert mh.ttl("AAPL", "historia", teraz=_o(NY, SRODA, 15, 59)) == mh.TTL["historia"]["otwarta"]
+
+
+def test_przed_otwarciem_do_otwarcia():
+    # Minutę przed otwarciem: TTL nie krótszy niż dla otwartej giełdy
+    assert mh.ttl("AAPL", teraz=_o(NY, SRODA, 9, 29)) == mh.TTL["notowania"]["otwarta"]
+    # Dwie godziny przed otwarciem: dokładnie do otwarcia
+    assert mh.ttl("AAPL", teraz=_o(NY, SRODA, 7, 30)) == 2 * 3600
+
+
+def test_okno_po_zamknieciu():
+    zamkniecie = _o(NY, SRODA, 16, 0)
+    koniec_okna = zamkniecie + mh.PO_ZAMKNIECIU
+    assert mh.ttl("AAPL", teraz=koniec_okna - timedelta(seconds=1)) == mh.TTL["notowania"]["otwarta"]
+    # Po oknie: do jutrzejszego otwarcia, ograniczone MAX_TTL_ZAMKNIETEJ
+    do_otwarcia = (_o(NY, SRODA + timedelta(days=1), 9, 30) - koniec_okna).total_seconds()
+    assert mh.ttl("AAPL", teraz=koniec_okna) == do_otwarcia
+
+
+def test_weekend_ograniczony_maks_ttl():
+    piatek_wieczor = _o(WAWA, SRODA + timedelta(days=2), 18, 0)
+    assert mh.ttl("PKN.WA", teraz=piatek_wieczor) == mh.MAX_TTL_ZAMKNIETEJ
+    # Niedziela wieczór: do poniedziałkowego otwarcia (9:00)
+    niedziela = _o(WAWA, SRODA + timedelta(days=4), 21, 0)
+    assert mh.ttl("PKN.WA", teraz=niedziela) == 12 * 3600
+
+
+def test_krypto_i_poza_kalendarzem():
+    noc = _o(NY, SRODA, 3, 0)
+    assert mh.ttl("BTC-USD", krypto=True, teraz=noc) == mh.TTL["notowania"]["krypto"]
+    assert mh.ttl("^GSPC", teraz=noc) == mh.TTL["notowania"]["domyslny"]
+
+
+def test_klucz_okna_staly_do_otwarcia():
+    wieczor = _o(NY, SRODA, 20, 0)
+    noc = _o(NY, SRODA + timedelta(days=1), 4, 0)
+    assert mh.klucz_okna("AAPL", teraz=wieczor) == mh.klucz_okna("AAPL", teraz=noc)
+    # Po otwarciu nowy klucz, zmieniany co TTL otwartej giełdy
+    otwarcie = _o(NY, SRODA + timedelta(days=1), 9, 30)
+    assert mh.klucz_okna("AAPL", teraz=otwarcie) != mh.klucz_okna("AAPL", teraz=noc)
+    dlugosc = mh.TTL["historia"]["otwarta"]
+    poczatek = datetime.fromtimestamp((otwarcie.timestamp() // dlugosc + 1) * dlugosc, timezone.utc)
+    assert mh.klucz_okna("AAPL", teraz=poczatek) == mh.klucz_okna("AAPL", teraz=poczatek + timedelta(seconds=dlugosc - 1))
+    assert mh.klucz_okna("AAPL", teraz=poczatek) != mh.klucz_okna("AAPL", teraz=poczatek + timedelta(seconds=dlugosc))
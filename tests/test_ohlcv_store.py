@@ -0,0 +1,95 @@
+"""Zbiorcze dociąganie historii (pobierz_przyrostowo_wielu) na magazynie w katalogu tymczasowym."""
+
+import pandas as pd
+import pytest
+
+import ohlcv_store
+
+
+@pytest.fixture(autouse=True)
+def magazyn(tmp_path, monkeypatch):
+    monkeypatch.setattr(ohlcv_store, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(ohlcv_store, "STORE_PATH", str(tmp_path / "ohlcv.sqlite"))
+    monkeypatch.setattr(ohlcv_store, "_schemat_gotowy", False)
+
+
+def _swiece(od, dni, cena):
+    indeks = pd.date_range(od, periods=dni, freq="D")
+    return pd.DataFrame({"Open": cena, "High": cena, "Low": cena, "Close": cena, "Volume": 1.0}, index=indeks)
+
+
+class Zrodlo:
+    """fetch_wielu_fn z zapisem wywołań; ceny[symbol] = DataFrame całej historii."""
+
+    def __init__(self, ceny):
+        self.ceny = ceny
+        self.wywolania = []
+
+    def __call__(self, symbole, od):
+        self.wywolania.append((tuple(symbole), od))
+        return {s: self.ceny[s][self.ceny[s].index >= od] for s in symbole if s in self.ceny}
+
+
+def test_zimny_magazyn_jedno_zapytanie():
+    zrodlo = Zrodlo({s: _swiece("2024-01-01", 10, 1.0 + i) for i, s in enumerate(["A", "B", "C"])})
+    wynik = ohlcv_store.pobierz_przyrostowo_wielu(["A", "B", "C", "BRAK"], "1d", "2024-01-01", zrodlo)
+    assert zrodlo.wywolania == [(("A", "B", "C", "BRAK"), "2024-01-01")]
+    assert [len(wynik[s]) for s in ["A", "B", "C"]] == [10, 10, 10]
+    assert wynik["BRAK"].empty
+
+
+def test_cieply_magazyn_dociaga_ogon_grupami():
+    zrodlo = Zrodlo({"A": _swiece("2024-01-01", 10, 1.0), "B": _swiece("2024-01-01", 5, 2.0)})
+    ohlcv_store.pobierz_przyrostowo_wielu(["A", "B"], "1d", "2024-01-01", zrodlo)
+    zrodlo.ceny = {"A": _swiece("2024-01-01", 12, 1.0), "B": _swiece("2024-01-01", 7, 2.0)}
+    zrodlo.wywolania.clear()
+
+    wynik = ohlcv_store.pobierz_przyrostowo_wielu(["A", "B"], "1d", "2024-01-01", zrodlo)
+    # Każdy symbol od swojej świecy kotwicy (przedostatniej zapisanej) — różne kotwice, osobne zapytania
+    assert sorted(zrodlo.wywolania) == [(("A",), "2024-01-09"), (("B",), "2024-01-04")]
+    assert len(wynik["A"]) == 12 and len(wynik["B"]) == 7
+
+
+def test_korekta_historii_pobiera_od_nowa():
+    zrodlo = Zrodlo({"A": _swiece("2024-01-01", 10, 1.0), "B": _swiece("2024-01-01", 10, 2.0)})
+    ohlcv_store.pobierz_przyrostowo_wielu(["A", "B"], "1d", "2024-01-01", zrodlo)
+    # Dywidenda: Yahoo przelicza całą historię A, B bez zmian
+    zrodlo.ceny["A"] = _swiece("2024-01-01", 11, 0.9)
+    zrodlo.ceny["B"] = _swiece("2024-01-01", 11, 2.0)
+    zrodlo.wywolania.clear()
+
+    wynik = ohlcv_store.pobierz_przyrostowo_wielu(["A", "B"], "1d", "2024-01-01", zrodlo)
+    assert zrodlo.wywolania == [(("A", "B"), "2024-01-09"), (("A",), "2024-01-01")]
+    assert (wynik["A"]["Close"] == 0.9).all() and len(wynik["A"]) == 11
+    assert (wynik["B"]["Close"] == 2.0).all() and len(wynik["B"]) == 11
+
+
+def _intraday(od, n, cena=1.0):
+    indeks = pd.date_range(od, periods=n, freq="15min")
+    return pd.DataFrame({"Open": cena, "High": cena, "Low": cena, "Close": cena, "Volume": 1.0}, index=indeks)
+
+
+def test_retencja_usuwa_swiece_sprzed_okna():
+    ohlcv_store.pobierz_przyrostowo("BTC-USD", "15m", "2024-01-01", lambda od: _intraday(od, 4 * 96))
+    # Dwa dni później okno retencji przesunięte — świece z 1-2 stycznia znikają z magazynu
+    wynik = ohlcv_store.pobierz_przyrostowo("BTC-USD", "15m", "2024-01-03",
+                                            lambda od: _intraday(od, 96), przytnij=True)
+    assert wynik.index[0] == pd.Timestamp("2024-01-03")
+    assert ohlcv_store.odczytaj("BTC-USD", "15m").index[0] == pd.Timestamp("2024-01-03")
+    assert ohlcv_store._pokrycie("BTC-USD", "15m")[0] == ohlcv_store._ts("2024-01-03")
+
+
+def test_bez_przycinania_historia_zostaje():
+    ohlcv_store.pobierz_przyrostowo("A", "1d", "2024-01-01", lambda od: _swiece(od, 10, 1.0))
+    ohlcv_store.pobierz_przyrostowo("A", "1d", "2024-01-05", lambda od: _swiece(od, 6, 1.0))
+    assert ohlcv_store.odczytaj("A", "1d").index[0] == pd.Timestamp("2024-01-01")
+
+
+def test_blad_sieci_zwraca_magazyn_i_loguje(caplog):
+    ohlcv_store.pobierz_przyrostowo("A", "1d", "2024-01-01", lambda od: _swiece(od, 10, 1.0))
+
+    def _blad(od):
+        raise ConnectionError("timeout")
+    wynik = ohlcv_store.pobierz_przyrostowo("A", "1d", "2024-01-01", _blad)
+    assert len(wynik) == 10
+    assert "ConnectionError" in caplog.text
@@ -0,0 +1,77 @@
+"""Snapshot pozycji (users/{uid}/portfolios/{pid}/meta/pozycje) na fake Firestore."""
+
+import pytest
+
+UID, PID = "u1", "p1"
+
+
+def _tx(ticker, typ, ilosc, cena, data):
+    return {"ticker": ticker, "typ": typ, "ilosc": ilosc, "cena_zakupu": cena, "data": data}
+
+
+def _log(db):
+    return db.collection("users").document(UID).collection("portfolios").document(PID).collection("transactions")
+
+
+def _snapshot(db):
+    snap = db.collection("users").document(UID).collection("portfolios").document(PID) \
+        .collection("meta").document("pozycje").get()
+    return snap.to_dict()["tickery"] if snap.exists else None
+
+
+def test_pierwszy_zapis_bez_snapshotu(fc, db):
+    # Portfel sprzed snapshotów: log transakcji jest, dokumentu meta/pozycje nie ma
+    _log(db).document("a").set(_tx("AAPL", "Kupno", 10, 100.0, "2024-01-02"))
+    _log(db).document("b").set(_tx("AAPL", "Sprzedaż", 4, 120.0, "2024-02-01"))
+    assert _snapshot(db) is None
+
+    fc.dodaj_transakcje(db, UID, PID, _tx("MSFT", "Kupno", 2, 300.0, "2024-03-01"))
+
+    pozycje = _snapshot(db)
+    assert pozycje["AAPL"]["ilosc"] == pytest.approx(6)
+    assert pozycje["AAPL"]["koszt"] == pytest.approx(600.0)
+    assert pozycje["MSFT"]["ilosc"] == pytest.approx(2)
+    assert pozycje["AAPL"]["pierwszy_zakup"] == "2024-01-02"
+
+
+def test_pierwszy_zapis_nowego_portfela(fc, db):
+    fc.dodaj_transakcje(db, UID, PID, _tx("AAPL", "Kupno", 1, 100.0, "2024-01-02"))
+    assert _snapshot(db)["AAPL"]["ilosc"] == pytest.approx(1)
+
+
+def test_pobierz_pozycje_buduje_brakujacy_snapshot(fc, db):
+    _log(db).document("a").set(_tx("AAPL", "Kupno", 3, 50.0, "2024-01-02"))
+    assert fc.pobierz_pozycje(db, UID, PID)["AAPL"]["ilosc"] == pytest.approx(3)
+    assert _snapshot(db)["AAPL"]["ilosc"] == pytest.approx(3)
+
+
+def test_snapshot_zgodny_z_logiem_po_zapisach(fc, db):
+    fc.dodaj_transakcje(db, UID, PID, _tx("AAPL", "Kupno", 10, 100.0, "2024-01-05"))
+    fc.dodaj_transakcje(db, UID, PID, _tx("AAPL", "Kupno", 10, 80.0, "2024-01-01"))   # wcześniejsza data
+    tx_id = fc.dodaj_transakcje(db, UID, PID, _tx("AAPL", "Sprzedaż", 5, 90.0, "2024-02-01"))
+    fc.usun_transakcje(db, UID, PID, tx_id)
+    assert fc.sprawdz_pozycje(db, UID, PID) == {}
+    assert _snapshot(db)["AAPL"]["ilosc"] == pytest.approx(20)
+
+
+def test_sprawdz_pozycje_naprawia(fc, db):
+    fc.dodaj_transakcje(db, UID, PID, _tx("AAPL", "Kupno", 10, 100.0, "2024-01-05"))
+    _log(db).document("obok").set(_tx("AAPL", "Kupno", 5, 100.0, "2024-02-01"))   # zapis z pominięciem snapshotu
+    assert set(fc.sprawdz_pozycje(db, UID, PID, napraw=True)) == {"AAPL"}
+    assert fc.sprawdz_pozycje(db, UID, PID) == {}
+
+
+def test_import_przy_bledzie_odbudowy_usuwa_snapshot(fc, db, monkeypatch):
+    fc.dodaj_transakcje(db, UID, PID, _tx("AAPL", "Kupno", 1, 100.0, "2024-01-02"))
+
+    def _blad(*args, **kwargs):
+        raise RuntimeError("odbudowa nieudana")
+    przebuduj = fc.przebuduj_pozycje
+    monkeypatch.setattr(fc, "przebuduj_pozycje", _blad)
+
+    statusy = fc.dodaj_transakcje_zbiorczo(db, UID, PID, [_tx("AAPL", "Kupno", 2, 100.0, "2024-02-02")])
+    assert [s["status"] for s in statusy] == ["ok"]
+    # Nieaktualny snapshot nie zostaje — następny odczyt odbuduje go z logu
+    assert _snapshot(db) is None
+    monkeypatch.setattr(fc, "przebuduj_pozycje", przebuduj)
+    assert fc.pobierz_pozycje(db, UID, PID)["AAPL"]["ilosc"] == pytest.approx(3)
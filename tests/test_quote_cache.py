@@ -0,0 +1,114 @@
+"""Notowania „stale-while-revalidate” (quote_cache) na sztucznym zegarze."""
+
+import threading
+
+import pytest
+
+import quote_cache
+
+TTL = 100
+
+
+@pytest.fixture(autouse=True)
+def pusty_cache(monkeypatch, zegar):
+    monkeypatch.setattr(quote_cache, "_wpisy", {})
+    monkeypatch.setattr(quote_cache, "_odswiezane", set())
+    monkeypatch.setattr(quote_cache, "time", zegar)
+
+
+class Zrodlo:
+    """fetch_fn notowań: ceny[ticker] (None — błąd), opcjonalnie wstrzymane do zwolnij()."""
+
+    def __init__(self, ceny):
+        self.ceny = ceny
+        self.wywolania = []
+        self.wstrzymaj = False
+        self.zwolniony = threading.Event()
+
+    def __call__(self, tickery):
+        self.wywolania.append(tickery)
+        if self.wstrzymaj:
+            self.zwolniony.wait(5)
+        return {tk: {"cena": self.ceny[tk]} if self.ceny.get(tk) is not None else {"error": "brak"}
+                for tk in tickery}
+
+
+def _poczekaj_na_odswiezenie(tickery):
+    for _ in range(500):
+        if not quote_cache.odswiezane(tickery):
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("odświeżanie w tle nie skończyło się")
+
+
+def test_pierwsze_pobranie_synchronicznie_potem_z_cache(zegar):
+    zrodlo = Zrodlo({"AAPL": 1.0})
+    wyniki, wiek = quote_cache.pobierz(("AAPL",), zrodlo, ttl=TTL)
+    assert wyniki == {"AAPL": {"cena": 1.0}} and wiek == {"AAPL": 0}
+
+    zegar.przesun(TTL * quote_cache.ODSWIEZ_PRZY - 1)       # jeszcze świeże
+    wyniki, wiek = quote_cache.pobierz(("AAPL",), zrodlo, ttl=TTL)
+    assert wiek["AAPL"] == pytest.approx(TTL * quote_cache.ODSWIEZ_PRZY - 1)
+    assert zrodlo.wywolania == [("AAPL",)]
+
+
+def test_wygasajace_zwracane_od_razu_odswiezane_w_tle(zegar):
+    zrodlo = Zrodlo({"AAPL": 1.0})
+    quote_cache.pobierz(("AAPL",), zrodlo, ttl=TTL)
+    zrodlo.ceny["AAPL"], zrodlo.wstrzymaj = 2.0, True
+    zegar.przesun(TTL)
+
+    # Stara cena od razu (z wiekiem), pobranie trwa w tle
+    wyniki, wiek = quote_cache.pobierz(("AAPL",), zrodlo, ttl=TTL)
+    assert wyniki["AAPL"]["cena"] == 1.0 and wiek["AAPL"] == TTL
+    assert quote_cache.odswiezane(("AAPL",))
+    # Kolejny rerun w trakcie nie uruchamia drugiego odświeżania
+    quote_cache.pobierz(("AAPL",), zrodlo, ttl=TTL)
+
+    zrodlo.zwolniony.set()
+    _poczekaj_na_odswiezenie(("AAPL",))
+    assert len(zrodlo.wywolania) == 2
+    wyniki, wiek = quote_cache.pobierz(("AAPL",), zrodlo, ttl=TTL)
+    assert wyniki["AAPL"]["cena"] == 2.0 and wiek["AAPL"] == 0
+
+
+def test_blad_odswiezenia_zachowuje_ostatnia_cene(zegar):
+    zrodlo = Zrodlo({"AAPL": 1.0})
+    quote_cache.pobierz(("AAPL",), zrodlo, ttl=TTL)
+    zrodlo.ceny["AAPL"] = None
+    zegar.przesun(TTL)
+    quote_cache.pobierz(("AAPL",), zrodlo, ttl=TTL)
+    _poczekaj_na_odswiezenie(("AAPL",))
+
+    wyniki, _ = quote_cache.pobierz(("AAPL",), zrodlo, ttl=TTL)
+    assert wyniki["AAPL"] == {"cena": 1.0}
+    # Następna próba dopiero po PONOW_PO od nieudanej
+    assert len(zrodlo.wywolania) == 2
+    zegar.przesun(quote_cache.PONOW_PO)
+    quote_cache.pobierz(("AAPL",), zrodlo, ttl=TTL)
+    _poczekaj_na_odswiezenie(("AAPL",))
+    assert len(zrodlo.wywolania) == 3
+
+
+def test_blad_bez_dobrej_ceny_ponawiany_po_przerwie(zegar):
+    zrodlo = Zrodlo({"ZLY": None})
+    wyniki, _ = quote_cache.pobierz(("ZLY",), zrodlo, ttl=TTL)
+    assert "error" in wyniki["ZLY"]
+    quote_cache.pobierz(("ZLY",), zrodlo, ttl=TTL)
+    assert len(zrodlo.wywolania) == 1                        # w PONOW_PO — bez zapytania
+
+    zrodlo.ceny["ZLY"] = 5.0
+    zegar.przesun(quote_cache.PONOW_PO)
+    quote_cache.pobierz(("ZLY",), zrodlo, ttl=TTL)
+    _poczekaj_na_odswiezenie(("ZLY",))
+    assert quote_cache.pobierz(("ZLY",), zrodlo, ttl=TTL)[0]["ZLY"] == {"cena": 5.0}
+
+
+def test_ttl_per_ticker(zegar):
+    zrodlo = Zrodlo({"AAPL": 1.0, "BTC-USD": 2.0})
+    ttle = {"AAPL": 1000, "BTC-USD": 100}
+    quote_cache.pobierz(("AAPL", "BTC-USD"), zrodlo, ttl=ttle.get)
+    zegar.przesun(100)
+    quote_cache.pobierz(("AAPL", "BTC-USD"), zrodlo, ttl=ttle.get)
+    _poczekaj_na_odswiezenie(("AAPL", "BTC-USD"))
+    assert zrodlo.wywolania[1] == ("BTC-USD",)
@@ -0,0 +1,66 @@
+"""Single-flight wspólnego cache (PamiecBackend) przy kilku wątkach jak przy kilku workerach."""
+
+import threading
+import time
+
+import pytest
+
+import shared_cache
+
+
+@pytest.fixture(autouse=True)
+def pamiec():
+    shared_cache.ustaw_backend(shared_cache.PamiecBackend())
+    yield
+    shared_cache.ustaw_backend(None)
+
+
+def _lider_i_czekajacy(wynik_lidera):
+    """Lider pobiera "A" (0.3 s) i zwraca wynik_lidera; drugi wątek dołącza w trakcie."""
+    wszedl = threading.Event()
+    wywolania = []
+
+    def fetch(elementy):
+        wywolania.append(list(elementy))
+        if not wszedl.is_set():
+            wszedl.set()
+            time.sleep(0.3)
+            return wynik_lidera
+        return {el: {"cena": 2.0} for el in elementy}
+
+    lider = threading.Thread(target=lambda: shared_cache.pobierz_wiele(
+        {"A": "q:A"}, 60, fetch, pusty=lambda w: "error" in w))
+    lider.start()
+    wszedl.wait(5)
+    start = time.time()
+    wynik = shared_cache.pobierz_wiele({"A": "q:A"}, 60, fetch, pusty=lambda w: "error" in w)
+    lider.join()
+    return wynik, time.time() - start, wywolania
+
+
+def test_czekajacy_dostaje_wynik_lidera():
+    wynik, czas, wywolania = _lider_i_czekajacy({"A": {"cena": 1.0}})
+    assert wynik == {"A": {"cena": 1.0}}
+    assert wywolania == [["A"]]
+    assert czas < shared_cache.CZEKAJ_MAX / 10
+
+
+@pytest.mark.parametrize("wynik_lidera", [{"A": {"error": "delisted"}}, {}])
+def test_lider_bez_zapisu_nie_wstrzymuje_czekajacego(wynik_lidera):
+    # Pusty wynik albo brak symbolu w paczce — nic nie trafia do cache;
+    # czekający przejmuje blokadę zaraz po liderze zamiast czekać CZEKAJ_MAX
+    wynik, czas, wywolania = _lider_i_czekajacy(wynik_lidera)
+    assert wynik == {"A": {"cena": 2.0}}
+    assert wywolania == [["A"], ["A"]]
+    assert czas < shared_cache.CZEKAJ_MAX / 10
+
+
+def test_zbiorczo_tylko_brakujace():
+    shared_cache.pobierz_wiele({"A": "q:A"}, 60, lambda els: {el: 1 for el in els})
+    wywolania = []
+
+    def fetch(elementy):
+        wywolania.append(list(elementy))
+        return {el: 2 for el in elementy}
+    assert shared_cache.pobierz_wiele({"A": "q:A", "B": "q:B"}, 60, fetch) == {"A": 1, "B": 2}
+    assert wywolania == [["B"]]
@@ -0,0 +1,101 @@
+"""single_flight.wspolnie — łączenie jednoczesnych wywołań."""
+
+import threading
+import time
+
+import pytest
+
+from single_flight import dolaczone, wspolnie
+
+
+class _Przerwanie(BaseException):
+    """Jak StopException / RerunException Streamlit — nie dziedziczy po Exception."""
+
+
+def _czekajacy(klucz, fn, wyniki):
+    watek = threading.Thread(target=lambda: wyniki.append(wspolnie(klucz, fn)))
+    watek.start()
+    return watek
+
+
+def _poczekaj_na_dolaczenie(przed):
+    """Do chwili, gdy kolejny wątek czeka na trwające pobranie."""
+    koniec = time.monotonic() + 5
+    while dolaczone() == przed and time.monotonic() < koniec:
+        time.sleep(0.001)
+    assert dolaczone() > przed
+
+
+def test_jedno_wywolanie_dla_czekajacych():
+    wszedl, zwolnij, wywolania, wyniki = threading.Event(), threading.Event(), [], []
+
+    def lider():
+        wszedl.set()
+        zwolnij.wait(5)
+        wywolania.append(1)
+        return {"cena": 1.0}
+
+    w_lider = _czekajacy("k1", lider, wyniki)
+    wszedl.wait(5)
+    przed = dolaczone()
+    w_czekajacy = _czekajacy("k1", lambda: pytest.fail("drugie wywołanie"), wyniki)
+    _poczekaj_na_dolaczenie(przed)
+    zwolnij.set()
+    w_lider.join(5), w_czekajacy.join(5)
+    assert wywolania == [1]
+    assert wyniki == [{"cena": 1.0}, {"cena": 1.0}]
+    assert wyniki[0] is not wyniki[1]          # czekający dostaje kopię
+
+
+def test_przerwany_lider_czekajacy_ponawia():
+    wszedl, zwolnij, wyniki = threading.Event(), threading.Event(), []
+
+    def lider():
+        wszedl.set()
+        zwolnij.wait(5)
+        raise _Przerwanie()
+
+    bledy = []
+
+    def _lider():
+        try:
+            wspolnie("k2", lider)
+        except _Przerwanie:
+            bledy.append("przerwany")
+
+    w_lider = threading.Thread(target=_lider)
+    w_lider.start()
+    wszedl.wait(5)
+    przed = dolaczone()
+    w_czekajacy = _czekajacy("k2", lambda: "własny wynik", wyniki)
+    _poczekaj_na_dolaczenie(przed)
+    zwolnij.set()
+    w_lider.join(5), w_czekajacy.join(5)
+    assert bledy == ["przerwany"]
+    assert wyniki == ["własny wynik"]          # nie None
+
+
+def test_wyjatek_lidera_przekazany_czekajacym():
+    wszedl, zwolnij, bledy = threading.Event(), threading.Event(), []
+
+    def lider():
+        wszedl.set()
+        zwolnij.wait(5)
+        raise RuntimeError("sieć")
+
+    def _wywolaj(fn):
+        try:
+            wspolnie("k3", fn)
+        except RuntimeError as e:
+            bledy.append(str(e))
+
+    w_lider = threading.Thread(target=_wywolaj, args=(lider,))
+    w_lider.start()
+    wszedl.wait(5)
+    przed = dolaczone()
+    w_czekajacy = threading.Thread(target=_wywolaj, args=(lambda: pytest.fail("drugie wywołanie"),))
+    w_czekajacy.start()
+    _poczekaj_na_dolaczenie(przed)
+    zwolnij.set()
+    w_lider.join(5), w_czekajacy.join(5)
+    assert bledy == ["sieć", "sieć"]
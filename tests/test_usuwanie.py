@@ -0,0 +1,47 @@
+"""Usuwanie portfela (tombstone + kasowanie transakcji paczkami) na fake Firestore."""
+
+import pytest
+
+UID, PID = "u1", "p1"
+
+
+def _portfel(db):
+    return db.collection("users").document(UID).collection("portfolios").document(PID)
+
+
+def _przygotuj(db, n):
+    _portfel(db).set({"nazwa": "Główny"})
+    for i in range(n):
+        _portfel(db).collection("transactions").document(f"t{i}").set(
+            {"ticker": "AAPL", "typ": "Kupno", "ilosc": 1, "cena_zakupu": 10.0, "data": "2024-01-01"})
+
+
+def test_usuwanie_z_postepem(fc, db, monkeypatch):
+    monkeypatch.setattr(fc, "ROZMIAR_PACZKI", 4)
+    _przygotuj(db, 10)
+    postep = []
+    fc.usun_portfel(db, UID, PID, w_tle=False, postep=lambda zrobione, wszystkie: postep.append((zrobione, wszystkie)))
+    # Paczki 4 + 4 + 2 kończą się w dowolnej kolejności — po każdej jeden odczyt postępu
+    assert len(postep) == 3 and max(postep) == (10, 10)
+    assert db.dokumenty == {}
+
+
+def test_brakujacy_portfel_bez_notfound(fc, db):
+    # Portfel usunięty już w innej sesji — update() rzuciłby NotFound
+    fc.usun_portfel(db, UID, PID, w_tle=False)
+    assert db.dokumenty == {}
+
+
+def test_nieudane_sprzatanie_konczy_w_tle(fc, db, monkeypatch):
+    _przygotuj(db, 3)
+    w_tle = []
+    monkeypatch.setattr(fc, "_usun_w_tle", lambda db_, uid, pid: w_tle.append(pid))
+
+    def _blad(*args, **kwargs):
+        raise RuntimeError("paczka nieudana")
+    monkeypatch.setattr(fc, "dokoncz_usuwanie", _blad)
+
+    with pytest.raises(RuntimeError):
+        fc.usun_portfel(db, UID, PID, w_tle=False)
+    assert w_tle == [PID]
+    assert fc.pobierz_portfele(db, UID) == []          # tombstone — portfel już niewidoczny
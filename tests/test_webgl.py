@@ -0,0 +1,46 @@
+"""Przełączanie śladów wykresu na WebGL (chart_utils.webgl)."""
+
+import numpy as np
+import pytest
+
+go = pytest.importorskip("plotly.graph_objects")
+import chart_utils  # noqa: E402
+
+
+def _wykres(n):
+    x = np.arange(n)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=x, y=np.sin(x / 50), name="cena", mode="lines",
+                             line=dict(color="#00d4ff", width=2, dash="dot", shape="spline"),
+                             fill="tozeroy", cliponaxis=False, hovertemplate="%{y:.2f}<extra></extra>"))
+    fig.add_trace(go.Bar(x=x[:50], y=np.ones(50), name="wolumen"))
+    fig.add_trace(go.Candlestick(x=x[:10], open=x[:10], high=x[:10] + 1, low=x[:10] - 1, close=x[:10]))
+    fig.add_hline(y=0.5, line_dash="dash")
+    fig.update_layout(title="Test", yaxis_title="USD")
+    return fig
+
+
+def test_auto_ponizej_progu_bez_zmian():
+    fig = _wykres(1000)
+    assert chart_utils.webgl(fig, "auto") is fig
+    assert chart_utils.webgl(_wykres(20_000), "off").data[0].type == "scatter"
+
+
+def test_zamiana_na_scattergl_zachowuje_styl():
+    fig = _wykres(20_000)
+    assert chart_utils.liczba_punktow(fig) == 20_000 + 50 + 10
+    wynik = chart_utils.webgl(fig, "auto")
+    linia, slupki, swiece = wynik.data
+    assert linia.type == "scattergl"
+    assert linia.line.color == "#00d4ff" and linia.line.width == 2 and linia.line.dash == "dot"
+    assert linia.line.shape is None                 # spline nieobsługiwany przez scattergl
+    assert linia.fill == "tozeroy" and linia.hovertemplate == "%{y:.2f}<extra></extra>"
+    assert len(linia.x) == 20_000 and linia.name == "cena"
+    # Słupki i świece bez wersji GL — zostają; układ (tytuł, oś, linia pozioma) bez zmian
+    assert (slupki.type, swiece.type) == ("bar", "candlestick")
+    assert wynik.layout.title.text == "Test" and wynik.layout.yaxis.title.text == "USD"
+    assert len(wynik.layout.shapes) == 1
+
+
+def test_tryb_on_zawsze():
+    assert chart_utils.webgl(_wykres(100), "on").data[0].type == "scattergl"
@@ -29,11 +29,20 @@ TRANSLATIONS = {
         "logout": "🚪 Wyloguj",
         "dark_mode": "🌙 Tryb Ciemny",
         "palette": "🎨 Paleta",
+        "chart_downsampling": "📉 Próbkowanie długich wykresów",
+        "chart_downsampling_help": "Długie serie rysowane z ok. 2000 punktów (LTTB), świece łączone min/max — szybsze wykresy, kształt i szczyty bez zmian",
+        "chart_webgl": "⚡ Renderowanie WebGL",
+        "chart_webgl_help": "Linie rysowane przez kartę graficzną — płynne przewijanie długich historii. Auto: powyżej 10 000 punktów na wykresie",
+        "webgl_auto": "Auto",
+        "webgl_on": "Zawsze",
+        "webgl_off": "Nigdy (SVG)",
         "portfolios": "📁 **Portfele** (max 3)",
         "active_portfolio": "Aktywny portfel",
         "new_portfolio": "Nowy portfel",
         "name_placeholder": "Nazwa",
         "delete_portfolio": "🗑️ Usuń aktywny portfel",
+        "deleting_portfolio": "Usuwanie transakcji portfela...",
+        "delete_portfolio_background": "Portfel ukryty — nie wszystkie transakcje usunięto, sprzątanie dokończy się w tle",
         "portfolio_created": "utworzony!",
         "add_transaction": "📝 **Dodaj Transakcję**",
         "ticker_search": "🎯 Ticker (wpisz aby szukać)",
@@ -60,6 +69,10 @@ TRANSLATIONS = {
         "welcome": "### 👋 Witaj! Dodaj transakcję w panelu bocznym.",
         "fetching_data": "📡 Pobieram dane rynkowe...",
         "no_positions": "⚠️ Brak aktywnych pozycji.",
+        "quotes_fresh": "🟢 Notowania aktualne",
+        "quotes_age": "🕒 Notowania sprzed {} min",
+        "quotes_refreshing": " · odświeżanie w tle",
+        "yahoo_paused": "⏸️ Yahoo Finance nie odpowiada — kolejne zapytania wstrzymane na {} s, pokazujemy ostatnie znane ceny",
 
         # --- Metric Cards ---
         "portfolio_value": "Wartość Portfela",
@@ -192,6 +205,8 @@ TRANSLATIONS = {
         "csv_import_btn": "Importuj transakcje",
         "csv_success": "Zaimportowano {} transakcji",
         "csv_error": "Błąd importu",
+        "csv_skipped": "Pominięto {} wierszy zaimportowanych wcześniej",
+        "csv_failed": "Nie zapisano {} wierszy — ponów import (zapisane wiersze nie zostaną zdublowane)",
 
         # --- Correlation ---
         "corr_select": "Wybierz instrumenty do porównania",
@@ -199,6 +214,13 @@ TRANSLATIONS = {
         "corr_heatmap": "Macierz korelacji",
         "corr_chart": "Wykres cenowy",
         "corr_no_data": "Wybierz min. 2 instrumenty",
+        "corr_shrinkage": "Stabilizacja Ledoit-Wolf",
+        "corr_shrinkage_help": "Ściąga korelacje w stronę zera — mniej przypadkowych skrajnych wartości przy krótkim okresie lub wielu instrumentach",
+        "corr_cluster": "Grupuj skorelowane",
+        "corr_universe": "Korelacja portfela z rynkiem",
+        "corr_universe_btn": "Przelicz dla całej bazy tickerów ({} symboli)",
+        "corr_universe_most": "Najbardziej skorelowane",
+        "corr_universe_least": "Najmniej skorelowane",
 
         # --- Transaction Notes ---
         "note_label": "Notatka (opcjonalnie)",
@@ -231,11 +253,20 @@ TRANSLATIONS = {
         "logout": "🚪 Sign out",
         "dark_mode": "🌙 Dark Mode",
         "palette": "🎨 Palette",
+        "chart_downsampling": "📉 Downsample long charts",
+        "chart_downsampling_help": "Long series drawn from ~2000 points (LTTB), candles merged min/max — faster charts, same shape and peaks",
+        "chart_webgl": "⚡ WebGL rendering",
+        "chart_webgl_help": "Lines drawn by the GPU — smooth panning of long histories. Auto: above 10,000 points per chart",
+        "webgl_auto": "Auto",
+        "webgl_on": "Always",
+        "webgl_off": "Never (SVG)",
         "portfolios": "📁 **Portfolios** (max 3)",
         "active_portfolio": "Active portfolio",
         "new_portfolio": "New portfolio",
         "name_placeholder": "Name",
         "delete_portfolio": "🗑️ Delete active portfolio",
+        "deleting_portfolio": "Deleting portfolio transactions...",
+        "delete_portfolio_background": "Portfolio hidden — not all transactions were deleted, cleanup will finish in the background",
         "portfolio_created": "created!",
         "add_transaction": "📝 **Add Transaction**",
         "ticker_search": "🎯 Ticker (type to search)",
@@ -262,6 +293,10 @@ TRANSLATIONS = {
         "welcome": "### 👋 Welcome! Add a transaction in the sidebar.",
         "fetching_data": "📡 Fetching market data...",
         "no_positions": "⚠️ No active positions.",
+        "quotes_fresh": "🟢 Quotes up to date",
+        "quotes_age": "🕒 Quotes from {} min ago",
+        "quotes_refreshing": " · refreshing in background",
+        "yahoo_paused": "⏸️ Yahoo Finance is not responding — requests paused for {} s, showing last known prices",
 
         # --- Metric Cards ---
         "portfolio_value": "Portfolio Value",
@@ -394,6 +429,8 @@ TRANSLATIONS = {
         "csv_import_btn": "Import transactions",
         "csv_success": "Imported {} transactions",
         "csv_error": "Import error",
+        "csv_skipped": "Skipped {} rows imported earlier",
+        "csv_failed": "{} rows were not saved — retry the import (saved rows will not be duplicated)",
 
         # --- Correlation ---
         "corr_select": "Select instruments to compare",
@@ -401,6 +438,13 @@ TRANSLATIONS = {
         "corr_heatmap": "Correlation Matrix",
         "corr_chart": "Price Chart",
         "corr_no_data": "Select at least 2 instruments",
+        "corr_shrinkage": "Ledoit-Wolf shrinkage",
+        "corr_shrinkage_help": "Pulls correlations toward zero — fewer spurious extremes with a short period or many instruments",
+        "corr_cluster": "Group correlated",
+        "corr_universe": "Portfolio correlation with the market",
+        "corr_universe_btn": "Compute for the whole ticker database ({} symbols)",
+        "corr_universe_most": "Most correlated",
+        "corr_universe_least": "Least correlated",
 
         # --- Transaction Notes ---
         "note_label": "Note (optional)",
@@ -2,7 +2,6 @@
 # xtb_mapping.py — XTB Broker → Yahoo Finance ticker mapping
 # Maps XTB-style ticker symbols to valid yfinance symbols
 # =============================================================================
-import yfinance as yf
 
 # ─── Explicit XTB CFD/ETF/Synthetic → yfinance mapping ─────────────────────
 # XTB uses custom names for ETFs, indices, and CFDs that don't exist on Yahoo.